@@ -0,0 +1 @@
+"""Standalone performance benchmarks. Run each module with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,57 @@
+"""
+Encode/decode time and file size of ``votes.json`` per codec and layout.
+
+Runs each available codec over a synthetic votes history, pretty-printed
+(the historic on-disk format) and compact (``persistence.compact``).
+
+    python -m benchmarks.bench_codec --rounds 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from benchmarks.synthetic import make_votes
+from bot.persistence.repository import JsonCodec, get_codec
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    votes = make_votes(args.rounds)
+    codecs = [JsonCodec()]
+    fast = get_codec()
+    if type(fast) is not JsonCodec:
+        codecs.append(fast)
+    else:
+        print("orjson not installed; only the stdlib codec is measured")
+
+    print(f"{args.rounds} rounds, best of {args.repeat}")
+    print(f"{'codec':<8} {'layout':<8} {'encode ms':>10} {'decode ms':>10} {'size KiB':>10}")
+    for codec in codecs:
+        for pretty in (True, False):
+            payload = codec.dumps(votes, pretty=pretty)
+            encode = best_of(args.repeat, lambda: codec.dumps(votes, pretty=pretty))
+            decode = best_of(args.repeat, lambda: codec.loads(payload))
+            layout = "pretty" if pretty else "compact"
+            print(
+                f"{codec.name:<8} {layout:<8} {encode * 1000:>10.1f} {decode * 1000:>10.1f} "
+                f"{len(payload) / 1024:>10.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
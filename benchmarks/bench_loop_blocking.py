@@ -0,0 +1,57 @@
+"""
+Event-loop blocking caused by repository saves.
+
+Saves a synthetic ``votes.json`` repeatedly while ``LoopLagMonitor`` samples
+the loop, once with file I/O inline on the loop (``io_workers=0``, the old
+behaviour) and once through the worker pool.
+
+    python -m benchmarks.bench_loop_blocking --rounds 10000 --saves 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+
+from benchmarks.synthetic import make_votes
+from bot.models import Round
+from bot.persistence.repository import Repository
+from bot.utils.loop_monitor import LoopLagMonitor
+
+
+async def measure(io_workers: int, votes: list, saves: int) -> dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        repo = Repository(data_dir, io_workers=io_workers)
+        monitor = LoopLagMonitor(interval=0.005, warn_after=float("inf"))
+        task = asyncio.create_task(monitor.run())
+        await asyncio.sleep(0.05)
+        monitor.reset()
+        for _ in range(saves):
+            await repo.save_votes(votes)
+            await asyncio.sleep(0)
+        task.cancel()
+        await repo.close()
+        return monitor.snapshot()
+
+
+async def amain(rounds: int, saves: int) -> None:
+    votes = [Round.from_dict(r) for r in make_votes(rounds)]
+    for label, workers in (("inline (io_workers=0)", 0), ("thread pool (io_workers=2)", 2)):
+        stats = await measure(workers, votes, saves)
+        print(
+            f"{label:28s} max lag {stats['max_lag_ms']:9.1f} ms  "
+            f"total lag {stats['total_lag_ms']:9.1f} ms  samples {stats['samples']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=10_000)
+    parser.add_argument("--saves", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(amain(args.rounds, args.saves))
+
+
+if __name__ == "__main__":
+    main()
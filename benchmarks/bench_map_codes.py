@@ -0,0 +1,107 @@
+"""
+Map-code parsing with and without the registry.
+
+Checks that every layer in bot/data/maps.json parses to its ``base`` and
+``gamemode``, then times ``base_map_code`` the way it used to run (split,
+strip suffixes, join on every call) against the cached registry lookup, plus
+``parse_map_code`` and ``normalize_cooldowns`` over a cooldowns file holding
+every layer code.
+
+    python -m benchmarks.bench_map_codes --repeat 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Dict, Set
+
+from benchmarks.synthetic import shipped_maps
+from bot.utils import maps
+from bot.utils.maps import base_map_code, normalize_cooldowns, parse_map_code
+
+_OLD_SUFFIXES = {"WARFARE", "OFFENSIVE", "OFFENSIVEUS", "OFFENSIVEGER", "DAY", "DAWN", "NIGHT"}
+
+
+def split_base_map_code(map_code: str) -> str:
+    # base_map_code before the registry.
+    parts = map_code.split("_")
+    while parts and parts[-1].upper() in _OLD_SUFFIXES:
+        parts.pop()
+    return "_".join(parts) if parts else map_code
+
+
+def split_normalize_cooldowns(raw):
+    normalized = {}
+    for code, value in raw.items():
+        base_code = split_base_map_code(code)
+        as_int = int(value)
+        if as_int > normalized.get(base_code, 0):
+            normalized[base_code] = as_int
+    return normalized
+
+
+def check(layers) -> None:
+    bases: Dict[str, Set[str]] = {}
+    for m in layers:
+        parsed = parse_map_code(m["code"])
+        assert parsed.mode is not None and parsed.mode.value == m["gamemode"].lower(), m["code"]
+        bases.setdefault(m["base"], set()).add(parsed.base)
+    assert all(len(parsed) == 1 for parsed in bases.values()), bases
+    assert len({next(iter(parsed)) for parsed in bases.values()}) == len(bases), bases
+
+
+def per_code_ns(repeat: int, codes, fn) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for code in codes:
+            fn(code)
+    return (time.perf_counter() - started) / (repeat * len(codes)) * 1e9
+
+
+def per_call_us(repeat: int, fn, arg) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    layers = shipped_maps()
+    codes = [m["code"] for m in layers]
+
+    maps._REGISTRY.clear()
+    started = time.perf_counter()
+    for code in codes:
+        parse_map_code(code)
+    cold = (time.perf_counter() - started) / len(codes) * 1e9
+    check(layers)
+    cooldowns = {code: i % 4 for i, code in enumerate(codes)}
+
+    print(
+        f"{len(codes)} layers in maps.json, {len({m['base'] for m in layers})} bases, all parsed; repeat {args.repeat}"
+    )
+    print(f"{'parse (first sight)':<28} {cold:>10.0f} ns/code")
+    print(
+        f"{'base_map_code, split/join':<28} {per_code_ns(args.repeat, codes, split_base_map_code):>10.0f} ns/code"
+    )
+    print(
+        f"{'base_map_code, registry':<28} {per_code_ns(args.repeat, codes, base_map_code):>10.0f} ns/code"
+    )
+    print(
+        f"{'parse_map_code, registry':<28} {per_code_ns(args.repeat, codes, parse_map_code):>10.0f} ns/code"
+    )
+    print(
+        f"{'normalize_cooldowns, split':<28} {per_call_us(args.repeat, split_normalize_cooldowns, cooldowns):>10.1f} us/call"
+    )
+    print(
+        f"{'normalize_cooldowns':<28} {per_call_us(args.repeat, normalize_cooldowns, cooldowns):>10.1f} us/call"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Slotted round records against the plain dicts they replaced.
+
+Measures memory per open round, building the live tally, plurality winner
+determination and encoding ``votes.json`` for the same synthetic rounds held
+as parsed JSON dicts (the old representation, handled the way the old code
+did) and as ``Round`` objects.
+
+    python -m benchmarks.bench_models --rounds 200 --ballots 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_votes
+from bot.models import Round
+from bot.persistence.repository import get_codec
+from bot.services.voting import APPROVAL, PLURALITY, Tally, ballot_choices, determine_winner
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def allocated(build) -> int:
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def dict_tally(round_data: dict) -> dict:
+    # The tally as it read the dict representation: method from meta, generic ballot handling.
+    method = str((round_data.get("meta") or {}).get("voting_method") or PLURALITY).lower()
+    counts = {o["index"]: 0 for o in round_data.get("options", [])}
+    for value in round_data.setdefault("ballots", {}).values():
+        choices = ballot_choices(value)
+        for index in choices if method == APPROVAL else choices[:1]:
+            counts[index] = counts.get(index, 0) + 1
+    for o in round_data["options"]:
+        o["votes"] = counts.get(o["index"], 0)
+    return counts
+
+
+def dict_winner(round_data: dict) -> str:
+    meta = round_data.get("meta") or {}
+    minimum_votes = max(0, int(meta.get("minimum_votes", 0) or 0))
+    opts = round_data["options"]
+    total = sum(o["votes"] for o in opts)
+    if not total or total < minimum_votes:
+        return opts[0]["map"]
+    maxv = max(o["votes"] for o in opts)
+    return next(o for o in opts if o["votes"] == maxv)["map"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--ballots", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    raw = make_votes(args.rounds, open_rounds=args.rounds, ballots=args.ballots)
+    codec = get_codec()
+    payload = codec.dumps(raw)
+    dicts = codec.loads(payload)
+    rounds = [Round.from_dict(r) for r in dicts]
+
+    print(
+        f"{args.rounds} open rounds, {args.ballots} ballots each, {codec.name} codec, best of {args.repeat}"
+    )
+    print(f"{'':<22} {'dicts':>10} {'Round':>10}")
+
+    for label, ballots in (("bytes/round", args.ballots), ("bytes/round, no votes", 0)):
+        shaped = [dict(r, ballots={}) for r in raw] if not ballots else raw
+        as_dicts = allocated(lambda: codec.loads(codec.dumps(shaped)))
+        as_rounds = allocated(
+            lambda: [Round.from_dict(r) for r in codec.loads(codec.dumps(shaped))]
+        )
+        print(f"{label:<22} {as_dicts / args.rounds:>10.0f} {as_rounds / args.rounds:>10.0f}")
+
+    rows = (
+        (
+            "tally ms",
+            lambda: [dict_tally(r) for r in dicts],
+            lambda: [Tally(r).apply(r.options) for r in rounds],
+        ),
+        (
+            "winner ms",
+            lambda: [dict_winner(r) for r in dicts],
+            lambda: [determine_winner(r) for r in rounds],
+        ),
+        ("encode ms", lambda: codec.dumps(dicts), lambda: codec.dumps(rounds)),
+        (
+            "decode ms",
+            lambda: codec.loads(payload),
+            lambda: [Round.from_dict(r) for r in codec.loads(payload)],
+        ),
+    )
+    for label, old, new in rows:
+        print(
+            f"{label:<22} {best_of(args.repeat, old) * 1000:>10.2f} {best_of(args.repeat, new) * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Vote option selection from a large map list.
+
+Builds synthetic maps.json/pools.json/cooldowns.json with many map variants
+and pools and times ``Pools.pick_vote_options`` against the list scans it
+replaced (pool membership tested against a list, ``base_map_code`` per map
+and per sort key on every call). Then times weighted picks from a single
+pool as it grows, against a uniform ``random.sample`` of the eligible list:
+the samplers are built once, so a pick should cost the same at every size.
+
+    python -m benchmarks.bench_pools --bases 15 --pools 40 --sizes 100,1000,10000,100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, cast
+
+from bot.persistence.repository import Repository
+from bot.services.pools import Pools
+from bot.utils.maps import (
+    VARIANT_GAME_SUFFIXES,
+    VARIANT_TIME_SUFFIXES,
+    base_map_code,
+    normalize_cooldowns,
+)
+
+
+class StaticRepository:
+    def __init__(self, maps, pools, cooldowns, counters=None):
+        self.maps, self.pools, self.cooldowns = maps, pools, cooldowns
+        self.counters = counters or {}
+
+    async def load_maps(self):
+        return self.maps
+
+    async def load_pools(self):
+        return self.pools
+
+    async def load_cooldowns(self):
+        return self.cooldowns
+
+    async def load_counters(self):
+        return self.counters
+
+
+def make_state(bases: int, pools: int, seed: int = 0):
+    rng = random.Random(seed)
+    maps = [
+        {
+            "code": f"map{b}_{mode}_{time_}".lower(),
+            "name": f"Map {b} {mode} {time_}",
+            "enabled": rng.random() > 0.1,
+            "weight": rng.choice([0.5, 1, 1, 2]),
+        }
+        for b in range(bases)
+        for mode in sorted(VARIANT_GAME_SUFFIXES)
+        for time_ in sorted(VARIANT_TIME_SUFFIXES)
+    ]
+    codes = [m["code"] for m in maps]
+    pool_rows: List[Dict[str, Any]] = [
+        {"name": f"pool {i}", "maps": rng.sample(codes, len(codes) // 2)} for i in range(pools)
+    ]
+    pool_rows[-1]["active"] = True
+    cooldowns = {f"map{b}": rng.randint(1, 3) for b in rng.sample(range(bases), bases // 3)}
+    return maps, pool_rows, cooldowns
+
+
+async def scan_pick(repository, count=5):
+    # The selection as it was before the pool index.
+    maps = await repository.load_maps()
+    pools = await repository.load_pools()
+    cds = normalize_cooldowns(await repository.load_cooldowns())
+    pool = next((p for p in pools if p.get("active")), None) or {
+        "maps": [m.get("code") for m in maps]
+    }
+    pool_maps = [m for m in maps if m.get("code") in pool["maps"] and m.get("enabled", True)]
+    eligible = [m for m in pool_maps if int(cds.get(base_map_code(m["code"]), 0)) == 0]
+    if len(eligible) >= count:
+        out = random.sample(eligible, count)
+    else:
+        cooling = sorted(
+            [m for m in pool_maps if int(cds.get(base_map_code(m["code"]), 0)) > 0],
+            key=lambda x: cds.get(base_map_code(x["code"]), 0),
+        )
+        out = eligible + cooling[: count - len(eligible)]
+    return [{"code": m["code"], "label": m.get("name", m["code"])} for m in out]
+
+
+async def uniform_pick(repository, count=5):
+    # Uniform draw over the eligible list, rebuilt per call with set membership.
+    maps = await repository.load_maps()
+    pool = set(next(p for p in await repository.load_pools() if p.get("active"))["maps"])
+    cds = normalize_cooldowns(await repository.load_cooldowns())
+    eligible = [
+        m
+        for m in maps
+        if m["code"] in pool and m.get("enabled", True) and not cds.get(base_map_code(m["code"]))
+    ]
+    return random.sample(eligible, min(count, len(eligible)))
+
+
+async def per_call(calls: int, pick) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await pick()
+    return (time.perf_counter() - started) / calls
+
+
+async def run(args) -> None:
+    maps, pools, cooldowns = make_state(args.bases, args.pools)
+    repository = StaticRepository(maps, pools, cooldowns)
+    # StaticRepository duck-types the loaders Pools uses.
+    service = Pools(cast(Repository, repository))
+
+    started = time.perf_counter()
+    await service.index()
+    build = time.perf_counter() - started
+
+    scan = await per_call(args.calls, lambda: scan_pick(repository))
+    indexed = await per_call(args.calls, lambda: service.pick_vote_options())
+    named = await per_call(args.calls, lambda: service.pick_vote_options(pool=pools[0]["name"]))
+
+    print(
+        f"{len(maps)} maps, {len(pools)} pools of {len(pools[0]['maps'])}, {len(cooldowns)} bases cooling"
+    )
+    print(f"index build      {build * 1000:8.2f} ms (once per maps/pools change)")
+    print(f"list scans       {scan * 1000:8.3f} ms/pick")
+    print(f"pool index       {indexed * 1000:8.3f} ms/pick")
+    print(f"named pool       {named * 1000:8.3f} ms/pick")
+
+    print()
+    print(
+        f"{'maps in pool':>12} {'sampler build ms':>17} {'uniform sample ms':>18} {'weighted pick ms':>17}"
+    )
+    for size in args.sizes:
+        per_base = len(VARIANT_GAME_SUFFIXES) * len(VARIANT_TIME_SUFFIXES)
+        maps, pools, _ = make_state(max(1, size // per_base), 1)
+        # Same cooldowns at every size: their count is the number of recent winners, not the pool size.
+        cooldowns = {f"map{b}": 1 + b % 3 for b in range(20)}
+        pools[0]["maps"] = [m["code"] for m in maps]
+        pools[0]["active"] = True
+        counters = {"round_id": 50, **{f"played:map{b}": 50 - b for b in range(10)}}
+        repository = StaticRepository(maps, pools, cooldowns, counters)
+        service = Pools(cast(Repository, repository))
+
+        started = time.perf_counter()
+        await service.pick_vote_options(pool="pool 0")
+        build = time.perf_counter() - started
+
+        uniform = await per_call(args.calls, lambda: uniform_pick(repository))
+        weighted = await per_call(args.calls, lambda: service.pick_vote_options(pool="pool 0"))
+        print(
+            f"{len(maps):>12} {build * 1000:>17.2f} {uniform * 1000:>18.3f} {weighted * 1000:>17.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bases", type=int, default=15)
+    parser.add_argument("--pools", type=int, default=40)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument(
+        "--sizes", type=lambda v: [int(x) for x in v.split(",")], default=[100, 1000, 10000]
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Tally and winner determination per voting method.
+
+Builds a synthetic round with many ballots for each method and times
+building the live ``Tally`` from the stored ballots and ``determine_winner``
+(which, for instant-runoff, runs every elimination round). Instant-runoff is
+timed twice: from the compact rankings the tally keeps per click, as a round
+close does, and converting every stored ballot list first.
+
+    python -m benchmarks.bench_voting --ballots 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from bot.models import Round
+from bot.services.voting import APPROVAL, INSTANT_RUNOFF, PLURALITY, Tally, determine_winner
+
+
+def make_round(method: str, ballots: int, options: int, seed: int = 0) -> Round:
+    rng = random.Random(seed)
+    indexes = list(range(1, options + 1))
+    # Skewed popularity so instant-runoff needs several elimination rounds.
+    weights = [options - i for i in range(options)]
+
+    def ballot():
+        if method == PLURALITY:
+            return rng.choices(indexes, weights)[0]
+        picks = []
+        for _ in range(rng.randint(1, options)):
+            choice = rng.choices(indexes, weights)[0]
+            if choice not in picks:
+                picks.append(choice)
+        return picks
+
+    return Round.from_dict(
+        {
+            "id": 1,
+            "meta": {"voting_method": method},
+            "options": [
+                {"index": i, "map": f"map_{i}", "label": f"Map {i}", "votes": 0} for i in indexes
+            ],
+            "ballots": {str(u): ballot() for u in range(ballots)},
+        }
+    )
+
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ballots", type=int, default=50_000)
+    parser.add_argument("--options", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{args.ballots} ballots, {args.options} options, best of {args.repeat}")
+    print(f"{'method':<10} {'tally ms':>10} {'winner ms':>10} {'from lists':>11}  rounds")
+    for method in (PLURALITY, APPROVAL, INSTANT_RUNOFF):
+        round_data = make_round(method, args.ballots, args.options)
+        build = best_of(args.repeat, lambda: Tally(round_data))
+        tally = Tally(round_data)
+        tally.apply(round_data.options)
+        decide = best_of(args.repeat, lambda: determine_winner(round_data, True, tally))
+        lists = best_of(args.repeat, lambda: determine_winner(round_data, True))
+        _, detail = determine_winner(round_data, True, tally)
+        rounds = len(detail.get("rounds", [])) or 1
+        print(
+            f"{method:<10} {build * 1000:>10.1f} {decide * 1000:>10.1f} {lists * 1000:>11.1f}  {rounds}"
+        )
+
+
+if __name__ == "__main__":
+    main()
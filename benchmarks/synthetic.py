@@ -0,0 +1,63 @@
+"""Synthetic bot state used by the benchmarks."""
+
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+MAP_CODES = [
+    "carentan_warfare",
+    "carentan_warfare_night",
+    "foy_warfare",
+    "foy_offensive_us",
+    "hurtgenforest_warfare_V2",
+    "kursk_warfare",
+    "omahabeach_warfare",
+    "stmariedumont_warfare",
+    "stmariedumont_warfare_night",
+    "utahbeach_warfare",
+]
+
+
+SHIPPED_MAPS = Path(__file__).resolve().parents[1] / "bot" / "data" / "maps.json"
+
+
+def shipped_maps() -> List[Dict[str, Any]]:
+    """Every HLL layer in the bot's maps.json."""
+    return json.loads(SHIPPED_MAPS.read_text(encoding="utf-8"))
+
+
+def make_round(
+    round_id: int, *, ballots: int = 40, status: str = "pushed", rng: random.Random | None = None
+) -> Dict[str, Any]:
+    rng = rng or random.Random(round_id)
+    codes = rng.sample(MAP_CODES, 5)
+    return {
+        "id": round_id,
+        "pool": "Warfare Week A",
+        "channel_id": "1322197840495378432",
+        "started_at": "2024-01-01T12:00:00+11:00",
+        "ends_at": "2024-01-01T13:00:00+11:00",
+        "status": status,
+        "meta": {"mapvote_cooldown": 3, "minimum_votes": 5},
+        "options": [
+            {"index": i + 1, "map": code, "label": code.replace("_", " ").title(), "votes": 0}
+            for i, code in enumerate(codes)
+        ],
+        "ballots": {
+            str(100_000_000_000_000_000 + rng.randrange(10**9)): rng.randint(1, 5)
+            for _ in range(ballots)
+        },
+    }
+
+
+def make_votes(
+    rounds: int, *, open_rounds: int = 1, ballots: int = 40, seed: int = 0
+) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    votes = [make_round(i + 1, ballots=ballots, rng=rng) for i in range(rounds)]
+    for r in votes[-open_rounds:] if open_rounds else []:
+        r["status"] = "open"
+    return votes
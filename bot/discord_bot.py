@@ -1,21 +1,31 @@
 import json
 import logging
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from bot.config import Config
 from bot.persistence.repository import Repository
+from bot.persistence.repository import create as create_repository
 from bot.rounds import Rounds
 from bot.services.ap_scheduler import VoteScheduler
+from bot.services.ballots import BallotQueue
+from bot.services.click_guard import ClickGuard
 from bot.services.crcon_client import create as create_crcon
+from bot.services.deadlines import RoundDeadlines
 from bot.services.game_server_client import GameServerClient
 from bot.services.game_watch import GameStateNotifier
 from bot.services.pools import Pools
 from bot.services.posting import Posting
+from bot.services.round_registry import RoundRegistry
+from bot.services.voting import METHODS as VOTING_METHODS
+from bot.utils.loop_monitor import LoopLagMonitor
+from bot.views import VoteButton
 
 logger = logging.getLogger(__name__)
 
+
 def parse_threshold_pairs_input(raw: str | None):
     if raw is None:
         return None
@@ -45,32 +55,81 @@ def parse_threshold_pairs_input(raw: str | None):
         pairs.append([int(players), int(votes)])
     return pairs or None
 
+
 def create(config: Config):
-    guild_id=config.get("guild_id"),
-    vote_channel_id=config.get("vote_channel_id")
+    guild_id = (config.get("guild_id"),)
+    vote_channel_id = config.get("vote_channel_id")
     vote_duration_minutes = int(config.get("vote_duration_minutes", 60))
     mapvote_cooldown = int(config.get("mapvote_cooldown", 2))
 
-    repository = Repository()
+    repository = create_repository(config)
     crcon_client: GameServerClient = create_crcon(config)
-    posting = Posting(repository, crcon_client, default_mapvote_cooldown=mapvote_cooldown)
-    pools = Pools(repository)
-    rounds = Rounds(repository, pools, posting, vote_duration_minutes, mapvote_cooldown)
+    live_results_window = (
+        int(config.get("live_results_window_ms", 3000)) / 1000
+        if config.get("live_results", True)
+        else 0.0
+    )
+    round_registry = RoundRegistry(repository)
+    posting = Posting(
+        repository,
+        crcon_client,
+        default_mapvote_cooldown=mapvote_cooldown,
+        live_results_window=live_results_window,
+        registry=round_registry,
+    )
+    ballot_queue = BallotQueue(repository, on_vote=posting.schedule_live_results)
+    click_guard = ClickGuard(
+        rate=float(config.get("vote_click_rate", 1.0)),
+        burst=int(config.get("vote_click_burst", 5)),
+    )
+    pools = Pools(repository, recency_half_life=float(config.get("recency_half_life", 2)))
+    deadlines = RoundDeadlines(repository)
+    rounds = Rounds(
+        repository,
+        pools,
+        posting,
+        vote_duration_minutes,
+        mapvote_cooldown,
+        deadlines=deadlines,
+        registry=round_registry,
+    )
     game_state_notifier = GameStateNotifier(repository, crcon_client)
+    loop_monitor = LoopLagMonitor(warn_after=int(config.get("loop_lag_warn_ms", 250)) / 1000)
 
     return MapVoteBot(
         guild_id=guild_id,
         vote_channel_id=vote_channel_id,
-        crcon_client = crcon_client,
+        crcon_client=crcon_client,
         repository=repository,
         pools=pools,
         posting=posting,
         rounds=rounds,
-        game_state_notifier=game_state_notifier
+        game_state_notifier=game_state_notifier,
+        loop_monitor=loop_monitor,
+        deadlines=deadlines,
+        ballot_queue=ballot_queue,
+        click_guard=click_guard,
+        round_registry=round_registry,
     )
 
+
 class MapVoteBot(commands.Bot):
-    def __init__(self, guild_id, vote_channel_id, crcon_client: GameServerClient, pools: Pools, posting: Posting, repository: Repository, game_state_notifier: GameStateNotifier, rounds: Rounds):
+    def __init__(
+        self,
+        guild_id,
+        vote_channel_id,
+        crcon_client: GameServerClient,
+        pools: Pools,
+        posting: Posting,
+        repository: Repository,
+        game_state_notifier: GameStateNotifier,
+        rounds: Rounds,
+        loop_monitor: LoopLagMonitor | None = None,
+        deadlines: RoundDeadlines | None = None,
+        ballot_queue: BallotQueue | None = None,
+        click_guard: ClickGuard | None = None,
+        round_registry: RoundRegistry | None = None,
+    ):
         self.guild_id = guild_id
         self.vote_channel_id = vote_channel_id
         self.crcon_client = crcon_client
@@ -80,6 +139,11 @@ class MapVoteBot(commands.Bot):
         self.repository = repository
         self.rounds = rounds
         self.game_state_notifier = game_state_notifier
+        self.loop_monitor = loop_monitor
+        self.deadlines = deadlines
+        self.ballot_queue = ballot_queue
+        self.click_guard = click_guard
+        self.round_registry = round_registry if round_registry is not None else rounds.registry
         self.vote_scheduler = None
         self.mapvote_enabled = True
 
@@ -88,15 +152,51 @@ class MapVoteBot(commands.Bot):
 
         super().__init__(command_prefix="/", intents=intents)
 
+    async def close(self):
+        await super().close()
+        # Flush write-behind state only once nothing else can schedule saves.
+        if self.ballot_queue is not None:
+            await self.ballot_queue.close()
+        await self.repository.close()
+
     async def on_game_starts(self):
         await self.rounds.start_new_vote(self, self.guild_id, self.vote_channel_id)
 
+    async def on_round_deadline(self, round_id, channel_id):
+        if self.ballot_queue is not None:
+            # Clicks acknowledged before the deadline still count.
+            await self.ballot_queue.join()
+        await self.posting.close_round_and_push(
+            self, self.guild_id, channel_id or self.vote_channel_id, round_id
+        )
+        if self.click_guard is not None:
+            self.click_guard.forget_round(round_id)
+
+    async def _run_deadlines(self):
+        await self.wait_until_ready()
+        self.deadlines.add_handler(self.on_round_deadline)
+        count = await self.deadlines.rehydrate()
+        logger.info("Tracking deadlines for %s open rounds", count)
+        await self.deadlines.run()
+
     async def setup_hook(self):
+        count = await self.round_registry.rehydrate()
+        logger.info("Routing clicks for %s open rounds", count)
+        self.add_dynamic_items(VoteButton)
+        if self.ballot_queue is not None:
+            self.ballot_queue.start()
+        if self.loop_monitor is not None:
+            self.loop.create_task(self.loop_monitor.run())
+        if self.deadlines is not None:
+            self.loop.create_task(self._run_deadlines())
+
         @self.event
         async def on_ready():
             logger.info(f"Logged in as {self.user} (id={self.user.id})")
             if self.vote_channel_id and self.guild_id:
-                await self.posting.ensure_persistent_messages(self, self.guild_id, self.vote_channel_id)
+                await self.posting.ensure_persistent_messages(
+                    self, self.guild_id, self.vote_channel_id
+                )
                 self.loop.create_task(
                     self.posting.periodic_management_refresh(
                         self,
@@ -107,10 +207,22 @@ class MapVoteBot(commands.Bot):
                 )
                 # Start watcher
                 self.game_state_notifier.add_handler(self.on_game_starts)
-                self.loop.create_task(self.game_state_notifier.watch_game_starts(self, self.guild_id, self.vote_channel_id))
+                self.loop.create_task(
+                    self.game_state_notifier.watch_game_starts(
+                        self, self.guild_id, self.vote_channel_id
+                    )
+                )
                 # Start APScheduler
                 # TODO Probably want to inject this once the bidirectional dependency has been resolved.
-                self.vote_scheduler = VoteScheduler(self, self. repository, self.pools, self.rounds, self.crcon_client, self.guild_id, self.vote_channel_id)
+                self.vote_scheduler = VoteScheduler(
+                    self,
+                    self.repository,
+                    self.pools,
+                    self.rounds,
+                    self.crcon_client,
+                    self.guild_id,
+                    self.vote_channel_id,
+                )
                 await self.vote_scheduler.start()
 
         @self.tree.command(name="vote_start", description="Start a map vote now")
@@ -125,7 +237,8 @@ class MapVoteBot(commands.Bot):
         # /schedule_set to add/update schedules
         @self.tree.command(name="schedule_set", description="Create or update a scheduled vote")
         @app_commands.describe(
-            minimum_votes="Minimum ballots required before honoring the vote result"
+            minimum_votes="Minimum ballots required before honoring the vote result",
+            voting_method="plurality (default), irv (ranked choice) or approval",
         )
         async def schedule_set(
             interaction: discord.Interaction,
@@ -133,6 +246,7 @@ class MapVoteBot(commands.Bot):
             cron: str,
             mapvote_cooldown: int | None = None,
             minimum_votes: int | None = None,
+            voting_method: str | None = None,
             high_ping_threshold_ms: int | None = None,
             votekick_enabled: bool | None = None,
             votekick_threshold: str | None = None,
@@ -143,6 +257,12 @@ class MapVoteBot(commands.Bot):
             idlekick_duration_minutes: int | None = None,
         ):
             logger.info("Received command: schedule_set")
+            if voting_method is not None and voting_method.lower() not in VOTING_METHODS:
+                await interaction.response.send_message(
+                    f"Unknown voting method. Use one of: {', '.join(VOTING_METHODS)}.",
+                    ephemeral=True,
+                )
+                return
             scheds = await self.repository.load_schedules()
             row = next((x for x in scheds if x.get("pool") == pool and x.get("cron") == cron), None)
             if not row:
@@ -152,12 +272,15 @@ class MapVoteBot(commands.Bot):
                 row["mapvote_cooldown"] = int(mapvote_cooldown)
             if minimum_votes is not None:
                 row["minimum_votes"] = max(0, int(minimum_votes))
+            if voting_method is not None:
+                row["voting_method"] = voting_method.lower()
 
             settings = row.setdefault("settings", {})
 
             def maybe_set(k, v, cast=lambda x: x):
                 if v is not None:
                     settings[k] = cast(v)
+
             maybe_set("high_ping_threshold_ms", high_ping_threshold_ms, int)
             maybe_set("votekick_enabled", votekick_enabled, bool)
             maybe_set("autobalance_enabled", autobalance_enabled, bool)
@@ -179,7 +302,9 @@ class MapVoteBot(commands.Bot):
                 await self.vote_scheduler.reload_jobs()
             except Exception:
                 pass
-            await interaction.response.send_message("Schedule saved and jobs reloaded.", ephemeral=True)
+            await interaction.response.send_message(
+                "Schedule saved and jobs reloaded.", ephemeral=True
+            )
 
         async def _run_manual(interaction: discord.Interaction, label: str, payload: dict):
             try:
@@ -189,70 +314,125 @@ class MapVoteBot(commands.Bot):
             else:
                 await interaction.response.send_message(f"{label} updated.", ephemeral=True)
 
-            @self.tree.command(name="mapvote_enabled", description="Set global default for whether scheduled votes start an interactive mapvote")
-            @app_commands.describe(value="Enable interactive mapvote (true) or pick map immediately (false)")
+            @self.tree.command(
+                name="mapvote_enabled",
+                description="Set global default for whether scheduled votes start an interactive mapvote",
+            )
+            @app_commands.describe(
+                value="Enable interactive mapvote (true) or pick map immediately (false)"
+            )
             @app_commands.checks.has_permissions(administrator=True)
             async def mapvote_enabled(interaction: discord.Interaction, value: bool):
                 self.mapvote_enabled = value
-                await interaction.response.send_message(f"Global mapvote_enabled set to {value}", ephemeral=True)
+                await interaction.response.send_message(
+                    f"Global mapvote_enabled set to {value}", ephemeral=True
+                )
 
-        @self.tree.command(name="server_set_high_ping", description="Set max ping autokick threshold (milliseconds)")
-        @app_commands.describe(ms="Ping threshold in milliseconds before players are kicked automatically")
+        @self.tree.command(
+            name="server_set_high_ping",
+            description="Set max ping autokick threshold (milliseconds)",
+        )
+        @app_commands.describe(
+            ms="Ping threshold in milliseconds before players are kicked automatically"
+        )
         @app_commands.checks.has_permissions(administrator=True)
-        async def server_set_high_ping(interaction: discord.Interaction, ms: app_commands.Range[int, 0]):
+        async def server_set_high_ping(
+            interaction: discord.Interaction, ms: app_commands.Range[int, 0]
+        ):
             logger.info("Received command: server_set_high_ping")
-            await _run_manual(interaction, "High ping threshold", {"high_ping_threshold_ms": int(ms)})
+            await _run_manual(
+                interaction, "High ping threshold", {"high_ping_threshold_ms": int(ms)}
+            )
 
-        @self.tree.command(name="server_set_votekick_enabled", description="Enable or disable votekick on the server")
+        @self.tree.command(
+            name="server_set_votekick_enabled",
+            description="Enable or disable votekick on the server",
+        )
         @app_commands.describe(value="Enable votekick (true) or disable it (false)")
         @app_commands.checks.has_permissions(administrator=True)
         async def server_set_votekick_enabled(interaction: discord.Interaction, value: bool):
             logger.info("Received command: server_set_votekick_enabled")
             await _run_manual(interaction, "Votekick enabled", {"votekick_enabled": bool(value)})
 
-        @self.tree.command(name="server_set_votekick_thresholds", description="Set the votekick threshold table")
-        @app_commands.describe(pairs="JSON or shorthand string (e.g. \"0:60,60:70\")")
+        @self.tree.command(
+            name="server_set_votekick_thresholds", description="Set the votekick threshold table"
+        )
+        @app_commands.describe(pairs='JSON or shorthand string (e.g. "0:60,60:70")')
         @app_commands.checks.has_permissions(administrator=True)
         async def server_set_votekick_thresholds(interaction: discord.Interaction, pairs: str):
             logger.info("Received command: server_set_votekick_thresholds")
             parsed = parse_threshold_pairs_input(pairs)
             if not parsed:
-                await interaction.response.send_message("Could not parse threshold pairs.", ephemeral=True)
+                await interaction.response.send_message(
+                    "Could not parse threshold pairs.", ephemeral=True
+                )
                 return
-            await _run_manual(interaction, "Votekick thresholds", {"votekick_threshold_pairs": parsed})
+            await _run_manual(
+                interaction, "Votekick thresholds", {"votekick_threshold_pairs": parsed}
+            )
 
-        @self.tree.command(name="server_reset_votekick_thresholds", description="Reset votekick thresholds to server defaults")
+        @self.tree.command(
+            name="server_reset_votekick_thresholds",
+            description="Reset votekick thresholds to server defaults",
+        )
         @app_commands.checks.has_permissions(administrator=True)
         async def server_reset_votekick_thresholds(interaction: discord.Interaction):
             logger.info("Received command: server_reset_votekick_thresholds")
-            await _run_manual(interaction, "Reset votekick thresholds", {"reset_votekick_thresholds": True})
+            await _run_manual(
+                interaction, "Reset votekick thresholds", {"reset_votekick_thresholds": True}
+            )
 
-        @self.tree.command(name="server_set_autobalance_enabled", description="Turn server autobalance on or off")
+        @self.tree.command(
+            name="server_set_autobalance_enabled", description="Turn server autobalance on or off"
+        )
         @app_commands.describe(value="Enable autobalance (true) or disable it (false)")
         @app_commands.checks.has_permissions(administrator=True)
         async def server_set_autobalance_enabled(interaction: discord.Interaction, value: bool):
             logger.info("Received command: server_set_autobalance_enabled")
-            await _run_manual(interaction, "Autobalance enabled", {"autobalance_enabled": bool(value)})
+            await _run_manual(
+                interaction, "Autobalance enabled", {"autobalance_enabled": bool(value)}
+            )
 
-        @self.tree.command(name="server_set_autobalance_threshold", description="Set the autobalance team size differential")
+        @self.tree.command(
+            name="server_set_autobalance_threshold",
+            description="Set the autobalance team size differential",
+        )
         @app_commands.describe(diff="Maximum player difference before autobalance triggers")
         @app_commands.checks.has_permissions(administrator=True)
-        async def server_set_autobalance_threshold(interaction: discord.Interaction, diff: app_commands.Range[int, 0]):
+        async def server_set_autobalance_threshold(
+            interaction: discord.Interaction, diff: app_commands.Range[int, 0]
+        ):
             logger.info("Received command: server_set_autobalance_threshold")
-            await _run_manual(interaction, "Autobalance threshold", {"autobalance_threshold": int(diff)})
+            await _run_manual(
+                interaction, "Autobalance threshold", {"autobalance_threshold": int(diff)}
+            )
 
-        @self.tree.command(name="server_set_team_switch_cooldown", description="Set the team switch cooldown in minutes")
+        @self.tree.command(
+            name="server_set_team_switch_cooldown",
+            description="Set the team switch cooldown in minutes",
+        )
         @app_commands.describe(minutes="Cooldown before players can switch teams again")
         @app_commands.checks.has_permissions(administrator=True)
-        async def server_set_team_switch_cooldown(interaction: discord.Interaction, minutes: app_commands.Range[int, 0]):
+        async def server_set_team_switch_cooldown(
+            interaction: discord.Interaction, minutes: app_commands.Range[int, 0]
+        ):
             logger.info("Received command: server_set_team_switch_cooldown")
-            await _run_manual(interaction, "Team switch cooldown", {"team_switch_cooldown_minutes": int(minutes)})
+            await _run_manual(
+                interaction, "Team switch cooldown", {"team_switch_cooldown_minutes": int(minutes)}
+            )
 
-        @self.tree.command(name="server_set_idle_autokick_time", description="Set idle auto-kick duration in minutes")
+        @self.tree.command(
+            name="server_set_idle_autokick_time",
+            description="Set idle auto-kick duration in minutes",
+        )
         @app_commands.describe(minutes="Minutes players can remain idle before being kicked")
         @app_commands.checks.has_permissions(administrator=True)
-        async def server_set_idle_autokick_time(interaction: discord.Interaction, minutes: app_commands.Range[int, 0]):
+        async def server_set_idle_autokick_time(
+            interaction: discord.Interaction, minutes: app_commands.Range[int, 0]
+        ):
             logger.info("Received command: server_set_idle_autokick_time")
-            await _run_manual(interaction, "Idle autokick time", {"idlekick_duration_minutes": int(minutes)})
+            await _run_manual(
+                interaction, "Idle autokick time", {"idlekick_duration_minutes": int(minutes)}
+            )
 
         await self.tree.sync()
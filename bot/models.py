@@ -0,0 +1,145 @@
+"""
+In-memory records for vote rounds.
+
+Rounds used to travel through the bot as the nested dicts stored in
+``votes.json``. They are now slotted dataclasses with typed fields, built
+by ``Round.from_dict`` when a collection is loaded and turned back into the
+stored shape by ``Round.to_dict`` when it is saved, so the file format is
+unchanged and only the repositories deal with raw dicts.
+
+Ballots stay a plain ``user id -> ballot`` dict: an option index for
+plurality, a list of indexes for instant-runoff and approval.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from bot.services.voting import METHODS, PLURALITY
+
+# Top-level keys with a field of their own; anything else is kept in ``extra``.
+_ROUND_KEYS = frozenset(
+    {
+        "id",
+        "pool",
+        "channel_id",
+        "started_at",
+        "ends_at",
+        "status",
+        "meta",
+        "options",
+        "ballots",
+        "close_steps",
+    }
+)
+_META_KEYS = frozenset({"mapvote_cooldown", "minimum_votes", "voting_method"})
+
+# Status of a round whose winner is decided but whose push/cooldown/summary steps are still running.
+CLOSING = "closing"
+
+
+@dataclass(slots=True)
+class Option:
+    index: int
+    map: str
+    label: str
+    votes: int = 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Option":
+        return cls(data["index"], data.get("map", ""), data.get("label", ""), data.get("votes", 0))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"index": self.index, "map": self.map, "label": self.label, "votes": self.votes}
+
+
+def _minimum_votes(raw: Any) -> int:
+    try:
+        return max(0, int(raw or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _voting_method(raw: Any) -> str:
+    method = str(raw or PLURALITY).lower()
+    return method if method in METHODS else PLURALITY
+
+
+@dataclass(slots=True)
+class Round:
+    id: Any
+    channel_id: Optional[str] = None
+    pool: str = "default"
+    started_at: Optional[str] = None
+    ends_at: Optional[str] = None
+    status: str = "open"
+    voting_method: str = PLURALITY
+    minimum_votes: int = 0
+    mapvote_cooldown: Optional[int] = None
+    options: List[Option] = field(default_factory=list)
+    ballots: Dict[str, Any] = field(default_factory=dict)
+    close_steps: Optional[Dict[str, Any]] = None
+    # Keys written by other versions of the bot (or by hand), carried through unchanged.
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def is_open(self) -> bool:
+        return self.status == "open"
+
+    @property
+    def is_finished(self) -> bool:
+        # Closed and done with its close steps; finished rounds leave the hot set for the archive.
+        return not self.is_open and self.status != CLOSING
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Round":
+        meta = data.get("meta") or {}
+        extra = (
+            {}
+            if data.keys() <= _ROUND_KEYS
+            else {k: v for k, v in data.items() if k not in _ROUND_KEYS}
+        )
+        if not meta.keys() <= _META_KEYS:
+            extra["meta"] = {k: v for k, v in meta.items() if k not in _META_KEYS}
+        return cls(
+            id=data.get("id"),
+            channel_id=data.get("channel_id"),
+            pool=data.get("pool") or "default",
+            started_at=data.get("started_at"),
+            ends_at=data.get("ends_at"),
+            # Records written before rounds had a status are open.
+            status=data.get("status") or "open",
+            voting_method=_voting_method(meta.get("voting_method")),
+            minimum_votes=_minimum_votes(meta.get("minimum_votes")),
+            mapvote_cooldown=meta.get("mapvote_cooldown"),
+            options=[Option.from_dict(o) for o in data.get("options") or []],
+            # Parsed JSON already has string keys and int/list values; take the dict as is.
+            ballots=data.get("ballots") or {},
+            close_steps=data.get("close_steps"),
+            extra=extra,
+        )
+
+    def to_dict(self, *, ballots: bool = True) -> Dict[str, Any]:
+        meta = {"minimum_votes": self.minimum_votes, "voting_method": self.voting_method}
+        if self.mapvote_cooldown is not None:
+            meta["mapvote_cooldown"] = self.mapvote_cooldown
+        data = {
+            "id": self.id,
+            "pool": self.pool,
+            "channel_id": self.channel_id,
+            "started_at": self.started_at,
+            "ends_at": self.ends_at,
+            "status": self.status,
+            "meta": meta,
+            "options": [o.to_dict() for o in self.options],
+        }
+        if self.extra:
+            for key, value in self.extra.items():
+                if key == "meta":
+                    meta.update((k, v) for k, v in value.items() if k not in meta)
+                else:
+                    data.setdefault(key, value)
+        if ballots:
+            data["ballots"] = self.ballots
+        if self.close_steps is not None:
+            data["close_steps"] = self.close_steps
+        return data
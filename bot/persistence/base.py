@@ -0,0 +1,98 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from bot.models import Round
+from bot.services.voting import Tally
+
+
+class RepositoryBase:
+    """
+    Behaviour shared by the storage backends on top of their ``load_*``/``save_*`` methods.
+
+    Transactions: ``transaction("votes")`` holds an ``asyncio.Lock`` dedicated
+    to that collection, loads it, hands it to the caller and saves it on a
+    clean exit. Concurrent transactions on the same collection run one after
+    the other, so two overlapping load/mutate/save sequences can no longer
+    overwrite each other, while transactions on different collections still
+    proceed in parallel. Code that persists the change itself (e.g. via
+    ``save_ballot``) passes ``autosave=False``. Locks are acquired in whatever
+    order transactions are nested; keep nesting in the order
+    votes -> cooldowns -> channels to stay deadlock free.
+
+    Indexes: ``rounds_by_id(votes)`` and ``channels_by_key(channels)`` map
+    round id -> round and ``(guild_id, channel_id)`` -> row for a loaded
+    collection. They are built once per collection object and reused until
+    the collection is saved or changes length, so hot paths do a dict lookup
+    instead of scanning. ``get_round`` / ``get_channel_row`` load and look up in
+    one step; inside a transaction, index the yielded collection instead so
+    the row you mutate is the one that gets saved.
+
+    Tallies: ``tally(round)`` returns the live ``Tally`` for an open round,
+    built from its persisted ballots the first time it is asked for (e.g.
+    after a restart) and rebuilt if the round is reloaded as a new object.
+    Cast ballots through it so the counts stay current.
+    """
+
+    def _transaction_lock(self, collection: str) -> asyncio.Lock:
+        # Created lazily so subclasses don't need to cooperate in __init__.
+        locks: Dict[str, asyncio.Lock] = self.__dict__.setdefault("_transaction_locks", {})
+        lock = locks.get(collection)
+        if lock is None:
+            lock = locks[collection] = asyncio.Lock()
+        return lock
+
+    @asynccontextmanager
+    async def transaction(self, collection: str, *, autosave: bool = True) -> AsyncIterator[Any]:
+        async with self._transaction_lock(collection):
+            data = await getattr(self, f"load_{collection}")()
+            yield data
+            if autosave:
+                await getattr(self, f"save_{collection}")(data)
+
+    def _index(self, name: str, rows: List[Any], key: Callable[[Any], Hashable]) -> Dict[Any, Any]:
+        indexes: Dict[str, Tuple[Any, int, Dict[Any, Any]]] = self.__dict__.setdefault(
+            "_indexes", {}
+        )
+        cached = indexes.get(name)
+        if cached is not None and cached[0] is rows and cached[1] == len(rows):
+            return cached[2]
+        index: Dict[Any, Any] = {}
+        for row in rows:
+            # First match wins, as the linear scans it replaces did.
+            index.setdefault(key(row), row)
+        indexes[name] = (rows, len(rows), index)
+        return index
+
+    def _drop_index(self, name: str) -> None:
+        self.__dict__.setdefault("_indexes", {}).pop(name, None)
+
+    def rounds_by_id(self, votes: List[Round]) -> Dict[Any, Round]:
+        return self._index("votes", votes, lambda r: r.id)
+
+    def channels_by_key(self, channels: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+        return self._index("channels", channels, lambda r: (r.get("guild_id"), r.get("channel_id")))
+
+    async def save_ballots(self, votes: List[Round], ballots: List[Tuple[int, str, int]]) -> None:
+        """Persist ballots already applied to ``votes``; backends with a cheaper path override this."""
+        await getattr(self, "save_votes")(votes)
+
+    def tally(self, round_rec: Round) -> Tally:
+        tallies: Dict[Any, Tuple[Round, Tally]] = self.__dict__.setdefault("_tallies", {})
+        cached = tallies.get(round_rec.id)
+        if cached is not None and cached[0] is round_rec and cached[1].ballots is round_rec.ballots:
+            return cached[1]
+        tally = Tally(round_rec)
+        tallies[round_rec.id] = (round_rec, tally)
+        return tally
+
+    def forget_tally(self, round_id: Any) -> None:
+        self.__dict__.setdefault("_tallies", {}).pop(round_id, None)
+
+    async def get_round(self, round_id: int) -> Optional[Round]:
+        return self.rounds_by_id(await getattr(self, "load_votes")()).get(round_id)
+
+    async def get_channel_row(self, guild_id: str, channel_id: str) -> Optional[Dict[str, Any]]:
+        return self.channels_by_key(await getattr(self, "load_channels")()).get(
+            (guild_id, channel_id)
+        )
@@ -0,0 +1,86 @@
+"""
+One-shot importer from the JSON data directory into a SQLite database.
+
+Usage (from the repository root)::
+
+    python -m bot.persistence.import_json --data-dir bot/data --db bot/data/state.sqlite3
+
+Existing rows in the target database are replaced. Journaled ballots
+(``ballots.jsonl``) are replayed onto open rounds and archived rounds are
+included, and a non-empty write-ahead log (``wal.jsonl``) is replayed
+first. The source is opened read-only, so the JSON directory is left
+untouched. Rounds are keyed by ``(id, started_at)``, as in the JSON archive
+index; if two different records share a key the import stops rather than
+keep one of them.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+from typing import Dict, List, Tuple
+
+from bot.models import Round
+from bot.persistence.repository import DATA_DIR, WAL_FILE, Repository
+from bot.persistence.sqlite_repository import DEFAULT_DB_PATH, SqliteRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _unique_rounds(votes: List[Round]) -> List[Round]:
+    """Drop exact repeats of a round (e.g. one archived by a save that crashed) and refuse conflicting ones."""
+    by_key: Dict[Tuple[int, str], Round] = {}
+    conflicts = []
+    for round_rec in votes:
+        key = (int(round_rec.id), str(round_rec.started_at or ""))
+        seen = by_key.setdefault(key, round_rec)
+        if seen is not round_rec and seen.to_dict() != round_rec.to_dict():
+            conflicts.append(key)
+    if conflicts:
+        raise RuntimeError(
+            f"Conflicting records for rounds (id, started_at) {sorted(set(conflicts))}; nothing imported"
+        )
+    return list(by_key.values())
+
+
+async def import_json(data_dir: str = DATA_DIR, db_path: str = DEFAULT_DB_PATH) -> dict:
+    # State not yet checkpointed out of the write-ahead log is only in wal.jsonl.
+    wal_path = os.path.join(data_dir, WAL_FILE)
+    wal = os.path.exists(wal_path) and os.path.getsize(wal_path) > 0
+    source = Repository(data_dir, ballot_journal=True, wal=wal, read_only=True)
+    target = SqliteRepository(db_path)
+    try:
+        votes = _unique_rounds(list(await source.load_votes()) + await source.load_archive())
+        counts = {"votes": len(votes)}
+        for name, load, save in (
+            ("channels", source.load_channels, target.save_channels),
+            ("schedules", source.load_schedules, target.save_schedules),
+            ("cooldowns", source.load_cooldowns, target.save_cooldowns),
+            ("counters", source.load_counters, target.save_counters),
+            ("maps", source.load_maps, target.save_maps),
+            ("pools", source.load_pools, target.save_pools),
+        ):
+            data = await load()
+            await save(data)
+            counts[name] = len(data)
+        await target.save_votes(votes)
+        return counts
+    finally:
+        await source.close()
+        await target.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import bot JSON state into SQLite.")
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    args = parser.parse_args()
+    logging.basicConfig(level="INFO")
+
+    counts = asyncio.run(import_json(args.data_dir, args.db))
+    for name, n in counts.items():
+        logger.info("Imported %s %s", n, name)
+
+
+if __name__ == "__main__":
+    main()
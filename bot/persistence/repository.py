@@ -1,28 +1,96 @@
+import asyncio
 import json
+import logging
 import os
-from threading import Lock
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from bot.config import Config
+from bot.models import Round
+from bot.persistence.base import RepositoryBase
+from bot.services.voting import normalize_ballot
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
 
 DATA_DIR = "bot/data"
-_lock = Lock()
+BALLOT_JOURNAL = "ballots.jsonl"
+WAL_FILE = "wal.jsonl"
+ARCHIVE_DIR = "archive"
+ARCHIVE_INDEX = os.path.join(ARCHIVE_DIR, "index.jsonl")
+# High-churn, machine-written files that compact mode stores without indentation.
+COMPACT_FILES = frozenset({"votes.json", "channels.json"})
 
+Shaper = Callable[[Any], Tuple[Any, bool]]
+T = TypeVar("T")
 
-def _load_json(filename, default):
-    path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(path):
-        os.makedirs(DATA_DIR, exist_ok=True)
-        with open(path, "w") as f:
-            json.dump(default, f, indent=2)
-        return default
-    with open(path, "r") as f:
-        return json.load(f)
 
+@dataclass
+class _CacheEntry:
+    """Parsed contents of a JSON file plus the stat signature it was read at."""
+
+    mtime_ns: int
+    size: int
+    data: Any
+
+
+def _to_json(obj: Any) -> Any:
+    # Model objects (e.g. Round) serialize through their stored shape.
+    to_dict = getattr(obj, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_dict()
+
+
+class JsonCodec:
+    """Stdlib ``json`` encoder/decoder; always available."""
+
+    name = "json"
+
+    def dumps(self, data: Any, *, pretty: bool = False) -> bytes:
+        if pretty:
+            return json.dumps(data, indent=2, default=_to_json).encode()
+        return json.dumps(data, separators=(",", ":"), default=_to_json).encode()
 
-def _save_json(filename, data):
-    path = os.path.join(DATA_DIR, filename)
-    with _lock:
-        with open(path, "w") as f:
-            json.dump(data, f, indent=2)
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+
+class OrjsonCodec(JsonCodec):
+    """``orjson``: several times faster than the stdlib in both directions."""
+
+    name = "orjson"
+
+    def dumps(self, data: Any, *, pretty: bool = False) -> bytes:
+        # Route dataclasses through _to_json so rounds keep their stored shape.
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_to_json, option=option)
+
+    def loads(self, raw: bytes) -> Any:
+        return orjson.loads(raw)
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """Return the codec called ``name``.
+
+    ``auto`` (the default) prefers orjson when it is installed.
+    """
+    name = (name or "auto").lower()
+    if name not in ("auto", "orjson", "json"):
+        raise RuntimeError(f"Unknown JSON codec: {name}")
+    if name != "json" and orjson is not None:
+        return OrjsonCodec()
+    if name == "orjson":
+        logger.warning("orjson is not installed; falling back to the stdlib json codec")
+    return JsonCodec()
 
 
 def _shape_channels(rows: List[Any]) -> Tuple[List[Dict[str, Any]], bool]:
@@ -51,37 +119,686 @@ def _shape_channels(rows: List[Any]) -> Tuple[List[Dict[str, Any]], bool]:
     return shaped_rows, changed
 
 
-class Repository:
+def _read_file(path: str, shape: Optional[Shaper], codec: JsonCodec) -> Tuple[Any, bool, int, int]:
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        data = codec.loads(f.read())
+    changed = False
+    if shape is not None:
+        data, changed = shape(data)
+    return data, changed, st.st_mtime_ns, st.st_size
+
+
+def _write_file(path: str, payload: bytes, pretty: Optional[JsonCodec] = None) -> Tuple[int, int]:
+    """
+    Atomically replace ``path``: write a temp file, fsync it, then rename over the target.
+
+    ``payload`` is a compact snapshot taken on the event loop. With ``pretty``,
+    it is re-encoded indented here, so human-edited files keep their layout
+    without holding the loop for the slower encode.
+    """
+    if pretty is not None:
+        payload = pretty.dumps(pretty.loads(payload), pretty=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself; not available (or needed) on Windows.
+        dir_fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _append_line(path: str, line: bytes, sync: bool = False) -> int:
+    """Append ``line`` (fsynced with ``sync``) and return how many bytes were written."""
+    with open(path, "ab+") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell():
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # Terminate a line torn by an earlier crash so this one stays parseable.
+                line = b"\n" + line
+        f.write(line)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    return len(line)
+
+
+def _read_jsonl(path: str, codec: JsonCodec) -> List[Any]:
+    if not os.path.exists(path):
+        return []
+    entries = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                entries.append(codec.loads(line))
+            except ValueError:
+                continue
+    return entries
+
+
+def _shape_votes(rows: List[Any]) -> Tuple[List[Round], bool]:
+    return [Round.from_dict(row) for row in rows if isinstance(row, dict)], False
+
+
+def _archive_partition(round_rec: Round) -> str:
+    """Month (``YYYY-MM``) a round is archived under, taken from its start time."""
+    started = str(round_rec.started_at or "")
+    return started[:7] if len(started) >= 7 else "undated"
+
+
+def _drop_prefix(path: str, nbytes: int) -> None:
+    """Remove the first ``nbytes`` of ``path``, keeping anything appended after them."""
+    with open(path, "rb") as f:
+        f.seek(nbytes)
+        tail = f.read()
+    # Replace rather than truncate in place: a crash must never lose the tail.
+    _write_file(path, tail)
+
+
+def create(config: Config):
+    settings = config.get("persistence") or {}
+    backend = str(settings.get("backend") or "json").lower()
+    if backend == "sqlite":
+        from bot.persistence.sqlite_repository import DEFAULT_DB_PATH, SqliteRepository
+
+        return SqliteRepository(settings.get("sqlite_path") or DEFAULT_DB_PATH)
+    if backend != "json":
+        raise RuntimeError(f"Unknown persistence backend: {backend}")
+    return Repository(
+        ballot_journal=bool(settings.get("ballot_journal", False)),
+        io_workers=int(settings.get("io_workers", 2)),
+        flush_interval=float(settings.get("flush_interval_ms", 250)) / 1000,
+        codec=get_codec(settings.get("codec")),
+        compact=bool(settings.get("compact", False)),
+        wal=bool(settings.get("wal", False)),
+        snapshot_interval=float(settings.get("snapshot_interval_ms", 60_000)) / 1000,
+        wal_max_bytes=int(settings.get("wal_max_bytes", 4 * 1024 * 1024)),
+    )
+
+
+class Repository(RepositoryBase):
+    """
+    JSON-file backed storage for bot state.
+
+    Every collection is kept parsed in memory after the first load. A file is
+    only re-read when its mtime or size differs from what we last saw, so hand
+    edits on disk are still picked up, while repeated loads (e.g. one per vote
+    click) cost a single ``os.stat``. Saves write through to disk and refresh
+    the cache.
+
+    Loads return the cached objects themselves rather than copies: callers that
+    mutate a loaded collection must hand it back to the matching ``save_*``.
+
+    File reads and writes run on a bounded thread pool (``io_workers``; ``0``
+    runs them inline on the event loop). Operations on the same file are
+    serialized through a per-file ``asyncio.Lock``, so they reach disk in the
+    order they were issued while different files proceed independently. A
+    save snapshots its data on the loop before handing off, so later in-memory
+    mutations never leak into a write that is already under way.
+
+    With a positive ``flush_interval`` (seconds), saves are write-behind: the
+    collection is marked dirty and written once the interval has passed, so a
+    burst of saves to the same file becomes a single write. Every write goes
+    to a temp file that is fsynced and renamed over the target, so a crash
+    never leaves a truncated file behind. ``close()`` flushes whatever is still
+    dirty.
+
+    ``votes.json`` only holds rounds that are open or still closing. Once a
+    round has finished closing, the next ``save_votes`` appends it to a
+    monthly archive (``archive/votes-YYYY-MM.jsonl``) and records it in
+    ``archive/index.jsonl`` before dropping it from the hot file, so vote
+    clicks and round closes stay cheap however long the history is. Historical
+    rounds are read back through ``load_archived_round`` and ``load_archive``.
+
+    With ``ballot_journal`` enabled, individual ballots are appended to
+    ``ballots.jsonl`` instead of rewriting ``votes.json`` on every click. The
+    journal is replayed onto open rounds whenever ``votes.json`` is parsed
+    (including the first load after a restart), and the part of it covered by
+    a ``save_votes`` is dropped once that save is on disk.
+
+    Encoding goes through ``codec`` (orjson when installed, else the stdlib).
+    With ``compact``, the high-churn ``votes.json`` and ``channels.json`` are
+    written without indentation; the other files stay pretty-printed so they
+    remain easy to edit by hand.
+
+    With ``wal`` enabled, the JSON files become snapshots behind a write-ahead
+    log (``wal.jsonl``). Every save appends the collection, and every ballot
+    appends a single line; the line is fsynced before the call returns, so an
+    acknowledged change survives a crash. Files are only rewritten by
+    ``checkpoint()``, which runs ``snapshot_interval`` seconds after the first
+    unsnapshotted change, whenever the log grows past ``wal_max_bytes`` and on
+    ``close()``. It writes the dirty collections and then drops the log
+    prefix they cover. Startup reads the snapshots and replays the log tail.
+    Both are bounded, the log by ``wal_max_bytes`` and the hot files by the
+    archive, so restart time does not grow with history. The WAL supersedes
+    ``ballot_journal`` and ``flush_interval``.
+
+    With ``read_only``, loads leave the directory exactly as they found it:
+    closed rounds still inside ``votes.json`` are returned rather than moved
+    to the archive, the ballot journal is replayed but never trimmed, and
+    every save raises. With ``wal`` as well, the log is replayed into memory
+    but never checkpointed or truncated. The SQLite importer opens its source
+    this way.
+    """
+
+    def __init__(
+        self,
+        data_dir: str = DATA_DIR,
+        *,
+        ballot_journal: bool = False,
+        io_workers: int = 2,
+        flush_interval: float = 0.0,
+        codec: Optional[JsonCodec] = None,
+        compact: bool = False,
+        wal: bool = False,
+        snapshot_interval: float = 60.0,
+        wal_max_bytes: int = 4 * 1024 * 1024,
+        read_only: bool = False,
+    ):
+        self.data_dir = data_dir
+        self.read_only = read_only
+        self.codec = codec or get_codec()
+        self.compact_files = COMPACT_FILES if compact else frozenset()
+        self.wal = wal
+        self.ballot_journal = ballot_journal and not wal
+        self._cache: Dict[str, _CacheEntry] = {}
+        self._file_locks: Dict[str, asyncio.Lock] = {}
+        self._pending_writes: Dict[str, int] = {}
+        self.flush_interval = flush_interval
+        self._dirty: Dict[str, Any] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+        self.disk_writes = 0
+        # round id -> {started_at: partition}; started_at disambiguates reused ids.
+        self._archive_index: Optional[Dict[Any, Dict[Any, str]]] = None
+        self._executor = (
+            ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="repository-io")
+            if io_workers > 0
+            else None
+        )
+        journal = self._path(BALLOT_JOURNAL)
+        # Bytes queued for the journal so far; save_votes uses it to know how much it folded.
+        self._journal_size = os.path.getsize(journal) if os.path.exists(journal) else 0
+        self.snapshot_interval = snapshot_interval
+        self.wal_max_bytes = wal_max_bytes
+        wal_path = self._path(WAL_FILE)
+        self._wal_size = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        # Filled by _replay_wal: newest logged copy of each file, and the ballots logged after
+        # the newest copy of votes.json. Entries move into the cache as collections are loaded.
+        self._wal_records: Optional[Dict[str, Any]] = None
+        self._wal_ballots: List[Dict[str, Any]] = []
+        self._wal_replay_lock = asyncio.Lock()
+        self._checkpoint_lock = asyncio.Lock()
+        self._checkpoint_task: Optional[asyncio.Task] = None
+
+    async def close(self) -> None:
+        """Flush dirty collections, wait for in-flight I/O and stop the worker threads."""
+        if self.wal:
+            if self._checkpoint_task is not None:
+                self._checkpoint_task.cancel()
+            await self.checkpoint()
+        await self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.data_dir, filename)
+
+    def _file_lock(self, filename: str) -> asyncio.Lock:
+        lock = self._file_locks.get(filename)
+        if lock is None:
+            lock = self._file_locks[filename] = asyncio.Lock()
+        return lock
+
+    async def _io(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _fresh(self, filename: str) -> Optional[Any]:
+        """Return the cached collection if it is still current, without leaving the loop."""
+        entry = self._cache.get(filename)
+        if entry is None:
+            return None
+        if filename in self._dirty or self._pending_writes.get(filename):
+            # Our own write is in flight; memory is authoritative until it lands.
+            return entry.data
+        try:
+            st = os.stat(self._path(filename))
+        except FileNotFoundError:
+            return None
+        if entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+            return entry.data
+        return None
+
+    async def _load_json(self, filename: str, default: Any, shape: Optional[Shaper] = None) -> Any:
+        data = self._fresh(filename)
+        if data is not None:
+            return data
+
+        path = self._path(filename)
+        async with self._file_lock(filename):
+            # Another coroutine may have loaded the file while we waited for the lock.
+            data = self._fresh(filename)
+            if data is not None:
+                return data
+            if self.wal:
+                records = await self._replay_wal()
+                if filename in records:
+                    data = records.pop(filename)
+                    if shape is not None:
+                        data, _ = shape(data)
+                    self._mark_dirty(filename, data)
+                    return data
+            if not os.path.exists(path):
+                if self.read_only:
+                    return default
+                payload = self._begin_save(filename, default)
+                data, changed = default, False
+            else:
+                # Shaping runs on the worker too: nobody else holds a reference to ``data`` yet.
+                data, changed, mtime_ns, size = await self._io(_read_file, path, shape, self.codec)
+                if changed and self.read_only:
+                    # Serve the reshaped copy; the file on disk keeps its old layout.
+                    self._cache[filename] = _CacheEntry(mtime_ns, size, data)
+                    return data
+                if changed and self.wal:
+                    # The log still holds whatever changed it; the next checkpoint writes it.
+                    self._mark_dirty(filename, data)
+                    return data
+                if changed:
+                    payload = self._begin_save(filename, data)
+                else:
+                    self._cache[filename] = _CacheEntry(mtime_ns, size, data)
+                    return data
+        await self._finish_save(filename, data, payload)
+        return data
+
+    def _begin_save(self, filename: str, data: Any) -> bytes:
+        # Snapshot synchronously so the caller's view of ``data`` is what reaches disk.
+        payload = self.codec.dumps(data)
+        self._cache[filename] = _CacheEntry(-1, -1, data)
+        self._pending_writes[filename] = self._pending_writes.get(filename, 0) + 1
+        return payload
+
+    async def _finish_save(self, filename: str, data: Any, payload: bytes) -> None:
+        pretty = None if filename in self.compact_files else self.codec
+        try:
+            async with self._file_lock(filename):
+                os.makedirs(self.data_dir, exist_ok=True)
+                mtime_ns, size = await self._io(_write_file, self._path(filename), payload, pretty)
+                self.disk_writes += 1
+            entry = self._cache.get(filename)
+            if entry is not None and entry.data is data:
+                entry.mtime_ns, entry.size = mtime_ns, size
+        finally:
+            self._pending_writes[filename] -= 1
+
+    def _mark_dirty(self, filename: str, data: Any) -> None:
+        self._cache[filename] = _CacheEntry(-1, -1, data)
+        if not self.read_only:
+            # Read-only loads keep what they recovered from the log in memory only.
+            self._dirty[filename] = data
+
+    def _check_writable(self) -> None:
+        if self.read_only:
+            raise RuntimeError(f"{self.data_dir} is open read-only")
+
+    async def _save_json(self, filename: str, data: Any) -> None:
+        self._check_writable()
+        if self.wal:
+            records = await self._replay_wal()
+            # A full save supersedes anything recovered for this file but not loaded yet.
+            records.pop(filename, None)
+            if filename == "votes.json":
+                self._wal_ballots = []
+            line = self.codec.dumps({"file": filename, "data": data}) + b"\n"
+            self._mark_dirty(filename, data)
+            await self._wal_append(line)
+            return
+        if self.flush_interval <= 0:
+            payload = self._begin_save(filename, data)
+            await self._finish_save(filename, data, payload)
+            return
+        self._mark_dirty(filename, data)
+        if filename not in self._flush_tasks:
+            self._flush_tasks[filename] = asyncio.create_task(self._delayed_flush(filename))
+
+    async def _delayed_flush(self, filename: str) -> None:
+        await asyncio.sleep(self.flush_interval)
+        self._flush_tasks.pop(filename, None)
+        try:
+            await self._flush_file(filename)
+        except Exception:
+            logger.exception("Background flush of %s failed", filename)
+
+    async def _flush_file(self, filename: str) -> None:
+        if filename not in self._dirty:
+            return
+        data = self._dirty.pop(filename)
+        payload = self._begin_save(filename, data)
+        await self._finish_save(filename, data, payload)
+
+    async def _replay_wal(self) -> Dict[str, Any]:
+        records = self._wal_records
+        if records is not None:
+            return records
+        async with self._wal_replay_lock:
+            # Re-read: another coroutine may have replayed the log while we waited.
+            records = self._wal_records
+            if records is not None:
+                return records
+            records = {}
+            ballots: List[Dict[str, Any]] = []
+            # Torn lines from a crash mid-append are skipped by _read_jsonl.
+            for entry in await self._io(_read_jsonl, self._path(WAL_FILE), self.codec):
+                if "ballot" in entry:
+                    ballots.append(entry["ballot"])
+                elif "file" in entry:
+                    records[entry["file"]] = entry.get("data")
+                    if entry["file"] == "votes.json":
+                        ballots = []
+            if records or ballots:
+                logger.info(
+                    "Recovered %s collections and %s ballots from the write-ahead log",
+                    len(records),
+                    len(ballots),
+                )
+            self._wal_ballots = ballots
+            self._wal_records = records
+            return records
+
+    def _apply_wal_ballots(self, rows: List[Any]) -> Tuple[List[Round], bool]:
+        votes, _ = _shape_votes(rows)
+        open_rounds = {r.id: r for r in votes if r.is_open}
+        applied = False
+        for ballot in self._wal_ballots:
+            round_rec = open_rounds.get(ballot.get("round_id"))
+            if round_rec is not None:
+                round_rec.ballots[str(ballot["user_id"])] = normalize_ballot(ballot["index"])
+                applied = True
+        self._wal_ballots = []
+        return votes, applied
+
+    async def _wal_append(self, line: bytes) -> None:
+        async with self._file_lock(WAL_FILE):
+            os.makedirs(self.data_dir, exist_ok=True)
+            self._wal_size += await self._io(_append_line, self._path(WAL_FILE), line, True)
+        if self._wal_size >= self.wal_max_bytes:
+            await self.checkpoint()
+        elif self._checkpoint_task is None and self.snapshot_interval > 0:
+            self._checkpoint_task = asyncio.create_task(self._delayed_checkpoint())
+
+    async def _delayed_checkpoint(self) -> None:
+        await asyncio.sleep(self.snapshot_interval)
+        self._checkpoint_task = None
+        try:
+            await self.checkpoint()
+        except Exception:
+            logger.exception("Background checkpoint failed")
+
+    async def checkpoint(self) -> None:
+        """Write every collection changed since the last snapshot.
+
+        The covered prefix of the log is truncated afterwards.
+        """
+        if not self.wal or self.read_only or self._checkpoint_lock.locked():
+            return
+        async with self._checkpoint_lock:
+            records = await self._replay_wal()
+            # Collections recovered from the log but not loaded yet still need their snapshot.
+            for filename in list(records):
+                if filename == "votes.json":
+                    # Shaped like any other load, so ballots logged after the copy are applied.
+                    await self._load_votes_file()
+                else:
+                    await self._load_json(filename, None)
+            if self._wal_ballots:
+                await self._load_votes_file()
+            records.clear()
+            self._wal_ballots = []
+            # Every line logged so far is reflected in memory, so writing the dirty
+            # collections covers it; lines appended while we write stay in the tail.
+            covered = self._wal_size
+            await self.flush()
+            if covered:
+                async with self._file_lock(WAL_FILE):
+                    await self._io(_drop_prefix, self._path(WAL_FILE), covered)
+                self._wal_size -= covered
+
+    async def flush(self, filename: Optional[str] = None) -> None:
+        """Write dirty collections now instead of waiting for the flush interval."""
+        names = [filename] if filename is not None else list(self._dirty)
+        for name in names:
+            task = self._flush_tasks.pop(name, None)
+            if task is not None:
+                task.cancel()
+            await self._flush_file(name)
+
+    def invalidate(self, filename: Optional[str] = None) -> None:
+        """Drop the cached copy of ``filename`` (or of every file).
+
+        The next load re-reads it from disk.
+        """
+        if filename is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(filename, None)
+
     async def load_channels(self):
-        rows = _load_json("channels.json", [])
-        shaped, changed = _shape_channels(rows)
-        if changed:
-            _save_json("channels.json", shaped)
-        return shaped
+        return await self._load_json("channels.json", [], shape=_shape_channels)
 
     async def save_channels(self, channels):
-        _save_json("channels.json", channels)
+        self._drop_index("channels")
+        await self._save_json("channels.json", channels)
 
     async def load_schedules(self):
-        return _load_json("schedules.json", [])
+        return await self._load_json("schedules.json", [])
 
     async def save_schedules(self, schedules):
-        _save_json("schedules.json", schedules)
+        await self._save_json("schedules.json", schedules)
+
+    def _replay_ballot_journal(self, rows: List[Any]) -> Tuple[List[Round], bool]:
+        votes, _ = _shape_votes(rows)
+        path = self._path(BALLOT_JOURNAL)
+        if not self.ballot_journal or not os.path.exists(path):
+            return votes, False
+
+        open_rounds = {r.id: r for r in votes if r.is_open}
+        replayed = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    entry = self.codec.loads(line)
+                    round_rec = open_rounds.get(entry["round_id"])
+                    user_id, index = str(entry["user_id"]), normalize_ballot(entry["index"])
+                except (ValueError, KeyError, TypeError):
+                    # A crash mid-append can leave a torn final line; skip it.
+                    continue
+                if round_rec is None:
+                    continue
+                round_rec.ballots[user_id] = index
+                replayed += 1
+        if replayed:
+            logger.info("Replayed %s journaled ballots onto votes.json", replayed)
+        # Nothing is written back; the journal stays authoritative until the next save_votes.
+        return votes, False
+
+    async def _append_ballots(self, ballots: List[Tuple[int, str, int]]) -> None:
+        ts = datetime.now(timezone.utc).isoformat()
+        line = b"".join(
+            self.codec.dumps({"round_id": round_id, "user_id": user_id, "index": index, "ts": ts})
+            + b"\n"
+            for round_id, user_id, index in ballots
+        )
+        self._journal_size += len(line)
+        async with self._file_lock(BALLOT_JOURNAL):
+            os.makedirs(self.data_dir, exist_ok=True)
+            await self._io(_append_line, self._path(BALLOT_JOURNAL), line)
+
+    async def _load_votes_file(self):
+        if self.wal:
+            return await self._load_json("votes.json", [], shape=self._apply_wal_ballots)
+        if not self.ballot_journal:
+            return await self._load_json("votes.json", [], shape=_shape_votes)
+        data = self._fresh("votes.json")
+        if data is not None:
+            return data
+        # Hold the journal still while it is replayed onto a fresh parse of votes.json.
+        async with self._file_lock(BALLOT_JOURNAL):
+            return await self._load_json("votes.json", [], shape=self._replay_ballot_journal)
 
     async def load_votes(self):
-        return _load_json("votes.json", [])
+        """Return the open rounds; closed rounds live in the archive."""
+        votes = await self._load_votes_file()
+        if not self.read_only and any(r.is_finished for r in votes):
+            # Legacy file (or hand edit) with closed rounds still inline: move them out now.
+            await self.save_votes(votes)
+        return votes
+
+    async def _archive_index_map(self) -> Dict[Any, Dict[Any, str]]:
+        if self._archive_index is None:
+            index: Dict[Any, Dict[Any, str]] = {}
+            for entry in await self._io(_read_jsonl, self._path(ARCHIVE_INDEX), self.codec):
+                index.setdefault(entry.get("id"), {})[entry.get("started_at")] = entry.get(
+                    "partition"
+                )
+            self._archive_index = index
+        return self._archive_index
+
+    async def _archive_rounds(self, rounds: List[Round]) -> None:
+        index = await self._archive_index_map()
+        by_partition: Dict[str, List[bytes]] = {}
+        index_lines: List[bytes] = []
+        for round_rec in rounds:
+            rid, started = round_rec.id, round_rec.started_at
+            if started in index.get(rid, {}):
+                # Already archived by a save that crashed before rewriting votes.json.
+                continue
+            partition = _archive_partition(round_rec)
+            by_partition.setdefault(partition, []).append(self.codec.dumps(round_rec) + b"\n")
+            index.setdefault(rid, {})[started] = partition
+            index_lines.append(
+                self.codec.dumps({"id": rid, "started_at": started, "partition": partition}) + b"\n"
+            )
+
+        os.makedirs(self._path(ARCHIVE_DIR), exist_ok=True)
+        for partition, lines in by_partition.items():
+            name = os.path.join(ARCHIVE_DIR, f"votes-{partition}.jsonl")
+            async with self._file_lock(name):
+                await self._io(_append_line, self._path(name), b"".join(lines))
+        if index_lines:
+            async with self._file_lock(ARCHIVE_INDEX):
+                await self._io(_append_line, self._path(ARCHIVE_INDEX), b"".join(index_lines))
+
+    async def load_archive(self, partition: Optional[str] = None) -> List[Round]:
+        """Return archived rounds for one ``YYYY-MM`` partition, or for all of them."""
+        if partition is not None:
+            partitions = [partition]
+        else:
+            partitions = sorted(
+                {
+                    p
+                    for starts in (await self._archive_index_map()).values()
+                    for p in starts.values()
+                }
+            )
+        rounds: List[Round] = []
+        for part in partitions:
+            rows = await self._io(
+                _read_jsonl,
+                self._path(os.path.join(ARCHIVE_DIR, f"votes-{part}.jsonl")),
+                self.codec,
+            )
+            rounds.extend(_shape_votes(rows)[0])
+        return rounds
+
+    async def load_archived_round(self, round_id: int) -> Optional[Round]:
+        """Look up a closed round through the archive index; the newest wins if an id was reused."""
+        starts = (await self._archive_index_map()).get(round_id)
+        if not starts:
+            return None
+        latest = max(starts, key=lambda started: str(started or ""))
+        match = None
+        for round_rec in await self.load_archive(starts[latest]):
+            if round_rec.id == round_id and round_rec.started_at == latest:
+                match = round_rec
+        return match
 
     async def save_votes(self, votes):
-        return _save_json("votes.json", votes)
+        self._check_writable()
+        self._drop_index("votes")
+        closed = [r for r in votes if r.is_finished]
+        if closed:
+            # Archive first: a crash before votes.json is rewritten only leaves a duplicate
+            # that the index filters out on the next attempt.
+            await self._archive_rounds(closed)
+            votes[:] = [r for r in votes if not r.is_finished]
+        # Every ballot queued so far is already applied to the in-memory rounds being saved.
+        folded = self._journal_size
+        await self._save_json("votes.json", votes)
+        if not self.wal and (self.ballot_journal or closed):
+            # The journal may only shrink, and archived rounds may only leave the hot
+            # file, once the rewritten votes.json is on disk.
+            await self.flush("votes.json")
+        if self.ballot_journal and folded:
+            async with self._file_lock(BALLOT_JOURNAL):
+                await self._io(_drop_prefix, self._path(BALLOT_JOURNAL), folded)
+            self._journal_size -= folded
+
+    async def save_ballot(self, votes, round_id: int, user_id: str, index: int):
+        """
+        Persist a single ballot that the caller has already applied to ``votes``.
+
+        In journal and WAL mode this is one appended line; otherwise the whole
+        votes collection is saved as before.
+        """
+        await self.save_ballots(votes, [(round_id, user_id, index)])
+
+    async def save_ballots(self, votes, ballots: List[Tuple[int, str, int]]):
+        """Persist a batch of ``(round_id, user_id, index)`` ballots.
+
+        The batch costs one journal append (or one save).
+        """
+        self._check_writable()
+        if self.wal:
+            self._mark_dirty("votes.json", votes)
+            await self._wal_append(
+                b"".join(
+                    self.codec.dumps(
+                        {"ballot": {"round_id": round_id, "user_id": user_id, "index": index}}
+                    )
+                    + b"\n"
+                    for round_id, user_id, index in ballots
+                )
+            )
+        elif self.ballot_journal:
+            await self._append_ballots(ballots)
+        else:
+            await self.save_votes(votes)
 
     async def load_cooldowns(self):
-        return _load_json("cooldowns.json", {})
+        return await self._load_json("cooldowns.json", {})
 
     async def save_cooldowns(self, cooldowns):
-        _save_json("cooldowns.json", cooldowns)
+        await self._save_json("cooldowns.json", cooldowns)
+
+    async def load_counters(self):
+        return await self._load_json("counters.json", {})
+
+    async def save_counters(self, counters):
+        await self._save_json("counters.json", counters)
 
     async def load_maps(self):
-        return _load_json("maps.json", [])
+        return await self._load_json("maps.json", [])
 
     async def load_pools(self):
-        return _load_json("pools.json", [])
+        return await self._load_json("pools.json", [])
@@ -0,0 +1,369 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from bot.models import Round
+from bot.persistence.base import RepositoryBase
+from bot.persistence.repository import DATA_DIR, _shape_channels
+from bot.services.voting import normalize_ballot
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, "state.sqlite3")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS channels (
+    guild_id TEXT NOT NULL,
+    channel_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (guild_id, channel_id)
+);
+CREATE TABLE IF NOT EXISTS schedules (
+    position INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    status TEXT,
+    channel_id TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (id, started_at)
+);
+CREATE INDEX IF NOT EXISTS rounds_status ON rounds (status);
+CREATE TABLE IF NOT EXISTS ballots (
+    round_id INTEGER NOT NULL,
+    started_at TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    ballot TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (round_id, started_at, user_id)
+);
+CREATE TABLE IF NOT EXISTS cooldowns (
+    code TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS maps (
+    position INTEGER PRIMARY KEY,
+    code TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pools (
+    position INTEGER PRIMARY KEY,
+    name TEXT,
+    data TEXT NOT NULL
+);
+"""
+
+
+# (sql, rows) pairs executed with ``executemany`` inside a single transaction.
+Statements = List[Tuple[str, Sequence[tuple]]]
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), sort_keys=True)
+
+
+def _ballot_column(value: Any) -> str:
+    # An option index for plurality, a list of indexes for rankings and approval sets.
+    return _dumps(value)
+
+
+def _ballot_value(column: str) -> Any:
+    return normalize_ballot(json.loads(column))
+
+
+def _started_key(round_rec: Round) -> str:
+    # Round ids restart with the counters, so a round row is keyed by (id, started_at).
+    return str(round_rec.started_at or "")
+
+
+def _replace_table(table: str, columns: str, rows: Sequence[tuple]) -> Statements:
+    placeholders = ", ".join("?" for _ in columns.split(","))
+    return [
+        (f"DELETE FROM {table}", [()]),
+        (f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})", rows),
+    ]
+
+
+class SqliteRepository(RepositoryBase):
+    """
+    SQLite (WAL mode) storage with the same async surface as ``Repository``.
+
+    Rounds are keyed by ``(id, started_at)``, since round ids start over when
+    the counters are reset, and ballots by ``(round_id, started_at, user_id)``,
+    so a vote click is a single-row upsert and closing a round only rewrites
+    the rows that actually changed. As with the JSON backend, ``load_votes`` returns
+    only open and closing rounds; finished ones stay in the table (indexed by status) and
+    are read through ``load_archived_round`` / ``load_archive``. The database is owned by the bot, so each
+    collection is read once and then served from memory; saves write through.
+
+    All database work runs on one dedicated worker thread, which keeps the
+    event loop free and applies statements in the order they were issued.
+    Row values are computed on the loop before handing off.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-io")
+        self._cache: Dict[str, Any] = {}
+        self._load_locks: Dict[str, asyncio.Lock] = {}
+        # Last persisted form of each round, used to skip unchanged rows on save_votes.
+        self._round_blobs: Dict[int, str] = {}
+        self._round_ballots: Dict[int, Dict[str, int]] = {}
+        # started_at of each open round, the second half of its row key.
+        self._round_starts: Dict[int, str] = {}
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._conn.close()
+
+    def invalidate(self, collection: Optional[str] = None) -> None:
+        """Drop the in-memory copy of ``collection`` (or of everything) so the next load hits the database."""
+        if collection is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(collection, None)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _fetch(self, sql: str) -> List[tuple]:
+        return self._conn.execute(sql).fetchall()
+
+    def _apply(self, statements: Statements) -> None:
+        with self._conn:
+            for sql, rows in statements:
+                self._conn.executemany(sql, rows)
+
+    async def _execute(self, statements: Statements) -> None:
+        if statements:
+            await self._run(self._apply, statements)
+
+    async def _load(self, collection: str, build: Callable[[], Any]) -> Any:
+        if collection in self._cache:
+            return self._cache[collection]
+        lock = self._load_locks.setdefault(collection, asyncio.Lock())
+        async with lock:
+            if collection not in self._cache:
+                self._cache[collection] = await self._run(build)
+        return self._cache[collection]
+
+    def _build_channels(self) -> List[Dict[str, Any]]:
+        rows = [
+            json.loads(d) for (d,) in self._fetch("SELECT data FROM channels ORDER BY position")
+        ]
+        shaped, _ = _shape_channels(rows)
+        return shaped
+
+    async def load_channels(self):
+        return await self._load("channels", self._build_channels)
+
+    async def save_channels(self, channels):
+        self._drop_index("channels")
+        rows = [
+            (str(row.get("guild_id")), str(row.get("channel_id")), pos, _dumps(row))
+            for pos, row in enumerate(channels)
+        ]
+        self._cache["channels"] = channels
+        await self._execute(
+            _replace_table("channels", "guild_id, channel_id, position, data", rows)
+        )
+
+    def _build_schedules(self) -> List[Dict[str, Any]]:
+        return [
+            json.loads(d) for (d,) in self._fetch("SELECT data FROM schedules ORDER BY position")
+        ]
+
+    async def load_schedules(self):
+        return await self._load("schedules", self._build_schedules)
+
+    async def save_schedules(self, schedules):
+        rows = [(pos, _dumps(row)) for pos, row in enumerate(schedules)]
+        self._cache["schedules"] = schedules
+        await self._execute(_replace_table("schedules", "position, data", rows))
+
+    def _build_rounds(
+        self, where: str, params: tuple = ()
+    ) -> List[Tuple[int, str, Round, Dict[str, int]]]:
+        rounds = self._conn.execute(
+            f"SELECT id, started_at, data FROM rounds WHERE {where} ORDER BY id, started_at", params
+        ).fetchall()
+        ballots: Dict[Tuple[int, str], Dict[str, int]] = {}
+        for round_id, started, user_id, index in self._conn.execute(
+            "SELECT round_id, started_at, user_id, ballot FROM ballots "
+            f"WHERE (round_id, started_at) IN (SELECT id, started_at FROM rounds WHERE {where}) ORDER BY updated_at",
+            params,
+        ).fetchall():
+            ballots.setdefault((round_id, started), {})[user_id] = _ballot_value(index)
+
+        out = []
+        for round_id, started, blob in rounds:
+            round_rec = Round.from_dict(json.loads(blob))
+            cast = ballots.get((round_id, started), {})
+            round_rec.ballots = dict(cast)
+            # Snapshot the round as save_votes will serialize it, so an untouched round is never rewritten.
+            out.append((round_id, _dumps(round_rec.to_dict(ballots=False)), round_rec, cast))
+        return out
+
+    def _build_votes(self) -> List[Round]:
+        votes = []
+        for round_id, blob, round_rec, ballots in self._build_rounds(
+            "status IS NULL OR status IN ('open', 'closing')"
+        ):
+            self._round_blobs[round_id] = blob
+            self._round_ballots[round_id] = ballots
+            self._round_starts[round_id] = _started_key(round_rec)
+            votes.append(round_rec)
+        return votes
+
+    async def load_votes(self):
+        """Return the open rounds; closed rounds stay in the table and are read on demand."""
+        return await self._load("votes", self._build_votes)
+
+    async def load_archive(self, partition: Optional[str] = None) -> List[Round]:
+        """Return closed rounds, optionally only those started in one ``YYYY-MM`` month."""
+        rows = await self._run(self._build_rounds, "status NOT IN ('open', 'closing')")
+        rounds = [round_rec for _, _, round_rec, _ in rows]
+        if partition is not None:
+            rounds = [r for r in rounds if str(r.started_at or "").startswith(partition)]
+        return rounds
+
+    async def load_archived_round(self, round_id: int) -> Optional[Round]:
+        """Look up a round by id; the newest wins if the id was reused."""
+        rows = await self._run(self._build_rounds, "id = ?", (int(round_id),))
+        return rows[-1][2] if rows else None
+
+    async def save_votes(self, votes):
+        self._drop_index("votes")
+        if "votes" not in self._cache:
+            # Populate the per-round snapshots so stale rows are detected below.
+            await self.load_votes()
+        now = datetime.now(timezone.utc).isoformat()
+        statements: Statements = []
+        for round_rec in votes:
+            round_id, started = int(round_rec.id), _started_key(round_rec)
+            self._round_starts[round_id] = started
+            blob = _dumps(round_rec.to_dict(ballots=False))
+            if self._round_blobs.get(round_id) != blob:
+                statements.append(
+                    (
+                        "INSERT OR REPLACE INTO rounds (id, started_at, status, channel_id, data) VALUES (?, ?, ?, ?, ?)",
+                        [(round_id, started, round_rec.status, round_rec.channel_id, blob)],
+                    )
+                )
+                self._round_blobs[round_id] = blob
+
+            ballots = {str(k): normalize_ballot(v) for k, v in round_rec.ballots.items()}
+            if self._round_ballots.get(round_id, {}) != ballots:
+                statements.append(
+                    (
+                        "DELETE FROM ballots WHERE round_id = ? AND started_at = ?",
+                        [(round_id, started)],
+                    )
+                )
+                statements.append(
+                    (
+                        "INSERT INTO ballots (round_id, started_at, user_id, ballot, updated_at) VALUES (?, ?, ?, ?, ?)",
+                        [
+                            (round_id, started, uid, _ballot_column(idx), now)
+                            for uid, idx in ballots.items()
+                        ],
+                    )
+                )
+                self._round_ballots[round_id] = ballots
+
+        # Closed rounds keep their rows but leave the in-memory hot set.
+        for round_rec in votes:
+            if round_rec.is_finished:
+                self._round_blobs.pop(int(round_rec.id), None)
+                self._round_ballots.pop(int(round_rec.id), None)
+                self._round_starts.pop(int(round_rec.id), None)
+        votes[:] = [r for r in votes if not r.is_finished]
+        self._cache["votes"] = votes
+        await self._execute(statements)
+
+    async def save_ballot(self, votes, round_id: int, user_id: str, index: int):
+        await self.save_ballots(votes, [(round_id, user_id, index)])
+
+    async def save_ballots(self, votes, ballots: List[Tuple[int, str, int]]):
+        now = datetime.now(timezone.utc).isoformat()
+        rows = []
+        for round_id, user_id, index in ballots:
+            self._round_ballots.setdefault(int(round_id), {})[str(user_id)] = normalize_ballot(
+                index
+            )
+            started = self._round_starts.get(int(round_id), "")
+            rows.append(
+                (int(round_id), started, str(user_id), _ballot_column(normalize_ballot(index)), now)
+            )
+        await self._execute(
+            [
+                (
+                    "INSERT OR REPLACE INTO ballots (round_id, started_at, user_id, ballot, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+            ]
+        )
+
+    def _build_cooldowns(self) -> Dict[str, int]:
+        return {code: value for code, value in self._fetch("SELECT code, value FROM cooldowns")}
+
+    async def load_cooldowns(self):
+        return await self._load("cooldowns", self._build_cooldowns)
+
+    async def save_cooldowns(self, cooldowns):
+        rows = [(code, int(value)) for code, value in cooldowns.items()]
+        self._cache["cooldowns"] = cooldowns
+        await self._execute(_replace_table("cooldowns", "code, value", rows))
+
+    def _build_counters(self) -> Dict[str, int]:
+        return {name: value for name, value in self._fetch("SELECT name, value FROM counters")}
+
+    async def load_counters(self):
+        return await self._load("counters", self._build_counters)
+
+    async def save_counters(self, counters):
+        rows = [(name, int(value)) for name, value in counters.items()]
+        self._cache["counters"] = counters
+        await self._execute(_replace_table("counters", "name, value", rows))
+
+    def _build_maps(self) -> List[Dict[str, Any]]:
+        return [json.loads(d) for (d,) in self._fetch("SELECT data FROM maps ORDER BY position")]
+
+    async def load_maps(self):
+        return await self._load("maps", self._build_maps)
+
+    async def save_maps(self, maps):
+        rows = [(pos, m.get("code"), _dumps(m)) for pos, m in enumerate(maps)]
+        self._cache["maps"] = maps
+        await self._execute(_replace_table("maps", "position, code, data", rows))
+
+    def _build_pools(self) -> List[Dict[str, Any]]:
+        return [json.loads(d) for (d,) in self._fetch("SELECT data FROM pools ORDER BY position")]
+
+    async def load_pools(self):
+        return await self._load("pools", self._build_pools)
+
+    async def save_pools(self, pools):
+        rows = [(pos, p.get("name"), _dumps(p)) for pos, p in enumerate(pools)]
+        self._cache["pools"] = pools
+        await self._execute(_replace_table("pools", "position, name, data", rows))
@@ -1,18 +1,28 @@
 import datetime as dt
+
 import discord
+
+from bot.models import Option, Round
 from bot.persistence.repository import Repository
-from bot.utils.time import sydney_now, fmt_end
+from bot.services.deadlines import RoundDeadlines
 from bot.services.pools import Pools
 from bot.services.posting import Posting
+from bot.services.round_registry import RoundRegistry
+from bot.services.voting import APPROVAL, INSTANT_RUNOFF, METHODS, PLURALITY
+from bot.utils.time import fmt_end, sydney_now
 from bot.views import VoteView
 
-_round_seq = 1
+_METHOD_HINTS = {
+    INSTANT_RUNOFF: "_Click maps in order of preference; click again to remove one._",
+    APPROVAL: "_Click every map you would be happy with; click again to remove one._",
+}
 
 
-def _next_round_id():
-    global _round_seq
-    _round_seq += 1
-    return _round_seq
+def _vote_title(round_rec: Round) -> str:
+    # Names the pool so concurrent rounds in one channel can be told apart.
+    return (
+        "Vote — Next Map" if round_rec.pool == "default" else f"Vote — Next Map ({round_rec.pool})"
+    )
 
 
 class Rounds:
@@ -23,62 +33,75 @@ class Rounds:
         posting: Posting,
         vote_duration_minutes: int,
         mapvote_cooldown: int,
+        deadlines: RoundDeadlines | None = None,
+        registry: RoundRegistry | None = None,
     ):
         self.repository = repository
         self.pools = pools
         self.posting = posting
         self.vote_duration_minutes = vote_duration_minutes
         self.mapvote_cooldown = mapvote_cooldown
+        self.deadlines = deadlines
+        # An empty registry is falsy (it has __len__), so test for None explicitly.
+        self.registry = registry if registry is not None else RoundRegistry(repository)
 
-    async def start_new_vote(
-        self, bot, guild_id: str, channel_id: str, extra: dict | None = None
-    ):
+    async def start_new_vote(self, bot, guild_id: str, channel_id: str, extra: dict | None = None):
         extra = extra or {}
 
-        options = await self.pools.pick_vote_options(count=5)
+        options = await self.pools.pick_vote_options(count=5, pool=extra.get("pool"))
 
-        votes = await self.repository.load_votes()
-        rid = _next_round_id()
+        rid = await self.registry.allocate_id()
         ends_at = sydney_now() + dt.timedelta(minutes=self.vote_duration_minutes)
         min_votes = extra.get("minimum_votes")
         try:
             min_votes = max(0, int(min_votes))
         except (TypeError, ValueError):
             min_votes = 0
+        method = str(extra.get("voting_method") or PLURALITY).lower()
+        if method not in METHODS:
+            method = PLURALITY
 
-        round_rec = {
-            "id": rid,
-            "pool": extra.get("pool", "default"),
-            "channel_id": channel_id,
-            "started_at": sydney_now().isoformat(),
-            "ends_at": ends_at.isoformat(),
-            "status": "open",
-            "meta": {
-                "mapvote_cooldown": extra.get("mapvote_cooldown", self.mapvote_cooldown),
-                "minimum_votes": min_votes,
-            },
-            "options": [
-                {"index": i + 1, "map": o["code"], "label": o["label"], "votes": 0}
-                for i, o in enumerate(options)
-            ],
-        }
-        votes.append(round_rec)
-        await self.repository.save_votes(votes)
+        round_rec = Round(
+            id=rid,
+            pool=extra.get("pool") or "default",
+            channel_id=channel_id,
+            started_at=sydney_now().isoformat(),
+            ends_at=ends_at.isoformat(),
+            status="open",
+            voting_method=method,
+            minimum_votes=min_votes,
+            mapvote_cooldown=extra.get("mapvote_cooldown", self.mapvote_cooldown),
+            options=[Option(i + 1, o["code"], o["label"]) for i, o in enumerate(options)],
+        )
+        async with self.repository.transaction("votes") as votes:
+            votes.append(round_rec)
+        # Another round still open here keeps the current vote message; this one gets its own.
+        concurrent = bool(self.registry.in_channel(channel_id))
+        self.registry.register(round_rec)
+        if self.deadlines is not None:
+            self.deadlines.schedule(rid, ends_at, channel_id)
 
+        lines = [f"**{i+1}. {o['label']}**" for i, o in enumerate(options)]
+        if method in _METHOD_HINTS:
+            lines.append(_METHOD_HINTS[method])
         embed = discord.Embed(
-            title="Vote — Next Map",
-            description="\n".join(
-                [f"**{i+1}. {o['label']}**" for i, o in enumerate(options)]
-            ),
+            title=_vote_title(round_rec),
+            description="\n".join(lines),
         )
         embed.set_footer(text=f"Closes at {fmt_end(ends_at)}")
-        view = VoteView(self.repository, rid, round_rec["options"])
-
-        refs = await self.posting.ensure_persistent_messages(bot, guild_id, channel_id)
-        new_id = await self.posting.edit_current_vote_message(
-            bot, channel_id, refs["current_vote_message_id"], embed, view
+        view = VoteView(
+            self.repository, rid, round_rec.options, on_vote=self.posting.schedule_live_results
         )
-        if new_id != refs["current_vote_message_id"]:
-            await self.posting.update_channel_row(
-                guild_id, channel_id, current_vote_message_id=new_id
+
+        if concurrent:
+            new_id = await self.posting.post_vote_message(bot, channel_id, embed, view)
+        else:
+            refs = await self.posting.ensure_persistent_messages(bot, guild_id, channel_id)
+            new_id = await self.posting.edit_current_vote_message(
+                bot, channel_id, refs["current_vote_message_id"], embed, view
             )
+            if new_id != refs["current_vote_message_id"]:
+                await self.posting.update_channel_row(
+                    guild_id, channel_id, current_vote_message_id=new_id
+                )
+        self.posting.track_live_results(bot, rid, channel_id, new_id)
@@ -1,10 +1,13 @@
 import json
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from bot.services.game_server_client import GameServerClient
-from bot.rounds import Rounds
+
 from bot.persistence.repository import Repository
-from bot.services.pools import Pools
+from bot.rounds import Rounds
+from bot.services.game_server_client import GameServerClient
+from bot.services.pools import Pools, record_play
+
 
 # TODO This shouldn't be here. Need to inject a config wrapper that can reload the config.
 def _load_config():
@@ -12,8 +15,18 @@ def _load_config():
     with open(path, "r") as f:
         return json.load(f)
 
+
 class VoteScheduler:
-    def __init__(self, bot, repository: Repository, pools: Pools, rounds: Rounds, crcon_client: GameServerClient, guild_id: str, channel_id: str):
+    def __init__(
+        self,
+        bot,
+        repository: Repository,
+        pools: Pools,
+        rounds: Rounds,
+        crcon_client: GameServerClient,
+        guild_id: str,
+        channel_id: str,
+    ):
         # TODO Should not depend on bot.
         self.bot = bot
         self.repository = repository
@@ -26,7 +39,7 @@ class VoteScheduler:
         self.scheduler = AsyncIOScheduler(timezone="Australia/Sydney")
         self.jobs = []
 
-    async def  _load_schedules(self):
+    async def _load_schedules(self):
         cfg = _load_config()
         default_cd = cfg.get("mapvote_cooldown", 2)
         try:
@@ -86,23 +99,36 @@ class VoteScheduler:
             # The scheduler would get a handler injected and call that handler with the respective schedule/settings.
             # The bot (or a service it uses) would then be responsible for applying the settings and starting a vote (if required).
             # This would remove the bidirectional dependency and drastically simplify the scheduler.
-            async def job_wrapper(settings=s.get("settings", {}), mv_cd=s.get("mapvote_cooldown"), pool=s.get("pool"), mv_enabled=s.get("mapvote_enabled", True), min_votes=s.get("minimum_votes")):
+            async def job_wrapper(
+                settings=s.get("settings", {}),
+                mv_cd=s.get("mapvote_cooldown"),
+                pool=s.get("pool"),
+                mv_enabled=s.get("mapvote_enabled", True),
+                min_votes=s.get("minimum_votes"),
+                voting_method=s.get("voting_method"),
+            ):
                 # Apply server settings regardless
                 await self.crcon_client.apply_server_settings(settings or {})
 
                 # If mapvote is enabled, start an interactive vote as before
                 if mv_enabled:
-                    await self.rounds.start_new_vote(self.bot, self.guild_id, self.channel_id, extra={
-                        "mapvote_cooldown": mv_cd,
-                        "pool": pool or "default",
-                        "minimum_votes": min_votes,
-                    })
+                    await self.rounds.start_new_vote(
+                        self.bot,
+                        self.guild_id,
+                        self.channel_id,
+                        extra={
+                            "mapvote_cooldown": mv_cd,
+                            "pool": pool or "default",
+                            "minimum_votes": min_votes,
+                            "voting_method": voting_method,
+                        },
+                    )
                     return
 
                 # Mapvote disabled: choose a map immediately (random selection respecting cooldowns)
                 # Reuse pools.pick_vote_options to get 1 candidate (it already respects cooldowns)
                 try:
-                    opts = self.pools.pick_vote_options(count=1)
+                    opts = await self.pools.pick_vote_options(count=1, pool=pool)
                     if not opts:
                         return
                     chosen = opts[0]["code"]
@@ -111,12 +137,14 @@ class VoteScheduler:
                     await self.crcon_client.add_map_as_next_rotation(chosen)
 
                     # Update cooldowns: decrement existing entries and set cooldown for chosen map
-                    cds = await self.repository.load_cooldowns()
-                    for k in list(cds.keys()):
-                        cds[k] = max(0, int(cds.get(k, 0)) - 1)
-                    round_cd = mv_cd if mv_cd is not None else _load_config().get("mapvote_cooldown", 2)
-                    cds[chosen] = int(round_cd)
-                    await self.repository.save_cooldowns(cds)
+                    round_cd = (
+                        mv_cd if mv_cd is not None else _load_config().get("mapvote_cooldown", 2)
+                    )
+                    async with self.repository.transaction("cooldowns") as cds:
+                        for k in list(cds.keys()):
+                            cds[k] = max(0, int(cds.get(k, 0)) - 1)
+                        cds[chosen] = int(round_cd)
+                    await record_play(self.repository, chosen)
                 except Exception:
                     # keep scheduler resilient; swallowing errors here mirrors existing behavior
                     pass
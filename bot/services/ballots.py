@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from bot.persistence.repository import Repository
+
+logger = logging.getLogger(__name__)
+
+Ballot = Tuple[int, str, int]
+
+
+class BallotQueue:
+    """
+    Applies vote clicks off the interaction path.
+
+    The button acknowledges the click and only ``submit``s the ballot; a single
+    worker drains everything queued so far (up to ``max_batch``), applies it
+    to the live tallies under one votes transaction and persists the batch
+    with one ``save_ballots`` call. ``join`` waits until every submitted
+    ballot is persisted, e.g. before a round is closed, and ``close``
+    processes whatever is left at shutdown.
+    """
+
+    def __init__(self, repository: Repository, *, max_batch: int = 500, on_vote=None):
+        self.repository = repository
+        self.max_batch = max_batch
+        self.on_vote = on_vote
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.max_depth = 0
+        self.submitted = 0
+        self.persisted = 0
+        self.dropped = 0
+        self.batches = 0
+        self.acks = 0
+        self.total_ack = 0.0
+        self.max_ack = 0.0
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, round_id: int, user_id: str, index: int) -> None:
+        self._queue.put_nowait((round_id, user_id, index))
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def record_ack(self, seconds: float) -> None:
+        self.acks += 1
+        self.total_ack += seconds
+        self.max_ack = max(self.max_ack, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "persisted": self.persisted,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "ack_mean_ms": round(self.total_ack * 1000 / self.acks, 3) if self.acks else 0.0,
+            "ack_max_ms": round(self.max_ack * 1000, 3),
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def join(self) -> None:
+        if self._task is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            # Let the worker finish the batch it is saving (and anything queued behind it)
+            # before stopping it: a cancelled save_ballots would lose ballots the tally already has.
+            await self._queue.join()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while not self._queue.empty():
+            await self._process(self._take_batch([]))
+
+    async def run(self) -> None:
+        while True:
+            first = await self._queue.get()
+            await self._process(self._take_batch([first]))
+
+    def _take_batch(self, batch: List[Ballot]) -> List[Ballot]:
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _process(self, batch: List[Ballot]) -> None:
+        try:
+            await self._apply(batch)
+        finally:
+            # Only now do the ballots count as done for join().
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _apply(self, batch: List[Ballot]) -> None:
+        changed: List[Ballot] = []
+        try:
+            async with self.repository.transaction("votes", autosave=False) as votes:
+                rounds = self.repository.rounds_by_id(votes)
+                for round_id, user_id, index in batch:
+                    r = rounds.get(round_id)
+                    if not r or not r.is_open:
+                        # The round closed while the click was queued.
+                        self.dropped += 1
+                    elif self.repository.tally(r).vote(user_id, index):
+                        # Persist the resulting ballot: a ranking or approval set may span several clicks.
+                        changed.append((round_id, user_id, r.ballots[user_id]))
+                if changed:
+                    await self.repository.save_ballots(votes, changed)
+        except Exception:
+            logger.exception("Failed to persist %s ballots", len(batch))
+            return
+        self.batches += 1
+        self.persisted += len(changed)
+        if self.on_vote is not None:
+            for round_id in {b[0] for b in changed}:
+                self.on_vote(round_id)
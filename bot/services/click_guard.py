@@ -0,0 +1,63 @@
+import time
+from typing import Callable, Dict, Tuple
+
+
+class ClickGuard:
+    """
+    Cheap in-memory screening of vote clicks before they reach the repository.
+
+    ``check`` reports a click as ``DUPLICATE`` when the user's last accepted
+    choice in that round is the same option, and as ``LIMITED`` when the
+    user's token bucket (``rate`` clicks per second, bursts of ``burst``) is
+    empty. Only ``ALLOW``ed clicks go on to storage, so writes follow
+    distinct ballot changes rather than raw clicks. Call ``remember`` once a
+    click is accepted and ``forget_round`` when the round closes.
+    """
+
+    ALLOW = "allow"
+    DUPLICATE = "duplicate"
+    LIMITED = "limited"
+
+    # Idle buckets are swept once this many users have been seen.
+    SWEEP_AT = 10_000
+
+    def __init__(
+        self, rate: float = 1.0, burst: int = 5, clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._choices: Dict[int, Dict[str, int]] = {}
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self.duplicates = 0
+        self.limited = 0
+
+    def check(self, round_id: int, user_id: str, index: int) -> str:
+        if self._choices.get(round_id, {}).get(user_id) == index:
+            self.duplicates += 1
+            return self.DUPLICATE
+        if not self._take_token(user_id):
+            self.limited += 1
+            return self.LIMITED
+        return self.ALLOW
+
+    def remember(self, round_id: int, user_id: str, index: int) -> None:
+        self._choices.setdefault(round_id, {})[user_id] = index
+
+    def forget_round(self, round_id: int) -> None:
+        self._choices.pop(round_id, None)
+
+    def _take_token(self, user_id: str) -> bool:
+        now = self.clock()
+        tokens, last = self._buckets.get(user_id, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - last) * self.rate)
+        allowed = tokens >= 1.0
+        self._buckets[user_id] = (tokens - 1.0 if allowed else tokens, now)
+        if len(self._buckets) > self.SWEEP_AT:
+            self._sweep(now)
+        return allowed
+
+    def _sweep(self, now: float) -> None:
+        # A bucket that has refilled completely carries no state worth keeping.
+        full_after = self.burst / self.rate if self.rate > 0 else float("inf")
+        self._buckets = {u: b for u, b in self._buckets.items() if now - b[1] < full_after}
@@ -0,0 +1,113 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from bot.persistence.repository import Repository
+
+logger = logging.getLogger(__name__)
+
+# Called with (round_id, channel_id) once a round's deadline passes.
+DeadlineHandler = Callable[[int, Optional[str]], Awaitable[None]]
+
+
+def _deadline(ends_at) -> Optional[float]:
+    if isinstance(ends_at, datetime):
+        return ends_at.timestamp()
+    try:
+        return datetime.fromisoformat(str(ends_at)).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class RoundDeadlines:
+    """
+    Closes rounds when their ``ends_at`` passes.
+
+    Deadlines sit in a min-heap and one timer task sleeps until the earliest
+    of them, however many rounds are open. Scheduling an earlier deadline
+    wakes the timer so it can re-arm. ``rehydrate`` re-schedules every open
+    or closing round after a restart; rounds whose deadline passed while the
+    bot was down fire straight away. Handlers receive ``(round_id, channel_id)`` and
+    run as their own tasks, so a slow close does not hold up the next one.
+    """
+
+    def __init__(self, repository: Repository):
+        self.repository = repository
+        self.handlers: List[DeadlineHandler] = []
+        self._heap: List[Tuple[float, int]] = []
+        # round id -> (deadline, channel id); heap entries that disagree are stale.
+        self._pending: Dict[int, Tuple[float, Optional[str]]] = {}
+        self._wakeup = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+
+    def add_handler(self, handler: DeadlineHandler) -> None:
+        self.handlers.append(handler)
+
+    def schedule(self, round_id: int, ends_at, channel_id: Optional[str] = None) -> None:
+        deadline = _deadline(ends_at)
+        if deadline is None:
+            logger.warning(
+                "Round %s has no usable ends_at (%r); it will not close on its own",
+                round_id,
+                ends_at,
+            )
+            return
+        self._pending[round_id] = (deadline, channel_id)
+        heapq.heappush(self._heap, (deadline, round_id))
+        if self._heap[0][1] == round_id:
+            self._wakeup.set()
+
+    def cancel(self, round_id: int) -> None:
+        # The heap entry is skipped when it comes up.
+        self._pending.pop(round_id, None)
+
+    async def rehydrate(self) -> int:
+        votes = await self.repository.load_votes()
+        count = 0
+        for r in votes:
+            # Rounds still closing when the bot went down are finished off straight away.
+            if not r.is_finished:
+                self.schedule(r.id, r.ends_at, r.channel_id)
+                count += 1
+        return count
+
+    def _pop_due(self, now: float) -> Optional[Tuple[int, Optional[str]]]:
+        while self._heap and self._heap[0][0] <= now:
+            deadline, round_id = heapq.heappop(self._heap)
+            pending = self._pending.get(round_id)
+            if pending is not None and pending[0] == deadline:
+                del self._pending[round_id]
+                return round_id, pending[1]
+        return None
+
+    def _next_delay(self) -> Optional[float]:
+        while self._heap and self._pending.get(self._heap[0][1], (None,))[0] != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return self._heap[0][0] - time.time()
+
+    async def run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            due = self._pop_due(time.time())
+            if due is not None:
+                task = asyncio.create_task(self._fire(*due))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+                continue
+            delay = self._next_delay()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, round_id: int, channel_id: Optional[str]) -> None:
+        for handler in self.handlers:
+            try:
+                await handler(round_id, channel_id)
+            except Exception:
+                logger.exception("Closing round %s at its deadline failed", round_id)
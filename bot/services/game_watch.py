@@ -1,38 +1,43 @@
 import asyncio
-from bot.services.game_server_client import GameServerClient
+from typing import Awaitable, Callable, List
+
 from bot.persistence.repository import Repository
+from bot.services.game_server_client import GameServerClient
+
 
 # TODO Probably want to change this so you can register handlers for different events, e.g. game start, game end.
 class GameStateNotifier:
     def __init__(self, repository: Repository, rcon_client: GameServerClient):
         self.repository = repository
         self.rcon_client = rcon_client
-        self.handlers = []
+        self.handlers: List[Callable[[], Awaitable[None]]] = []
 
-    def add_handler(self, handler):
+    def add_handler(self, handler: Callable[[], Awaitable[None]]) -> None:
         self.handlers.append(handler)
 
     async def watch_game_starts(self, bot, guild_id: str, channel_id: str):
-        chans = await self.repository.load_channels()
-        row = next((r for r in chans if r.get("guild_id") == guild_id and r.get("channel_id") == channel_id), None)
-        if not row:
+        if not await self.repository.get_channel_row(guild_id, channel_id):
             return
 
         while True:
             try:
                 session_marker = await self.rcon_client.get_latest_match_start_marker()
-                last = row.get("last_session_id")
 
                 if session_marker is None:
                     await asyncio.sleep(25)
                     continue
 
-                if last is None:
-                    row["last_session_id"] = session_marker
-                    await self.repository.save_channels(chans)
-                elif session_marker != last:
-                    row["last_session_id"] = session_marker
-                    await self.repository.save_channels(chans)
+                # Re-read the row under the channels lock instead of saving a stale list
+                # loaded when the watcher started.
+                async with self.repository.transaction("channels", autosave=False) as chans:
+                    row = self.repository.channels_by_key(chans).get((guild_id, channel_id))
+                    last = row.get("last_session_id") if row else None
+                    changed = row is not None and session_marker != last
+                    if row is not None and changed:
+                        row["last_session_id"] = session_marker
+                        await self.repository.save_channels(chans)
+
+                if changed and last is not None:
                     for handler in self.handlers:
                         await handler()
             except Exception:
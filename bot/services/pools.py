@@ -1,37 +1,415 @@
+import logging
 import random
-from bot.utils.maps import base_map_code, normalize_cooldowns
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
 from bot.persistence.repository import Repository
+from bot.services.round_registry import ROUND_ID_COUNTER
+from bot.utils.maps import base_map_code, normalize_cooldowns, parse_map_code
+
+logger = logging.getLogger(__name__)
+
+# Counter holding the id of the round a base map last won, e.g. "played:FOY".
+PLAYED_PREFIX = "played:"
+# Weights are kept as integers so the sampler's running sums stay exact.
+WEIGHT_SCALE = 1000
+
+
+def _positions(mask: int) -> Iterator[int]:
+    # Set bits of ``mask``, lowest first, i.e. in maps.json order.
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _quotas(raw: Any) -> Dict[str, int]:
+    quotas: Dict[str, int] = {}
+    for mode, n in (raw.items() if isinstance(raw, dict) else ()):
+        try:
+            n = int(n)
+        except (TypeError, ValueError):
+            continue
+        if n > 0:
+            quotas[str(mode).lower()] = n
+    return quotas
+
+
+def _map_weight(raw: Any) -> float:
+    try:
+        return max(0.0, float(raw))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+async def record_play(
+    repository: Repository, map_code: str, round_id: Optional[int] = None
+) -> None:
+    """Remember that ``map_code`` won round ``round_id`` (the latest round if not given)."""
+    async with repository.transaction("counters") as counters:
+        if round_id is None:
+            round_id = counters.get(ROUND_ID_COUNTER, 0)
+        counters[PLAYED_PREFIX + base_map_code(map_code)] = int(round_id)
+
+
+class WeightedSampler:
+    """
+    Fenwick tree over integer weights: draws in O(log n), updates one weight in O(log n).
+    """
+
+    __slots__ = ("weights", "total", "_tree", "_top")
+
+    def __init__(self, weights: List[int]):
+        n = len(weights)
+        self.weights = list(weights)
+        self.total = sum(weights)
+        tree = [0] + self.weights
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._top = 1 << (n.bit_length() - 1) if n else 0
+
+    def set(self, slot: int, weight: int) -> None:
+        delta = weight - self.weights[slot]
+        if not delta:
+            return
+        self.weights[slot] = weight
+        self.total += delta
+        i = slot + 1
+        n = len(self.weights)
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def find(self, target: int) -> int:
+        # Slot whose cumulative weight range contains ``target`` (0 <= target < total).
+        pos, step = 0, self._top
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] <= target:
+                pos = nxt
+                target -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+    def draw(self) -> int:
+        """A slot drawn with probability proportional to its weight; ``total`` must be positive."""
+        return self.find(random.randrange(self.total))
+
+
+class _PoolSampler:
+    __slots__ = ("mask", "positions", "slots", "sampler", "_held")
+
+    def __init__(self, mask: int, weight: Callable[[int], int]) -> None:
+        self.mask = mask
+        self.positions = list(_positions(mask))
+        self.slots = {p: i for i, p in enumerate(self.positions)}
+        self.sampler = WeightedSampler([weight(p) for p in self.positions])
+        self._held: List[Tuple[int, int]] = []
+
+    def hold(self, mask: int) -> None:
+        # Take the positions in ``mask`` out of the draw until release().
+        for pos in _positions(mask & self.mask):
+            slot = self.slots[pos]
+            if self.sampler.weights[slot]:
+                self._held.append((slot, self.sampler.weights[slot]))
+                self.sampler.set(slot, 0)
+
+    def release(self) -> None:
+        for slot, weight in self._held:
+            self.sampler.set(slot, weight)
+        self._held = []
+
+
+class PoolIndex:
+    """
+    ``maps.json`` and ``pools.json`` compiled into bitmaps over map positions.
+
+    Bit ``i`` stands for the i-th entry of maps.json. Each pool becomes the
+    mask of the positions it lists, each base map code the mask of its
+    variants, and ``enabled`` the mask of maps not switched off, so picking
+    options is a few integer ``&``/``|`` operations instead of list scans and
+    repeated ``base_map_code`` calls. Built once per loaded maps/pools pair.
+
+    The eligible (in pool, enabled, not cooling down) mask of each pool asked
+    for is cached. ``sync_cooldowns`` compares the cooldowns with the ones
+    seen last and flips only the variants of base maps that started or
+    finished cooling down in the cached masks.
+
+    Each pool asked for also gets a ``WeightedSampler`` over its members,
+    weighted by the map's ``weight`` (default 1) times its recency factor, and
+    0 while cooling down. ``sync_cooldowns`` and ``sync_history`` reweigh only
+    the variants whose weight changed instead of rebuilding the samplers.
+
+    A vote offers at most one variant per base map (the entry's ``base``
+    field, or the base parsed from its code if it has none): once a variant
+    is drawn, the other variants of its base are held at weight 0 for the
+    rest of the draw, so each draw picks a base with the combined weight of its remaining
+    variants and then one of them. A pool's ``quotas`` (e.g.
+    ``{"offensive": 1}``) are drawn first from per-mode samplers of the pool;
+    the mode is the entry's ``gamemode`` (or ``mode``), else the parsed one.
+    Every option costs one draw; nothing is retried.
+    """
+
+    __slots__ = (
+        "maps",
+        "pools",
+        "entries",
+        "bases",
+        "groups",
+        "enabled",
+        "all",
+        "by_name",
+        "active",
+        "quotas",
+        "cooldowns",
+        "half_life",
+        "recency",
+        "_weights",
+        "_base_masks",
+        "_group_masks",
+        "_mode_masks",
+        "_cooling",
+        "_eligible",
+        "_samplers",
+    )
+
+    def __init__(
+        self, maps: List[Dict[str, Any]], pools: List[Dict[str, Any]], half_life: float = 0.0
+    ):
+        # Kept to tell whether the repository has handed out a different collection since.
+        self.maps = maps
+        self.pools = pools
+        self.entries: List[Tuple[str, str]] = []
+        # Cooldown bucket (parsed base code) and diversity group (maps.json base) per position.
+        self.bases: List[str] = []
+        self.groups: List[Any] = []
+        self.enabled = 0
+        self._weights: List[float] = []
+        by_code: Dict[Any, int] = {}
+        self._base_masks: Dict[str, int] = {}
+        self._group_masks: Dict[Any, int] = {}
+        self._mode_masks: Dict[str, int] = {}
+        for pos, m in enumerate(maps):
+            code = m.get("code")
+            bit = 1 << pos
+            if not isinstance(code, str) or not code:
+                # Keeps its position so the bits still line up with maps.json, but is
+                # in no pool, disabled and weightless, so it is never offered.
+                logger.warning("maps.json entry %d has no code; skipping it", pos)
+                self.entries.append(("", ""))
+                self._weights.append(0.0)
+                self.bases.append("")
+                self.groups.append(None)
+                continue
+            parsed = parse_map_code(code)
+            if parsed is not None:
+                code = parsed.code
+            self.entries.append((code, str(m.get("name", code))))
+            self._weights.append(_map_weight(m.get("weight", 1)))
+            by_code[code] = by_code.get(code, 0) | bit
+            base: str = parsed.base if parsed is not None else code
+            self.bases.append(base)
+            self._base_masks[base] = self._base_masks.get(base, 0) | bit
+            group = m.get("base") or base
+            self.groups.append(group)
+            self._group_masks[group] = self._group_masks.get(group, 0) | bit
+            mode: Optional[str]
+            if m.get("gamemode") or m.get("mode"):
+                mode = str(m.get("gamemode") or m.get("mode")).lower()
+            else:
+                mode = parsed.mode.value if parsed is not None and parsed.mode else None
+            if mode:
+                self._mode_masks[mode] = self._mode_masks.get(mode, 0) | bit
+            if m.get("enabled", True):
+                self.enabled |= bit
+        self.all = (1 << len(maps)) - 1
+
+        self.by_name: Dict[Any, int] = {}
+        self.active: Optional[int] = None
+        # Pool name (None for the default pool) -> minimum options per game mode.
+        self.quotas: Dict[Any, Dict[str, int]] = {}
+        for p in pools:
+            mask = 0
+            for code in p.get("maps") or []:
+                mask |= by_code.get(code, 0)
+            if p.get("name") not in self.by_name:
+                self.by_name[p.get("name")] = mask
+                self.quotas[p.get("name")] = _quotas(p.get("quotas"))
+            if self.active is None and p.get("active"):
+                self.active = mask
+                self.quotas[None] = _quotas(p.get("quotas"))
+
+        self.cooldowns: Dict[str, int] = {}
+        self.half_life = half_life
+        # Base code -> weight factor below 1 for recently played maps; absent means 1.
+        self.recency: Dict[str, float] = {}
+        self._cooling = 0
+        self._eligible: Dict[Any, int] = {}
+        self._samplers: Dict[Any, _PoolSampler] = {}
+
+    def is_current(self, maps: List[Dict[str, Any]], pools: List[Dict[str, Any]]) -> bool:
+        return self.maps is maps and self.pools is pools and len(self.entries) == len(maps)
+
+    def members(self, pool: Optional[str] = None) -> int:
+        """Enabled maps of ``pool``; ``None`` means the active pool, or every map if none is active."""
+        mask = self.by_name.get(pool) if pool is not None else None
+        if mask is None:
+            mask = self.all if self.active is None else self.active
+        return mask & self.enabled
+
+    def sync_cooldowns(self, cooldowns: Dict[str, int]) -> None:
+        flipped = 0
+        seen = self.cooldowns
+        for base, value in cooldowns.items():
+            if (value > 0) != (seen.get(base, 0) > 0):
+                flipped |= self._base_masks.get(base, 0)
+        for base, value in seen.items():
+            if value > 0 and base not in cooldowns:
+                flipped |= self._base_masks.get(base, 0)
+        self.cooldowns = dict(cooldowns)
+        if flipped:
+            self._cooling ^= flipped
+            for pool, mask in self._eligible.items():
+                self._eligible[pool] = mask ^ (flipped & self.members(pool))
+            self._reweigh(flipped)
+
+    def sync_history(self, played: Dict[str, int], latest: int) -> None:
+        """
+        Recompute recency factors from the round each base map last won.
+
+        A map that won ``age`` rounds before the latest one is weighted by
+        ``1 - 2 ** -((age + 1) / half_life)``, recovering towards 1 as rounds
+        pass; within 0.1% of 1 it counts as unplayed.
+        """
+        recency: Dict[str, float] = {}
+        if self.half_life > 0:
+            for base, round_id in played.items():
+                factor = 1 - 2 ** (-(max(0, latest - round_id) + 1) / self.half_life)
+                if factor < 0.999:
+                    recency[base] = factor
+        changed = 0
+        for base in recency.keys() | self.recency.keys():
+            if recency.get(base) != self.recency.get(base):
+                changed |= self._base_masks.get(base, 0)
+        self.recency = recency
+        if changed:
+            self._reweigh(changed)
+
+    def weight(self, pos: int) -> int:
+        if self._cooling >> pos & 1:
+            return 0
+        return round(self._weights[pos] * self.recency.get(self.bases[pos], 1.0) * WEIGHT_SCALE)
+
+    def _reweigh(self, mask: int) -> None:
+        for entry in self._samplers.values():
+            for pos in _positions(mask & entry.mask):
+                entry.sampler.set(entry.slots[pos], self.weight(pos))
+
+    def eligible(self, pool: Optional[str] = None) -> int:
+        mask = self._eligible.get(pool)
+        if mask is None:
+            mask = self._eligible[pool] = self.members(pool) & ~self._cooling
+        return mask
+
+    def same_base(self, pos: int) -> int:
+        return self._group_masks[self.groups[pos]]
+
+    def _sampler(self, pool: Optional[str], mode: Optional[str]) -> _PoolSampler:
+        entry = self._samplers.get((pool, mode))
+        if entry is None:
+            mask = self.members(pool)
+            if mode is not None:
+                mask &= self._mode_masks.get(mode, 0)
+            entry = self._samplers[(pool, mode)] = _PoolSampler(mask, self.weight)
+        return entry
+
+    def draw(self, pool: Optional[str], k: int) -> List[int]:
+        """
+        Up to ``k`` eligible positions of ``pool`` with positive weight and
+        distinct base maps, drawn by weight, the pool's quotas first.
+        """
+        picked: List[int] = []
+        taken = 0
+        plan: List[Tuple[Optional[str], int]] = list(self.quotas.get(pool, {}).items())
+        plan.append((None, k))
+        for mode, n in plan:
+            entry = self._sampler(pool, mode)
+            entry.hold(taken)
+            n = min(n, k - len(picked))
+            while n > 0 and entry.sampler.total > 0:
+                pos = entry.positions[entry.sampler.draw()]
+                picked.append(pos)
+                taken |= self.same_base(pos)
+                entry.hold(self.same_base(pos))
+                n -= 1
+            entry.release()
+        return picked
+
+    def options(self, positions: Iterable[int]) -> List[Dict[str, str]]:
+        return [{"code": self.entries[p][0], "label": self.entries[p][1]} for p in positions]
 
 
 class Pools:
-    def __init__(self, repository: Repository):
+    def __init__(self, repository: Repository, recency_half_life: float = 2.0):
         self.repository = repository
+        self.recency_half_life = recency_half_life
+        self._index: Optional[PoolIndex] = None
 
-    async def pick_vote_options(self, count=5):
+    async def index(self) -> PoolIndex:
         maps = await self.repository.load_maps()
         pools = await self.repository.load_pools()
-        cds = normalize_cooldowns(await self.repository.load_cooldowns())
+        # The repositories return the same objects until the files change on disk or are saved.
+        if self._index is None or not self._index.is_current(maps, pools):
+            self._index = PoolIndex(maps, pools, self.recency_half_life)
+        return self._index
 
-        pool = next((p for p in pools if p.get("active")), None) or {
-            "maps": [m.get("code") for m in maps]
+    async def _history(self) -> Tuple[Dict[str, int], int]:
+        load_counters = getattr(self.repository, "load_counters", None)
+        counters = await load_counters() if load_counters is not None else {}
+        played = {
+            k[len(PLAYED_PREFIX) :]: int(v)
+            for k, v in counters.items()
+            if k.startswith(PLAYED_PREFIX)
         }
+        return played, int(counters.get(ROUND_ID_COUNTER, 0))
+
+    async def pick_vote_options(
+        self, count: int = 5, pool: Optional[str] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Pick ``count`` options from ``pool`` (a pools.json name), preferring maps
+        that are not cooling down. Without a name, or for "default", the active
+        pool is used, or every map if no pool is active.
+
+        Maps that are not cooling down are drawn by weight (``weight`` in
+        maps.json times a factor that is lower for recently played maps).
+        Eligible maps with weight 0 come next, then cooling maps, soonest
+        available first. No two options share a base map, so fewer than
+        ``count`` come back if the pool has fewer base maps.
+        """
+        index = await self.index()
+        index.sync_cooldowns(normalize_cooldowns(await self.repository.load_cooldowns()))
+        index.sync_history(*await self._history())
+
+        if pool is not None and pool not in index.by_name:
+            if pool != "default":
+                logger.warning("Pool %r is not in pools.json; using the default pool", pool)
+            pool = None
+
+        out = index.draw(pool, count)
+        if len(out) < count:
+            taken = 0
+            for p in out:
+                taken |= index.same_base(p)
+            cooling = index.members(pool) & ~index.eligible(pool)
+            ranked = sorted(_positions(cooling), key=lambda p: index.cooldowns[index.bases[p]])
+            for p in [*_positions(index.eligible(pool) & ~taken), *ranked]:
+                if len(out) == count:
+                    break
+                if not taken >> p & 1:
+                    out.append(p)
+                    taken |= index.same_base(p)
 
-        pool_maps = [
-            m for m in maps if m.get("code") in pool["maps"] and m.get("enabled", True)
-        ]
-        eligible = [
-            m for m in pool_maps if int(cds.get(base_map_code(m["code"]), 0)) == 0
-        ]
-
-        out = []
-        if len(eligible) >= count:
-            out = random.sample(eligible, count)
-        else:
-            need = count - len(eligible)
-            cooling = sorted(
-                [m for m in pool_maps if int(cds.get(base_map_code(m["code"]), 0)) > 0],
-                key=lambda x: cds.get(base_map_code(x["code"]), 0),
-            )
-            out = eligible + cooling[:need]
-
-        return [{"code": m["code"], "label": m.get("name", m["code"])} for m in out]
+        return index.options(out)
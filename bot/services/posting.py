@@ -1,34 +1,72 @@
 import asyncio
-import discord
 import logging
+import time
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Set
 
+import discord
 from discord import Embed
 
+from bot.models import CLOSING, Round
 from bot.persistence.repository import Repository
-from bot.utils.maps import base_map_code, normalize_cooldowns
-from bot.services.voting import determine_winner
 from bot.services.game_server_client import GameServerClient
+from bot.services.pools import record_play
+from bot.services.round_registry import RoundRegistry
+from bot.services.voting import determine_winner
+from bot.utils.maps import base_map_code, normalize_cooldowns
+from bot.utils.time import fmt_end
 from bot.views import ManagementControlView
 
-
 logger = logging.getLogger(__name__)
 
+# Discord allows roughly five message edits per five seconds per channel, shared with
+# every other message the bot sends or edits there (new rounds, summaries, pins). Live
+# results average at most one edit per window per channel, however many rounds are open
+# in it, so a two-second floor spends under half of that budget.
+MIN_LIVE_RESULTS_WINDOW = 2.0
+
+
+@dataclass
+class _LiveChannel:
+    """Rounds of one channel with clicks not yet shown, and the task that flushes them."""
+
+    dirty: Set[int] = field(default_factory=set)
+    task: Optional["asyncio.Task[None]"] = None
+
 
 def _empty_last_vote_embed():
     e = Embed(title="Last Vote — Summary", description="No completed votes yet.")
     return e
 
+
 def _placeholder_vote_embed():
     e = Embed(title="Vote — Next Map", description="No active vote yet.")
     return e
 
+
 class Posting:
-    def __init__(self, repository: Repository, rcon_client: GameServerClient, *, default_mapvote_cooldown: int):
+    def __init__(
+        self,
+        repository: Repository,
+        rcon_client: GameServerClient,
+        *,
+        default_mapvote_cooldown: int,
+        live_results_window: float = 0.0,
+        registry: Optional[RoundRegistry] = None,
+    ):
         self.repository = repository
         self.rcon_client = rcon_client
+        self.registry = registry
         self.default_mapvote_cooldown = max(0, int(default_mapvote_cooldown))
+        # 0 disables live results; otherwise clicks within one window share a single edit.
+        self.live_results_window = (
+            max(MIN_LIVE_RESULTS_WINDOW, live_results_window) if live_results_window > 0 else 0.0
+        )
+        self._live_results: Dict[int, Dict[str, Any]] = {}
+        self._live_channels: Dict[str, _LiveChannel] = {}
+        # Rounds whose close steps are running in this process.
+        self._closing: Set[int] = set()
         self._maps_by_code: Optional[Dict[str, dict]] = None
         self._maps_by_pretty: Optional[Dict[str, dict]] = None
         self._last_status_snapshot: Optional[Dict[str, Any]] = None
@@ -66,7 +104,9 @@ class Posting:
         return None
 
     @staticmethod
-    def _coalesce(data: Dict[str, Any], keys: tuple[str, ...], default: Optional[str] = None) -> Optional[str]:
+    def _coalesce(
+        data: Dict[str, Any], keys: tuple[str, ...], default: Optional[str] = None
+    ) -> Optional[str]:
         for key in keys:
             value = data.get(key)
             if value is None:
@@ -157,7 +197,11 @@ class Posting:
             default="0",
         )
 
-        remaining_raw = data.get("time_remaining") or data.get("map_time_remaining") or data.get("timeRemaining")
+        remaining_raw = (
+            data.get("time_remaining")
+            or data.get("map_time_remaining")
+            or data.get("timeRemaining")
+        )
 
         map_entry = await self._lookup_map(map_identifier) if map_identifier else None
         map_label = map_entry.get("base") if map_entry else None
@@ -195,7 +239,6 @@ class Posting:
             "",
             "**Connected Server**",
             f"{status.get('server_name')} | Current Map {status.get('map_label')} (map type: {status.get('map_mode')}) | Allied: {status.get('allied')} | Axis: {status.get('axis')} | Time: {status.get('time_remaining')}",
-
             f"Updated at {updated_str}",
             "",
             "Buttons stay active across restarts.",
@@ -208,25 +251,29 @@ class Posting:
         return embed
 
     async def update_channel_row(self, guild_id: str, channel_id: str, **fields):
-        chans = await self.repository.load_channels()
-        row = next((r for r in chans if r.get("guild_id") == guild_id and r.get("channel_id") == channel_id), None)
-        if not row:
-            row = {
-                "guild_id": guild_id,
-                "channel_id": channel_id,
-                "last_vote_message_id": "0",
-                "current_vote_message_id": "0",
-                "management_message_id": "0",
-                "last_session_id": None,
-            }
-            chans.append(row)
-        row.update(fields)
-        await self.repository.save_channels(chans)
+        async with self.repository.transaction("channels") as chans:
+            row = self.repository.channels_by_key(chans).get((guild_id, channel_id))
+            if not row:
+                row = {
+                    "guild_id": guild_id,
+                    "channel_id": channel_id,
+                    "last_vote_message_id": "0",
+                    "current_vote_message_id": "0",
+                    "management_message_id": "0",
+                    "last_session_id": None,
+                }
+                chans.append(row)
+            row.update(fields)
         return row
 
     async def ensure_persistent_messages(self, bot, guild_id: str, channel_id: str):
-        chans = await self.repository.load_channels()
-        row = next((r for r in chans if r.get("guild_id") == guild_id and r.get("channel_id") == channel_id), None)
+        # Held across the Discord calls so concurrent callers can't both post and pin
+        # a fresh set of messages for the same channel.
+        async with self.repository.transaction("channels") as chans:
+            return await self._ensure_persistent_messages(bot, chans, guild_id, channel_id)
+
+    async def _ensure_persistent_messages(self, bot, chans, guild_id: str, channel_id: str):
+        row = self.repository.channels_by_key(chans).get((guild_id, channel_id))
         if not row:
             row = {
                 "guild_id": guild_id,
@@ -255,11 +302,11 @@ class Posting:
             bot,
             guild_id,
             channel_id,
-            existing_message_id=management_id if isinstance(management_id, str) else str(management_id),
+            existing_message_id=(
+                management_id if isinstance(management_id, str) else str(management_id)
+            ),
         )
         row["management_message_id"] = new_management_id
-
-        await self.repository.save_channels(chans)
         return row
 
     async def edit_current_vote_message(self, bot, channel_id, message_id, embed, view):
@@ -273,6 +320,88 @@ class Posting:
             return str(new_msg.id)
         return message_id
 
+    async def post_vote_message(self, bot, channel_id, embed, view) -> str:
+        """Post a vote message for a round running alongside the one in the current vote message."""
+        channel = bot.get_channel(int(channel_id))
+        msg = await channel.send(embed=embed, view=view)
+        return str(msg.id)
+
+    def track_live_results(self, bot, round_id: int, channel_id, message_id) -> None:
+        """Keep the vote message for ``round_id`` updated with the current standings."""
+        if not self.live_results_window:
+            return
+        channel = bot.get_channel(int(channel_id))
+        if channel is None:
+            return
+        self._live_results[round_id] = {
+            "message": channel.get_partial_message(int(message_id)),
+            "channel": str(channel_id),
+            "shown": None,
+        }
+        self._live_channels.setdefault(str(channel_id), _LiveChannel())
+
+    def schedule_live_results(self, round_id: int) -> None:
+        """
+        Called per click. Clicks are coalesced per channel: the first one in a
+        window schedules a flush that edits every round of the channel clicked
+        during it.
+        """
+        live = self._live_results.get(round_id)
+        if live is None:
+            return
+        channel = self._live_channels[live["channel"]]
+        channel.dirty.add(round_id)
+        if channel.task is None:
+            channel.task = asyncio.create_task(self._flush_live_results(live["channel"], channel))
+
+    def stop_live_results(self, round_id: int) -> None:
+        live = self._live_results.pop(round_id, None)
+        if live is not None:
+            self._live_channels[live["channel"]].dirty.discard(round_id)
+
+    async def _flush_live_results(self, channel_id: str, channel: _LiveChannel) -> None:
+        try:
+            while channel.dirty:
+                await asyncio.sleep(self.live_results_window)
+                dirty, channel.dirty = channel.dirty, set()
+                edits = 0
+                for round_id in sorted(dirty):
+                    edits += await self._edit_live_results(round_id)
+                if edits > 1:
+                    # Several rounds share the channel; pay the extra edits back before the next flush.
+                    await asyncio.sleep(self.live_results_window * (edits - 1))
+        finally:
+            channel.task = None
+
+    async def _edit_live_results(self, round_id: int) -> int:
+        """Edit the vote message of ``round_id`` if its counts changed; returns the number of edits sent."""
+        live = self._live_results.get(round_id)
+        if live is None:
+            return 0
+        try:
+            r = await self.repository.get_round(round_id)
+            if not r or not r.is_open:
+                return 0
+            counts = dict(self.repository.tally(r).counts)
+            if counts == live["shown"]:
+                return 0
+            await live["message"].edit(embed=self._live_results_embed(r, counts))
+            live["shown"] = counts
+        except Exception as exc:
+            logger.warning("Failed to update live results for round %s: %s", round_id, exc)
+        return 1
+
+    @staticmethod
+    def _live_results_embed(r: Round, counts: Dict[int, int]) -> Embed:
+        lines = [f"**{o.index}. {o.label}** — {counts.get(o.index, 0)} votes" for o in r.options]
+        title = "Vote — Next Map" if r.pool == "default" else f"Vote — Next Map ({r.pool})"
+        embed = Embed(title=title, description="\n".join(lines))
+        try:
+            embed.set_footer(text=f"Closes at {fmt_end(datetime.fromisoformat(str(r.ends_at)))}")
+        except (TypeError, ValueError):
+            pass
+        return embed
+
     async def ensure_management_message(
         self,
         bot,
@@ -289,7 +418,9 @@ class Posting:
             try:
                 channel = await bot.fetch_channel(int(channel_id))
             except Exception as exc:
-                logger.error("Unable to resolve channel %s for management message: %s", channel_id, exc)
+                logger.error(
+                    "Unable to resolve channel %s for management message: %s", channel_id, exc
+                )
                 raise
 
         embed = await self._build_management_embed()
@@ -322,15 +453,7 @@ class Posting:
     ) -> None:
         while True:
             try:
-                chans = await self.repository.load_channels()
-                row = next(
-                    (
-                        r
-                        for r in chans
-                        if r.get("guild_id") == guild_id and r.get("channel_id") == channel_id
-                    ),
-                    None,
-                )
+                row = await self.repository.get_channel_row(guild_id, channel_id)
                 existing_id = str(row.get("management_message_id", "0")) if row else "0"
                 new_id = await self.ensure_management_message(
                     bot,
@@ -339,8 +462,9 @@ class Posting:
                     existing_message_id=existing_id,
                 )
                 if row and new_id != existing_id:
-                    row["management_message_id"] = new_id
-                    await self.repository.save_channels(chans)
+                    await self.update_channel_row(
+                        guild_id, channel_id, management_message_id=new_id
+                    )
             except Exception as exc:
                 logger.warning("Failed to refresh management message: %s", exc)
             await asyncio.sleep(max(15, interval_seconds))
@@ -357,38 +481,21 @@ class Posting:
             return str(new_msg.id)
         return message_id
 
-    async def close_round_and_push(self, bot, guild_id, channel_id, round_id: int):
-        votes = await self.repository.load_votes()
-        r = next((x for x in votes if x.get("id") == round_id), None)
-        if not r or r.get("status") != "open":
-            return
-
-        ballots = r.get("ballots", {})
-        for o in r["options"]:
-            o["votes"] = 0
-        for uid, idx in ballots.items():
-            for o in r["options"]:
-                if o["index"] == idx:
-                    o["votes"] += 1
-
-        winner_map, detail = determine_winner(r, return_detail=True)
-
-        await self.rcon_client.add_map_as_next_rotation(winner_map)
-
-        cooldowns = normalize_cooldowns(await self.repository.load_cooldowns())
-        for k in list(cooldowns.keys()):
-            cooldowns[k] = max(0, int(cooldowns[k]) - 1)
-        round_cd = r.get("meta", {}).get("mapvote_cooldown", self.default_mapvote_cooldown)
-        cooldowns[base_map_code(winner_map)] = int(round_cd)
-        await self.repository.save_cooldowns(cooldowns)
-
-        r["status"] = "pushed"
-        await self.repository.save_votes(votes)
-
+    async def _apply_round_cooldown(self, winner_map: str, round_cd, round_id) -> None:
+        async with self.repository.transaction("cooldowns") as cooldowns:
+            normalized = normalize_cooldowns(cooldowns)
+            for k in list(normalized.keys()):
+                normalized[k] = max(0, int(normalized[k]) - 1)
+            normalized[base_map_code(winner_map)] = int(round_cd)
+            cooldowns.clear()
+            cooldowns.update(normalized)
+        await record_play(self.repository, winner_map, round_id)
+
+    async def _publish_summary(self, bot, guild_id, channel_id, r, detail, pushed: bool) -> None:
         e = discord.Embed(title="Last Vote — Summary")
         lines = []
-        for opt in r["options"]:
-            lines.append(f"• **{opt['label']}** — {opt['votes']} votes")
+        for opt in r.options:
+            lines.append(f"• **{opt.label}** — {opt.votes} votes")
         if detail["reason"] == "no_votes":
             lines.append(f"\n_No votes cast. Randomly selected **{detail['chosen_label']}**._")
         elif detail["reason"] == "below_threshold":
@@ -398,12 +505,106 @@ class Posting:
                 f"\n_Only {total} votes cast (need {required}). Randomly selected **{detail['chosen_label']}**._"
             )
         elif detail["reason"] == "tie":
-            lines.append(f"\n_Tie detected. Randomly selected **{detail['chosen_label']}** among: {', '.join(detail['tied_labels'])}._")
+            lines.append(
+                f"\n_Tie detected. Randomly selected **{detail['chosen_label']}** among: {', '.join(detail['tied_labels'])}._"
+            )
         else:
             lines.append(f"\n_Winner by votes: **{detail['chosen_label']}**._")
+        eliminated = [
+            step["eliminated"] for step in detail.get("rounds", []) if step.get("eliminated")
+        ]
+        if eliminated:
+            lines.append(f"_Eliminated in order: {', '.join(eliminated)}._")
+        if not pushed:
+            lines.append(
+                f"\n**{detail['chosen_label']} could not be queued on the server; an admin needs to set it by hand.**"
+            )
         e.description = "\n".join(lines)
 
         refs = await self.ensure_persistent_messages(bot, guild_id, channel_id)
-        new_last = await self.edit_last_vote_summary(bot, channel_id, refs["last_vote_message_id"], e)
+        new_last = await self.edit_last_vote_summary(
+            bot, channel_id, refs["last_vote_message_id"], e
+        )
         if new_last != refs["last_vote_message_id"]:
             await self.update_channel_row(guild_id, channel_id, last_vote_message_id=new_last)
+
+    @staticmethod
+    async def _timed_step(name: str, step) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await step
+        except Exception as exc:
+            logger.warning("Close step %s failed: %s", name, exc)
+            return {
+                "ok": False,
+                "error": str(exc),
+                "ms": round((time.perf_counter() - started) * 1000, 1),
+            }
+        return {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+    async def close_round_and_push(self, bot, guild_id, channel_id, round_id: int):
+        """
+        Close an open round and return the outcome of each close step.
+
+        The winner is decided and the round saved as ``closing`` under the
+        votes lock, so a click that lands mid-close either makes it into the
+        tally or sees the vote as closed. The lock is then released before any
+        I/O: the CRCON push and the cooldown update run concurrently, so the
+        map is queued after a single CRCON round-trip, and the summary goes
+        out once the push result is known, so it never announces a map that
+        did not make it onto the server. A failing step does not stop the
+        others. The per-step results are stored on the round under
+        ``close_steps`` and its status becomes ``pushed``, or ``push_failed``
+        if the map could not be queued.
+
+        A round left ``closing`` by a restart is closed again from its ballots.
+        """
+        async with self.repository.transaction("votes") as votes:
+            r = self.repository.rounds_by_id(votes).get(round_id)
+            resumable = r is not None and r.status == CLOSING and round_id not in self._closing
+            if not r or not (r.is_open or resumable):
+                return None
+
+            tally = self.repository.tally(r)
+            tally.apply(r.options)
+            winner_map, detail = determine_winner(r, return_detail=True, tally=tally)
+            round_cd = (
+                r.mapvote_cooldown
+                if r.mapvote_cooldown is not None
+                else self.default_mapvote_cooldown
+            )
+            r.status = CLOSING
+            self._closing.add(round_id)
+        if self.registry is not None:
+            self.registry.unregister(round_id)
+        self.stop_live_results(round_id)
+
+        try:
+            cooldowns = asyncio.ensure_future(
+                self._timed_step(
+                    "cooldowns", self._apply_round_cooldown(winner_map, round_cd, r.id)
+                )
+            )
+            results = {
+                "push": await self._timed_step(
+                    "push", self.rcon_client.add_map_as_next_rotation(winner_map)
+                )
+            }
+            results["summary"] = await self._timed_step(
+                "summary",
+                self._publish_summary(
+                    bot, guild_id, channel_id, r, detail, pushed=results["push"]["ok"]
+                ),
+            )
+            results["cooldowns"] = await cooldowns
+
+            async with self.repository.transaction("votes") as votes:
+                # The collection may have been reloaded while the steps ran; update the copy that gets saved.
+                closed = self.repository.rounds_by_id(votes).get(round_id)
+                if closed is not None:
+                    closed.status = "pushed" if results["push"]["ok"] else "push_failed"
+                    closed.close_steps = results
+        finally:
+            self._closing.discard(round_id)
+        self.repository.forget_tally(round_id)
+        return results
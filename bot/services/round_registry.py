@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional
+
+from bot.models import Round
+from bot.persistence.repository import Repository
+
+ROUND_ID_COUNTER = "round_id"
+
+
+class RoundRegistry:
+    """
+    Open rounds by id and by channel, and the allocator for round ids.
+
+    Ids come from the persisted ``round_id`` counter, so they keep increasing
+    across restarts and never collide with a round already in ``votes.json``
+    or the archive. A store without the counter is seeded from the highest
+    round id it holds.
+
+    Entries are the round records as they were registered; they answer
+    routing questions (which channel, which voting method) without loading
+    votes. A round leaves the registry when ``Posting.close_round_and_push``
+    closes it, but the registered object may be stale, so whether a round is
+    still open, its ballots and its counts are always read through the
+    repository.
+    """
+
+    def __init__(self, repository: Repository):
+        self.repository = repository
+        self._by_id: Dict[int, Round] = {}
+        self._by_channel: Dict[str, Dict[int, Round]] = {}
+
+    async def allocate_id(self) -> int:
+        async with self.repository.transaction("counters") as counters:
+            last = counters.get(ROUND_ID_COUNTER)
+            if last is None:
+                last = await self._highest_known_id()
+            counters[ROUND_ID_COUNTER] = int(last) + 1
+            return counters[ROUND_ID_COUNTER]
+
+    async def _highest_known_id(self) -> int:
+        rounds: List[Round] = list(await self.repository.load_votes())
+        load_archive = getattr(self.repository, "load_archive", None)
+        if load_archive is not None:
+            rounds.extend(await load_archive())
+        ids = [int(r.id) for r in rounds if str(r.id).isdigit()]
+        ids.extend(self._by_id)
+        return max(ids, default=0)
+
+    def register(self, round_rec: Round) -> None:
+        round_id = int(round_rec.id)
+        self.unregister(round_id)
+        self._by_id[round_id] = round_rec
+        self._by_channel.setdefault(str(round_rec.channel_id), {})[round_id] = round_rec
+
+    def unregister(self, round_id: int) -> Optional[Round]:
+        round_rec = self._by_id.pop(round_id, None)
+        if round_rec is not None:
+            channel_key = str(round_rec.channel_id)
+            in_channel = self._by_channel.get(channel_key, {})
+            in_channel.pop(round_id, None)
+            if not in_channel:
+                self._by_channel.pop(channel_key, None)
+        return round_rec
+
+    def get(self, round_id: int) -> Optional[Round]:
+        return self._by_id.get(round_id)
+
+    def in_channel(self, channel_id) -> List[Round]:
+        """Open rounds in ``channel_id``, oldest first."""
+        return list(self._by_channel.get(str(channel_id), {}).values())
+
+    def __contains__(self, round_id: int) -> bool:
+        return round_id in self._by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    async def rehydrate(self) -> int:
+        """Register every open round in storage; returns how many are tracked."""
+        for round_rec in await self.repository.load_votes():
+            if round_rec.is_open and str(round_rec.id).isdigit():
+                self.register(round_rec)
+        return len(self._by_id)
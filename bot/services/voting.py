@@ -1,44 +1,247 @@
-
 import random
+from array import array
+from collections import Counter
+
+PLURALITY = "plurality"
+INSTANT_RUNOFF = "irv"
+APPROVAL = "approval"
+METHODS = (PLURALITY, INSTANT_RUNOFF, APPROVAL)
+
+
+def ballot_choices(value):
+    """Option indexes of a stored ballot: an int (plurality) or a list (ranking / approvals)."""
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple)):
+        return tuple(int(v) for v in value)
+    return (int(value),)
+
+
+def normalize_ballot(value):
+    if isinstance(value, (list, tuple)):
+        return [int(v) for v in value]
+    return int(value)
+
+
+class Tally:
+    """
+    Live per-option counts for one round, kept in step with its ``ballots``.
+
+    Built once from the persisted ballots; after that ``vote`` adjusts the
+    counters in O(1), so current standings never need a rescan. What a count
+    means depends on the round's voting method: votes for plurality,
+    approvals for approval voting and first preferences for instant-runoff.
+    For the last two a click toggles the option in the user's ballot
+    (appending it to the end of a ranking).
+
+    Under instant-runoff the tally also keeps every non-empty ranking in the
+    compact form ``instant_runoff`` counts (``bytes`` of option positions),
+    updated per click, so closing a round does not convert every ballot on
+    the event loop.
+    """
+
+    def __init__(self, round_data):
+        self.method = round_data.voting_method
+        self.ballots = round_data.ballots
+        self.counts = {o.index: 0 for o in round_data.options}
+        self.rankings = {}
+        if self.method == PLURALITY and all(type(v) is int for v in self.ballots.values()):
+            for index, n in Counter(self.ballots.values()).items():
+                self.counts[index] = self.counts.get(index, 0) + n
+            return
+        if self.method == INSTANT_RUNOFF:
+            self._positions = {o.index: pos for pos, o in enumerate(round_data.options)}
+        for user_id, value in self.ballots.items():
+            self._count(value, 1)
+            self._rank(user_id, value)
+
+    @property
+    def total(self):
+        return sum(1 for value in self.ballots.values() if ballot_choices(value))
+
+    def _count(self, value, delta):
+        choices = ballot_choices(value)
+        for index in choices if self.method == APPROVAL else choices[:1]:
+            self.counts[index] = self.counts.get(index, 0) + delta
+
+    def _rank(self, user_id, value):
+        if self.method != INSTANT_RUNOFF:
+            return
+        ranking = bytes(self._positions[i] for i in ballot_choices(value) if i in self._positions)
+        if ranking:
+            self.rankings[user_id] = ranking
+        else:
+            self.rankings.pop(user_id, None)
+
+    def vote(self, user_id, index):
+        """Apply a click by ``user_id``; returns False if it left the ballot unchanged."""
+        previous = self.ballots.get(user_id)
+        if self.method == PLURALITY:
+            if previous == index:
+                return False
+            value = index
+        else:
+            value = list(ballot_choices(previous))
+            if index in value:
+                value.remove(index)
+            else:
+                value.append(index)
+        self._count(previous, -1)
+        self.ballots[user_id] = value
+        self._count(value, 1)
+        self._rank(user_id, value)
+        return True
+
+    def apply(self, options):
+        for o in options:
+            o.votes = self.counts.get(o.index, 0)
+
+
+def instant_runoff(candidates, rankings, choice=None):
+    """
+    Instant-runoff count over ``rankings``, each a ``bytes`` of candidate positions in preference order.
+
+    Counts live in flat lists indexed by candidate, and each candidate keeps the
+    ballots currently counting for it, so an elimination only re-examines the
+    ballots of the eliminated candidate. Returns ``(winner, rounds, reason)``,
+    where ``rounds`` lists the counts of every round and who was eliminated.
+    """
+    choice = choice or random.choice
+    counts = [0] * candidates
+    piles = [[] for _ in range(candidates)]
+    cursor = array("B", bytes(len(rankings)))
+    for b, ranking in enumerate(rankings):
+        if ranking:
+            counts[ranking[0]] += 1
+            piles[ranking[0]].append(b)
+    active = [True] * candidates
+    rounds = []
+    while True:
+        live = [c for c in range(candidates) if active[c]]
+        total = sum(counts[c] for c in live)
+        best = max(counts[c] for c in live)
+        current = {"counts": {c: counts[c] for c in live}, "eliminated": None}
+        rounds.append(current)
+        if total and best * 2 > total:
+            return next(c for c in live if counts[c] == best), rounds, "majority"
+        low = min(counts[c] for c in live)
+        lowest = [c for c in live if counts[c] == low]
+        if len(lowest) == len(live):
+            return choice(live), rounds, "tie" if total else "no_votes"
+        loser = lowest[0] if len(lowest) == 1 else choice(lowest)
+        current["eliminated"] = loser
+        active[loser] = False
+        for b in piles[loser]:
+            ranking = rankings[b]
+            k = cursor[b] + 1
+            while k < len(ranking) and not active[ranking[k]]:
+                k += 1
+            cursor[b] = k
+            if k < len(ranking):
+                counts[ranking[k]] += 1
+                piles[ranking[k]].append(b)
+        piles[loser] = []
+        counts[loser] = 0
+
+
+def _random_pick(opts, detail, return_detail):
+    pick = random.choice(opts)
+    detail["chosen_label"] = pick.label
+    return (pick.map, detail) if return_detail else pick.map
+
+
+def _determine_irv(round_data, return_detail, tally=None):
+    opts = round_data.options
+    if tally is not None:
+        rankings = list(tally.rankings.values())
+    else:
+        positions = {o.index: pos for pos, o in enumerate(opts)}
+        rankings = [
+            bytes(positions[i] for i in ballot_choices(value) if i in positions)
+            for value in round_data.ballots.values()
+        ]
+        rankings = [r for r in rankings if r]
+    total = len(rankings)
+    minimum_votes = round_data.minimum_votes
+
+    if total == 0:
+        return _random_pick(opts, {"reason": "no_votes", "method": INSTANT_RUNOFF}, return_detail)
+    if minimum_votes and total < minimum_votes:
+        detail = {
+            "reason": "below_threshold",
+            "method": INSTANT_RUNOFF,
+            "required": minimum_votes,
+            "total": total,
+        }
+        return _random_pick(opts, detail, return_detail)
+
+    winner, rounds, reason = instant_runoff(len(opts), rankings)
+    pick = opts[winner]
+    detail = {
+        "reason": reason,
+        "method": INSTANT_RUNOFF,
+        "chosen_label": pick.label,
+        "rounds": [
+            {
+                "counts": {opts[c].label: n for c, n in r["counts"].items()},
+                "eliminated": opts[r["eliminated"]].label if r["eliminated"] is not None else None,
+            }
+            for r in rounds
+        ],
+    }
+    if reason == "tie":
+        detail["tied_labels"] = [opts[c].label for c in rounds[-1]["counts"]]
+    return (pick.map, detail) if return_detail else pick.map
+
 
+def determine_winner(round_data, return_detail=False, tally=None):
+    """
+    Pick the winning map of a round. Pass the round's live ``tally`` to count
+    instant-runoff from the rankings it already holds in compact form.
+    """
+    method = round_data.voting_method
+    if method == INSTANT_RUNOFF:
+        return _determine_irv(round_data, return_detail, tally)
 
-def determine_winner(round_data, return_detail=False):
-    opts = round_data["options"]
-    total = sum(o["votes"] for o in opts)
+    # "votes" holds plurality votes or approvals, as filled in by Tally.apply.
+    opts = round_data.options
+    total = sum(o.votes for o in opts)
+    if method == APPROVAL and round_data.ballots:
+        # The threshold counts voters, not approvals.
+        total = (
+            sum(1 for value in round_data.ballots.values() if ballot_choices(value)) if total else 0
+        )
 
-    meta = round_data.get("meta") or {}
-    try:
-        minimum_votes = int(meta.get("minimum_votes", 0) or 0)
-    except (TypeError, ValueError):
-        minimum_votes = 0
-    minimum_votes = max(0, minimum_votes)
+    minimum_votes = round_data.minimum_votes
 
     if total == 0:
         pick = random.choice(opts)
-        detail = {"reason": "no_votes", "chosen_label": pick["label"]}
-        return (pick["map"], detail) if return_detail else pick["map"]
+        detail = {"reason": "no_votes", "chosen_label": pick.label, "method": method}
+        return (pick.map, detail) if return_detail else pick.map
 
     if minimum_votes and total < minimum_votes:
         pick = random.choice(opts)
         detail = {
             "reason": "below_threshold",
-            "chosen_label": pick["label"],
+            "chosen_label": pick.label,
             "required": minimum_votes,
             "total": total,
+            "method": method,
         }
-        return (pick["map"], detail) if return_detail else pick["map"]
+        return (pick.map, detail) if return_detail else pick.map
 
-    maxv = max(o["votes"] for o in opts)
-    top = [o for o in opts if o["votes"] == maxv]
+    maxv = max(o.votes for o in opts)
+    top = [o for o in opts if o.votes == maxv]
     if len(top) > 1:
         pick = random.choice(top)
         detail = {
             "reason": "tie",
-            "chosen_label": pick["label"],
-            "tied_labels": [o["label"] for o in top],
+            "chosen_label": pick.label,
+            "tied_labels": [o.label for o in top],
+            "method": method,
         }
-        return (pick["map"], detail) if return_detail else pick["map"]
+        return (pick.map, detail) if return_detail else pick.map
 
-    pick = next(o for o in opts if o["votes"] == maxv)
-    detail = {"reason": "highest", "chosen_label": pick["label"]}
-    return (pick["map"], detail) if return_detail else pick["map"]
+    pick = next(o for o in opts if o.votes == maxv)
+    detail = {"reason": "highest", "chosen_label": pick.label, "method": method}
+    return (pick.map, detail) if return_detail else pick.map
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Measure how long the event loop is blocked.
+
+    A background task sleeps for ``interval`` seconds at a time; any extra time
+    before it is resumed is time the loop spent running something else without
+    yielding. Stalls longer than ``warn_after`` seconds are logged.
+    """
+
+    def __init__(self, interval: float = 0.05, warn_after: float = 0.25):
+        self.interval = interval
+        self.warn_after = warn_after
+        self.reset()
+
+    def reset(self) -> None:
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+
+    def record(self, lag: float) -> None:
+        lag = max(0.0, lag)
+        self.samples += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.warn_after:
+            self.stalls += 1
+            logger.warning("Event loop blocked for %.0f ms", lag * 1000)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "samples": self.samples,
+            "total_lag_ms": round(self.total_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "mean_lag_ms": round(self.total_lag * 1000 / self.samples, 3) if self.samples else 0.0,
+            "stalls": self.stalls,
+        }
+
+    async def run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(time.perf_counter() - started - self.interval)
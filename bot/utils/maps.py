@@ -1,35 +1,163 @@
 from __future__ import annotations
 
+import sys
+from enum import Enum
+from typing import Dict, NamedTuple, Optional
 
 VARIANT_GAME_SUFFIXES = {
     "WARFARE",
     "OFFENSIVE",
     "OFFENSIVEUS",
     "OFFENSIVEGER",
+    "OFFENSIVEBRITISH",
+    "OFF",
+    "SKIRMISH",
 }
 
 VARIANT_TIME_SUFFIXES = {
     "DAY",
     "DAWN",
+    "DUSK",
+    "MORNING",
     "NIGHT",
+    "OVERCAST",
+    "RAIN",
 }
 
-_VARIANT_SUFFIXES = VARIANT_GAME_SUFFIXES | VARIANT_TIME_SUFFIXES
+# Attacking faction of offensive layers (e.g. foy_offensive_us, elalamein_offensive_CW).
+VARIANT_FACTION_SUFFIXES = {
+    "US",
+    "GER",
+    "RUS",
+    "GB",
+    "CW",
+    "BRITISH",
+}
+
+_VARIANT_SUFFIXES = VARIANT_GAME_SUFFIXES | VARIANT_TIME_SUFFIXES | VARIANT_FACTION_SUFFIXES
+
+# Short layer codes (CAR_S_1944_Day_P_Skirmish, PHL_L_1944_Warfare) name the map
+# by abbreviation; these are the long-form names the other layers use.
+SHORT_MAP_NAMES = {
+    "CAR": "carentan",
+    "DRL": "driel",
+    "ELA": "elalamein",
+    "HIL": "hill400",
+    "PHL": "purpleheartlane",
+    "SMDM": "stmariedumont",
+    "SME": "stmereeglise",
+}
+
+
+class GameMode(str, Enum):
+    WARFARE = "warfare"
+    OFFENSIVE = "offensive"
+    SKIRMISH = "skirmish"
+
+
+class TimeOfDay(str, Enum):
+    DAY = "day"
+    DAWN = "dawn"
+    DUSK = "dusk"
+    MORNING = "morning"
+    NIGHT = "night"
+    OVERCAST = "overcast"
+    RAIN = "rain"
+
+
+_TIMES = {suffix: TimeOfDay(suffix.lower()) for suffix in VARIANT_TIME_SUFFIXES}
+
+
+class MapCode(NamedTuple):
+    code: str
+    base: str
+    mode: Optional[GameMode]
+    time: Optional[TimeOfDay]
+
+
+# Parsed codes by code. maps.json and cooldowns.json hold a few hundred distinct
+# codes at most; the cap only guards against unbounded junk input.
+_REGISTRY: Dict[str, MapCode] = {}
+_REGISTRY_MAX = 4096
+
+
+def _game_mode(segment: str) -> Optional[GameMode]:
+    if segment == "WARFARE":
+        return GameMode.WARFARE
+    if segment == "OFF" or segment.startswith("OFFENSIVE"):
+        return GameMode.OFFENSIVE
+    if segment == "SKIRMISH":
+        return GameMode.SKIRMISH
+    return None
+
+
+def _is_variant(segment: str) -> bool:
+    # Version tags such as hurtgenforest_warfare_V2 count as variant segments too.
+    return (
+        segment in _VARIANT_SUFFIXES
+        or segment.startswith("OFFENSIVE")
+        or (segment[:1] == "V" and segment[1:].isdigit())
+    )
+
+
+def _parse(map_code: str) -> MapCode:
+    # Some CRCON map lists mark layers with trailing asterisks (hill400_offensive_US**).
+    parts = map_code.rstrip("*").split("_")
+    upper = [part.upper() for part in parts]
+    mode = time = None
+    for segment in reversed(upper):
+        mode = mode or _game_mode(segment)
+        time = time or _TIMES.get(segment)
+
+    if len(parts) >= 3 and upper[1] in ("S", "L") and parts[2].isdigit():
+        # Short form: <abbreviation>_<S|L>_<year>_..., S being skirmish.
+        base = SHORT_MAP_NAMES.get(upper[0], parts[0])
+        if upper[1] == "S":
+            mode = GameMode.SKIRMISH
+    else:
+        while parts and _is_variant(upper[len(parts) - 1]):
+            parts.pop()
+        # In case every segment gets stripped we fall back to the original code.
+        base = "_".join(parts) if parts else map_code
+    return MapCode(sys.intern(map_code), sys.intern(base), mode, time)
+
+
+def parse_map_code(map_code: str) -> MapCode:
+    """
+    Split a map code into its base map, game mode and time of day.
+
+    Results are cached per code and their strings interned, so repeated
+    lookups for the same code are a dict hit and share one string object.
+    """
+    parsed = _REGISTRY.get(map_code)
+    if parsed is None:
+        parsed = _parse(map_code)
+        if len(_REGISTRY) >= _REGISTRY_MAX:
+            _REGISTRY.clear()
+        _REGISTRY[parsed.code] = parsed
+    return parsed
 
 
 def base_map_code(map_code: str) -> str:
     """
     Collapse a map code down to its base map identifier.
 
-    HLL encodes game mode (e.g., Warfare, Offensive) and time-of-day (e.g., Day,
-    Dawn, Night) as suffix segments separated by underscores. We strip those
-    suffixes so that all variants share a common cooldown bucket.
+    HLL encodes game mode (e.g., Warfare, Offensive), attacking faction and
+    time-of-day (e.g., Day, Dusk, Night) as suffix segments separated by
+    underscores. We strip those suffixes (and map the abbreviations of short
+    layer codes to the long names) so that all variants share a common
+    cooldown bucket.
+    """
+    parsed = _REGISTRY.get(map_code) or parse_map_code(map_code)
+    return parsed.base
+
+
+def map_mode(map_code: str) -> GameMode | None:
+    """
+    Game mode of a map code, from its game-mode segment, or ``None`` if the
+    code has none.
     """
-    parts = map_code.split("_")
-    while parts and parts[-1].upper() in _VARIANT_SUFFIXES:
-        parts.pop()
-    # In case every segment gets stripped we fall back to the original code.
-    return "_".join(parts) if parts else map_code
+    return parse_map_code(map_code).mode
 
 
 def normalize_cooldowns(raw: dict[str, int | str] | None) -> dict[str, int]:
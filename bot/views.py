@@ -1,34 +1,137 @@
+import re
+import time
+from typing import TYPE_CHECKING, Any, cast
 
 import discord
-from discord.ui import View, Button
+from discord.ui import Button, View
+
+from bot.models import Option
 from bot.persistence.repository import Repository
+from bot.services.click_guard import ClickGuard
+from bot.services.voting import PLURALITY
+
+if TYPE_CHECKING:
+    from bot.discord_bot import MapVoteBot
+
 
+class VoteButton(
+    discord.ui.DynamicItem[Button], template=r"vote:(?P<round_id>[0-9]+):(?P<index>[0-9]+)"
+):
+    """
+    Vote button whose round and option live in its ``custom_id``.
 
-class VoteButton(Button):
-    def __init__(self, repository: Repository, round_id: int, index: int, label: str):
-        super().__init__(style=discord.ButtonStyle.primary, label=f"{index}. {label}", custom_id=f"vote:{round_id}:{index}")
+    The class is registered once with ``bot.add_dynamic_items``; discord.py
+    rebuilds a button from the ``custom_id`` of each click, so nothing is kept
+    in memory per open round and buttons on messages posted before a restart
+    keep working.
+
+    With a ``ballots`` queue, a click is acknowledged as soon as the round is
+    known to be open and the ballot is applied and persisted in the background.
+    With a ``guard``, repeated clicks on the current choice and clicks beyond
+    the user's rate limit are answered without touching the repository.
+    With a ``registry``, a queued click on a round the registry no longer
+    tracks is turned away without loading the votes.
+    """
+
+    def __init__(
+        self,
+        repository: Repository,
+        round_id: int,
+        index: int,
+        label: str = "",
+        on_vote=None,
+        ballots=None,
+        guard: ClickGuard | None = None,
+        registry=None,
+    ):
+        super().__init__(
+            Button(
+                style=discord.ButtonStyle.primary,
+                label=f"{index}. {label}",
+                custom_id=f"vote:{round_id}:{index}",
+            )
+        )
         self.repository = repository
         self.round_id = round_id
         self.index = index
+        self.on_vote = on_vote
+        self.ballots = ballots
+        self.guard = guard
+        self.registry = registry
+
+    @classmethod
+    async def from_custom_id(
+        cls, interaction: discord.Interaction, item: discord.ui.Item[Any], match: re.Match[str]
+    ) -> "VoteButton":
+        # Only MapVoteBot registers this item, so the client carries its services.
+        bot = cast("MapVoteBot", interaction.client)
+        return cls(
+            bot.repository,
+            int(match["round_id"]),
+            int(match["index"]),
+            on_vote=bot.posting.schedule_live_results,
+            ballots=bot.ballot_queue,
+            guard=bot.click_guard,
+            registry=bot.round_registry,
+        )
 
     async def callback(self, interaction: discord.Interaction):
-        votes = await self.repository.load_votes()
-        r = next((x for x in votes if x.get("id") == self.round_id), None)
-        if not r or r.get("status") != "open":
+        user_id = str(interaction.user.id)
+        if self.guard is not None:
+            verdict = self.guard.check(self.round_id, user_id, self.index)
+            if verdict == ClickGuard.DUPLICATE:
+                await interaction.response.defer()
+                return
+            if verdict == ClickGuard.LIMITED:
+                await interaction.response.send_message(
+                    "You're voting too quickly, try again in a moment.", ephemeral=True
+                )
+                return
+        if self.ballots is not None:
+            started = time.perf_counter()
+            # The registry turns away clicks on rounds it no longer tracks; whether a round is
+            # still open is always read from the stored round, never from the registry's copy.
+            if self.registry is not None and self.round_id not in self.registry:
+                r = None
+            else:
+                r = await self.repository.get_round(self.round_id)
+            if not r or not r.is_open:
+                await interaction.response.send_message("This vote is closed.", ephemeral=True)
+                return
+            await interaction.response.defer()
+            self.ballots.record_ack(time.perf_counter() - started)
+            self.ballots.submit(self.round_id, user_id, self.index)
+            self._remember(r, user_id)
+            return
+        async with self.repository.transaction("votes", autosave=False) as votes:
+            r = self.repository.rounds_by_id(votes).get(self.round_id)
+            is_open = r is not None and r.is_open
+            if r is not None and is_open and self.repository.tally(r).vote(user_id, self.index):
+                await self.repository.save_ballot(votes, self.round_id, user_id, r.ballots[user_id])
+                if self.on_vote is not None:
+                    self.on_vote(self.round_id)
+        if not is_open:
             await interaction.response.send_message("This vote is closed.", ephemeral=True)
             return
-        user_id = str(interaction.user.id)
-        r.setdefault("ballots", {})
-        r["ballots"][user_id] = self.index
-        await self.repository.save_votes(votes)
+        self._remember(r, user_id)
         await interaction.response.defer()
 
+    def _remember(self, r, user_id: str) -> None:
+        # Under ranked and approval voting a repeat click toggles the option, so it is no duplicate.
+        if self.guard is not None and r.voting_method == PLURALITY:
+            self.guard.remember(self.round_id, user_id, self.index)
+
 
 class VoteView(View):
-    def __init__(self, repository: Repository, round_id: int, options: list[dict]):
+    """Only used to attach the buttons to a message.
+
+    Clicks are dispatched through ``VoteButton``.
+    """
+
+    def __init__(self, repository: Repository, round_id: int, options: list[Option], on_vote=None):
         super().__init__(timeout=None)
         for opt in options:
-            self.add_item(VoteButton(repository, round_id, opt["index"], opt["label"]))
+            self.add_item(VoteButton(repository, round_id, opt.index, opt.label, on_vote=on_vote))
 
 
 class ManagementControlView(View):
@@ -40,7 +143,9 @@ class ManagementControlView(View):
         style=discord.ButtonStyle.secondary,
         custom_id="management:see_schedule",
     )
-    async def see_current_schedule(self, interaction: discord.Interaction, button: discord.ui.Button):
+    async def see_current_schedule(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
         await interaction.response.send_message("Schedule view is coming soon.", ephemeral=True)
 
     @discord.ui.button(
@@ -48,7 +153,9 @@ class ManagementControlView(View):
         style=discord.ButtonStyle.secondary,
         custom_id="management:create_schedule",
     )
-    async def create_new_schedule(self, interaction: discord.Interaction, button: discord.ui.Button):
+    async def create_new_schedule(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
         await interaction.response.send_message("Schedule creation is coming soon.", ephemeral=True)
 
     @discord.ui.button(
@@ -1,20 +1,23 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+from types import SimpleNamespace
+
 import pytest
 
+from bot.models import Option, Round
+from bot.persistence.base import RepositoryBase
+from bot.services.ballots import BallotQueue
+from bot.services.click_guard import ClickGuard
+from bot.services.round_registry import RoundRegistry
 from bot.views import VoteButton
-from tests.helpers.stub_discord import StubInteraction
+from tests.helpers.stub_discord import StubInteraction, StubUser
 
 
-class Repo:
+class Repo(RepositoryBase):
     def __init__(self, status: str = "open") -> None:
-        self.votes = [
-            {
-                "id": 7,
-                "status": status,
-                "ballots": {},
-            }
-        ]
+        self.votes = [Round(id=7, status=status)]
         self.saved = None
 
     async def load_votes(self):
@@ -23,6 +26,9 @@ class Repo:
     async def save_votes(self, payload):
         self.saved = payload
 
+    async def save_ballot(self, payload, round_id, user_id, index):
+        await self.save_votes(payload)
+
 
 @pytest.mark.discord_stub
 @pytest.mark.asyncio
@@ -33,7 +39,7 @@ async def test_vote_button_records_ballot_and_defers_response():
 
     await button.callback(interaction)
 
-    assert repo.votes[0]["ballots"][str(interaction.user.id)] == 2
+    assert repo.votes[0].ballots[str(interaction.user.id)] == 2
     assert interaction.response.deferred is True
 
 
@@ -48,3 +54,138 @@ async def test_vote_button_handles_closed_round():
 
     assert interaction.responses[0]["content"] == "This vote is closed."
     assert interaction.responses[0]["ephemeral"] is True
+
+
+class CopyingRepo(RepositoryBase):
+    """Returns a fresh copy per load and yields mid-flight, like a real backend would."""
+
+    def __init__(self) -> None:
+        self.stored = [Round(id=7)]
+
+    async def load_votes(self):
+        await asyncio.sleep(0)
+        return copy.deepcopy(self.stored)
+
+    async def save_votes(self, payload):
+        await asyncio.sleep(0)
+        self.stored = copy.deepcopy(payload)
+
+    async def save_ballot(self, payload, round_id, user_id, index):
+        await self.save_votes(payload)
+
+
+@pytest.mark.discord_stub
+@pytest.mark.asyncio
+async def test_concurrent_clicks_do_not_lose_ballots():
+    repo = CopyingRepo()
+    clicks = [
+        VoteButton(repo, round_id=7, index=1 + n % 3, label="Map").callback(
+            StubInteraction(user=StubUser(id=n))
+        )
+        for n in range(10)
+    ]
+
+    await asyncio.gather(*clicks)
+
+    assert len(repo.stored[0].ballots) == 10
+
+
+@pytest.mark.discord_stub
+@pytest.mark.asyncio
+async def test_vote_button_keeps_live_tally_in_step():
+    repo = Repo(status="open")
+    repo.votes[0].options = [Option(1, "FOY", "Foy"), Option(2, "UTAH", "Utah")]
+    interaction = StubInteraction()
+
+    await VoteButton(repo, round_id=7, index=1, label="Foy").callback(interaction)
+    await VoteButton(repo, round_id=7, index=2, label="Utah").callback(
+        StubInteraction(user=StubUser(id=99))
+    )
+    await VoteButton(repo, round_id=7, index=2, label="Utah").callback(interaction)
+
+    assert repo.tally(repo.votes[0]).counts == {1: 0, 2: 2}
+
+
+@pytest.mark.discord_stub
+@pytest.mark.asyncio
+async def test_vote_button_is_rebuilt_from_custom_id_after_restart():
+    repo = Repo(status="open")
+    notified = []
+    interaction = StubInteraction()
+    interaction.client = SimpleNamespace(
+        repository=repo,
+        posting=SimpleNamespace(schedule_live_results=notified.append),
+        ballot_queue=None,
+        click_guard=None,
+        round_registry=None,
+    )
+    custom_id = VoteButton(repo, round_id=7, index=3, label="Kursk").custom_id
+    match = VoteButton.__discord_ui_compiled_template__.fullmatch(custom_id)
+
+    button = await VoteButton.from_custom_id(interaction, None, match)
+    await button.callback(interaction)
+
+    assert (button.round_id, button.index) == (7, 3)
+    assert repo.votes[0].ballots[str(interaction.user.id)] == 3
+    assert notified == [7]
+
+
+@pytest.mark.discord_stub
+@pytest.mark.asyncio
+async def test_vote_button_acks_before_the_ballot_is_persisted():
+    repo = Repo(status="open")
+    queue = BallotQueue(repo)
+    interaction = StubInteraction()
+
+    await VoteButton(repo, round_id=7, index=2, label="Utah", ballots=queue).callback(interaction)
+
+    assert interaction.response.deferred is True
+    assert repo.saved is None
+    assert queue.depth == 1 and queue.snapshot()["ack_max_ms"] >= 0
+
+    await queue.close()
+    assert repo.votes[0].ballots[str(interaction.user.id)] == 2
+
+
+@pytest.mark.discord_stub
+@pytest.mark.asyncio
+async def test_queued_click_reads_round_status_from_the_repository():
+    repo = Repo(status="open")
+    registry = RoundRegistry(repo)
+    await registry.rehydrate()
+    queue = BallotQueue(repo)
+    # The round closed through a reloaded collection; the registry still holds the old object.
+    repo.votes = [Round(id=7, status="pushed")]
+    interaction = StubInteraction()
+
+    await VoteButton(
+        repo, round_id=7, index=2, label="Utah", ballots=queue, registry=registry
+    ).callback(interaction)
+
+    assert interaction.responses[0]["content"] == "This vote is closed."
+    assert queue.depth == 0
+    await queue.close()
+
+
+@pytest.mark.discord_stub
+@pytest.mark.asyncio
+async def test_click_storm_only_reaches_storage_for_changed_ballots():
+    repo = Repo(status="open")
+    saves = []
+
+    async def counting_save(payload, round_id, user_id, index):
+        saves.append(index)
+
+    repo.save_ballot = counting_save
+    guard = ClickGuard(rate=0.0, burst=2)
+    responses = []
+    for index in (1, 1, 1, 1, 2, 2, 3):
+        interaction = StubInteraction()
+        await VoteButton(repo, round_id=7, index=index, label="x", guard=guard).callback(
+            interaction
+        )
+        responses.append(interaction.response.deferred)
+
+    assert saves == [1, 2]
+    assert responses == [True, True, True, True, True, True, False]
+    assert interaction.responses[0]["ephemeral"] is True
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+from typing import List
+
+import pytest
+
+from bot.models import Option, Round
+from bot.persistence.base import RepositoryBase
+from bot.services.ballots import BallotQueue
+
+
+class StubRepository(RepositoryBase):
+    def __init__(self):
+        self.votes = [
+            Round(id=1, options=[Option(1, "FOY", "Foy"), Option(2, "UTAH", "Utah")]),
+            Round(id=2, status="pushed", options=[Option(1, "FOY", "Foy")]),
+        ]
+        self.saves: List[list] = []
+
+    async def load_votes(self):
+        return self.votes
+
+    async def save_ballots(self, votes, ballots):
+        await asyncio.sleep(0)
+        self.saves.append(list(ballots))
+
+
+@pytest.mark.asyncio
+async def test_queued_ballots_are_persisted_in_one_batch():
+    repo = StubRepository()
+    notified: List[int] = []
+    queue = BallotQueue(repo, on_vote=notified.append)
+    for user in range(100):
+        queue.submit(1, str(user), 1 + user % 2)
+    queue.submit(1, "0", 1)
+    queue.submit(2, "late", 1)
+    assert queue.depth == 102
+
+    queue.start()
+    await queue.join()
+    await queue.close()
+
+    assert len(repo.saves) == 1 and len(repo.saves[0]) == 100
+    assert repo.tally(repo.votes[0]).counts == {1: 50, 2: 50}
+    assert notified == [1]
+    stats = queue.snapshot()
+    assert (stats["depth"], stats["max_depth"], stats["persisted"], stats["dropped"]) == (
+        0,
+        102,
+        100,
+        1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_close_persists_ballots_left_in_the_queue():
+    repo = StubRepository()
+    queue = BallotQueue(repo, max_batch=10)
+    for user in range(25):
+        queue.submit(1, str(user), 1)
+
+    await queue.close()
+
+    assert [len(batch) for batch in repo.saves] == [10, 10, 5]
+    assert queue.snapshot()["batches"] == 3
+
+
+@pytest.mark.asyncio
+async def test_close_waits_for_the_batch_being_saved():
+    repo = StubRepository()
+    saving = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_save(votes, ballots):
+        saving.set()
+        await release.wait()
+        repo.saves.append(list(ballots))
+
+    repo.save_ballots = slow_save
+    queue = BallotQueue(repo)
+    queue.start()
+    queue.submit(1, "a", 2)
+    await saving.wait()
+
+    closing = asyncio.create_task(queue.close())
+    await asyncio.sleep(0.01)
+    assert not closing.done()
+    release.set()
+    await closing
+
+    assert repo.saves == [[(1, "a", 2)]]
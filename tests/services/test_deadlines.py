@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+from typing import List
+
+import pytest
+
+from bot.models import Round
+from bot.persistence.base import RepositoryBase
+from bot.services.deadlines import RoundDeadlines
+
+
+def _in(seconds: float) -> str:
+    return (dt.datetime.now(dt.timezone.utc) + dt.timedelta(seconds=seconds)).isoformat()
+
+
+class StubRepository(RepositoryBase):
+    def __init__(self, votes: List[Round]):
+        self.votes = votes
+
+    async def load_votes(self):
+        return self.votes
+
+
+async def _collect(deadlines: RoundDeadlines, seconds: float) -> List[tuple]:
+    closed: List[tuple] = []
+
+    async def handler(round_id, channel_id):
+        closed.append((round_id, channel_id))
+
+    deadlines.add_handler(handler)
+    task = asyncio.create_task(deadlines.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    return closed
+
+
+@pytest.mark.asyncio
+async def test_rehydrate_closes_overdue_rounds_and_waits_for_the_rest():
+    repo = StubRepository(
+        [
+            Round(id=1, channel_id="a", ends_at=_in(-3600)),
+            Round(id=2, channel_id="b", ends_at=_in(0.05)),
+            Round(id=3, channel_id="c", ends_at=_in(3600)),
+            Round(id=4, status="pushed", channel_id="d", ends_at=_in(-3600)),
+        ]
+    )
+    deadlines = RoundDeadlines(repo)
+
+    assert await deadlines.rehydrate() == 3
+    closed = await _collect(deadlines, 0.15)
+
+    assert closed == [(1, "a"), (2, "b")]
+
+
+@pytest.mark.asyncio
+async def test_earlier_deadline_wakes_the_timer_and_cancel_skips():
+    deadlines = RoundDeadlines(StubRepository([]))
+    deadlines.schedule(1, _in(3600), "a")
+    deadlines.schedule(2, _in(0.05), "b")
+    deadlines.schedule(3, _in(0.05), "c")
+    deadlines.cancel(3)
+
+    closed = await _collect(deadlines, 0.15)
+
+    assert closed == [(2, "b")]
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from bot.models import Option, Round
+from bot.persistence.base import RepositoryBase
+from bot.services import posting as posting_module
+from bot.services.posting import Posting
+from bot.services.round_registry import RoundRegistry
+
+
+class StubRepository(RepositoryBase):
+    def __init__(self):
+        self.votes = [
+            Round(
+                id=3,
+                ends_at="2024-01-01T13:00:00+11:00",
+                options=[Option(1, "foy_warfare", "Foy"), Option(2, "utahbeach_warfare", "Utah")],
+            )
+        ]
+
+    async def load_votes(self):
+        return self.votes
+
+
+class StubMessage:
+    def __init__(self):
+        self.edits: List[Dict[str, Any]] = []
+
+    async def edit(self, **kwargs):
+        self.edits.append(kwargs)
+
+
+class StubChannel:
+    def __init__(self):
+        self.message = StubMessage()
+
+    def get_partial_message(self, message_id):
+        return self.message
+
+
+class StubBot:
+    def __init__(self):
+        self.channel = StubChannel()
+
+    def get_channel(self, channel_id):
+        return self.channel
+
+
+@pytest.fixture
+def live_posting(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(posting_module, "MIN_LIVE_RESULTS_WINDOW", 0.01)
+    repo = StubRepository()
+    posting = Posting(repo, rcon_client=None, default_mapvote_cooldown=2, live_results_window=0.02)
+    bot = StubBot()
+    posting.track_live_results(bot, 3, "10", "20")
+    return repo, posting, bot.channel.message
+
+
+@pytest.mark.asyncio
+async def test_live_results_coalesce_a_burst_into_one_edit(live_posting):
+    repo, posting, message = live_posting
+    tally = repo.tally(repo.votes[0])
+    for user in range(200):
+        tally.vote(str(user), 1 + user % 2)
+        posting.schedule_live_results(3)
+
+    await asyncio.sleep(0.05)
+
+    assert len(message.edits) == 1
+    description = message.edits[0]["embed"].description
+    assert "**1. Foy** — 100 votes" in description
+    assert "**2. Utah** — 100 votes" in description
+
+
+@pytest.mark.asyncio
+async def test_live_results_skip_edit_when_counts_are_unchanged(live_posting):
+    repo, posting, message = live_posting
+    tally = repo.tally(repo.votes[0])
+    tally.vote("a", 1)
+    posting.schedule_live_results(3)
+    await asyncio.sleep(0.05)
+
+    tally.vote("a", 2)
+    tally.vote("a", 1)
+    posting.schedule_live_results(3)
+    await asyncio.sleep(0.05)
+
+    assert len(message.edits) == 1
+
+
+@pytest.mark.asyncio
+async def test_live_results_share_one_edit_budget_per_channel(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(posting_module, "MIN_LIVE_RESULTS_WINDOW", 0.01)
+    repo = StubRepository()
+    repo.votes.append(Round(id=4, options=[Option(1, "foy_warfare", "Foy")]))
+    posting = Posting(repo, rcon_client=None, default_mapvote_cooldown=2, live_results_window=0.05)
+    bot = StubBot()
+    posting.track_live_results(bot, 3, "10", "20")
+    posting.track_live_results(bot, 4, "10", "21")
+    message = bot.channel.message
+
+    for r in repo.votes:
+        repo.tally(r).vote("a", 1)
+        posting.schedule_live_results(r.id)
+    await asyncio.sleep(0.07)
+    assert len(message.edits) == 2
+
+    # Two edits went out in one window, so the next one waits out an extra window.
+    repo.tally(repo.votes[0]).vote("b", 2)
+    posting.schedule_live_results(3)
+    await asyncio.sleep(0.06)
+    assert len(message.edits) == 2
+    await asyncio.sleep(0.1)
+    assert len(message.edits) == 3
+
+
+def test_live_results_window_is_floored_to_the_edit_budget():
+    posting = Posting(
+        StubRepository(), rcon_client=None, default_mapvote_cooldown=2, live_results_window=1.0
+    )
+    assert posting.live_results_window == posting_module.MIN_LIVE_RESULTS_WINDOW == 2.0
+    assert Posting(StubRepository(), None, default_mapvote_cooldown=2).live_results_window == 0
+
+
+class CloseRepository(StubRepository):
+    def __init__(self):
+        super().__init__()
+        self.votes[0].ballots = {"a": 2, "b": 2, "c": 1}
+        self.cooldowns = {"foy": 2}
+        self.counters = {"round_id": 3}
+        self.saved_votes = None
+
+    async def save_votes(self, votes):
+        self.saved_votes = [r.to_dict() for r in votes]
+
+    async def load_cooldowns(self):
+        return self.cooldowns
+
+    async def save_cooldowns(self, cooldowns):
+        self.cooldowns = cooldowns
+
+    async def load_counters(self):
+        return self.counters
+
+    async def save_counters(self, counters):
+        self.counters = counters
+
+    async def load_channels(self):
+        raise OSError("channels unavailable")
+
+
+class SlowRcon:
+    def __init__(self):
+        self.pushed = []
+
+    async def add_map_as_next_rotation(self, code):
+        await asyncio.sleep(0.05)
+        self.pushed.append(code)
+
+
+@pytest.mark.asyncio
+async def test_close_runs_steps_concurrently_and_isolates_failures():
+    repo = CloseRepository()
+    rcon = SlowRcon()
+    registry = RoundRegistry(repo)
+    await registry.rehydrate()
+    posting = Posting(repo, rcon, default_mapvote_cooldown=3, registry=registry)
+
+    results = await posting.close_round_and_push(StubBot(), "1", "10", 3)
+
+    assert 3 not in registry
+
+    assert rcon.pushed == ["utahbeach_warfare"]
+    assert repo.cooldowns == {"foy": 1, "utahbeach": 3}
+    assert repo.counters == {"round_id": 3, "played:utahbeach": 3}
+    assert results["push"]["ok"] and results["cooldowns"]["ok"]
+    assert results["summary"] == {
+        "ok": False,
+        "error": "channels unavailable",
+        "ms": results["summary"]["ms"],
+    }
+    assert results["cooldowns"]["ms"] < 50
+    closed = repo.saved_votes[0]
+    assert closed["status"] == "pushed"
+    assert closed["close_steps"] == results
+    assert [o["votes"] for o in closed["options"]] == [1, 2]
+    assert await posting.close_round_and_push(StubBot(), "1", "10", 3) is None
+
+
+class GatedRcon:
+    def __init__(self, fail=False):
+        self.release = asyncio.Event()
+        self.fail = fail
+
+    async def add_map_as_next_rotation(self, code):
+        await self.release.wait()
+        if self.fail:
+            raise OSError("CRCON down")
+
+
+@pytest.mark.asyncio
+async def test_close_releases_votes_lock_during_push_and_summary_waits_for_it(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    repo = CloseRepository()
+    rcon = GatedRcon(fail=True)
+    posting = Posting(repo, rcon, default_mapvote_cooldown=3)
+    published = []
+
+    async def publish(bot, guild_id, channel_id, r, detail, pushed):
+        published.append(pushed)
+
+    monkeypatch.setattr(posting, "_publish_summary", publish)
+    closing = asyncio.create_task(posting.close_round_and_push(StubBot(), "1", "10", 3))
+    await asyncio.sleep(0.01)
+
+    # The round is saved as closing and the votes lock is free while CRCON is slow.
+    assert repo.saved_votes[0]["status"] == "closing"
+    async with repo.transaction("votes", autosave=False) as votes:
+        assert not votes[0].is_open
+    assert published == []
+    assert await posting.close_round_and_push(StubBot(), "1", "10", 3) is None
+
+    rcon.release.set()
+    results = await closing
+    assert published == [False]
+    assert not results["push"]["ok"]
+    assert repo.saved_votes[0]["status"] == "push_failed"
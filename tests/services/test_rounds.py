@@ -2,16 +2,24 @@ from __future__ import annotations
 
 import datetime as dt
 from types import SimpleNamespace
-from typing import Any, List
+from typing import List
 
 import pytest
 
+from bot.models import Round
+from bot.persistence.base import RepositoryBase
 from bot.rounds import Rounds
+from bot.services.ballots import BallotQueue
+from bot.services.posting import Posting
+from bot.services.round_registry import RoundRegistry
+from bot.views import VoteButton
+from tests.helpers.stub_discord import StubInteraction
 
 
-class StubRepository:
+class StubRepository(RepositoryBase):
     def __init__(self):
         self._votes: List[dict] = []
+        self._counters: dict = {}
         self.saved_payload: List[dict] | None = None
 
     async def load_votes(self) -> List[dict]:
@@ -21,9 +29,15 @@ class StubRepository:
         self._votes = list(votes)
         self.saved_payload = list(votes)
 
+    async def load_counters(self) -> dict:
+        return dict(self._counters)
+
+    async def save_counters(self, counters: dict) -> None:
+        self._counters = dict(counters)
+
 
 class StubPools:
-    async def pick_vote_options(self, count: int = 5) -> List[dict]:
+    async def pick_vote_options(self, count: int = 5, pool=None) -> List[dict]:
         return [
             {"code": "FOY", "label": "Foy"},
             {"code": "OMAHA", "label": "Omaha"},
@@ -35,30 +49,44 @@ class StubPosting:
         self.ensure_calls: List[tuple] = []
         self.edits: List[dict] = []
         self.updated_rows: List[dict] = []
+        self.posted: List[dict] = []
 
     async def ensure_persistent_messages(self, bot, guild_id, channel_id):
         self.ensure_calls.append((bot, guild_id, channel_id))
         return {"current_vote_message_id": "old"}
 
     async def edit_current_vote_message(self, bot, channel_id, message_id, embed, view):
-        self.edits.append({
-            "bot": bot,
-            "channel_id": channel_id,
-            "message_id": message_id,
-            "embed": embed,
-            "view": view,
-        })
+        self.edits.append(
+            {
+                "bot": bot,
+                "channel_id": channel_id,
+                "message_id": message_id,
+                "embed": embed,
+                "view": view,
+            }
+        )
         return "new"
 
+    async def post_vote_message(self, bot, channel_id, embed, view):
+        self.posted.append({"channel_id": channel_id, "embed": embed, "view": view})
+        return f"extra-{len(self.posted)}"
+
     async def update_channel_row(self, guild_id, channel_id, **fields):
         self.updated_rows.append({"guild_id": guild_id, "channel_id": channel_id, **fields})
 
+    def schedule_live_results(self, round_id):
+        pass
+
+    def track_live_results(self, bot, round_id, channel_id, message_id):
+        self.tracked = (round_id, channel_id, message_id)
+
 
 class StubView:
-    def __init__(self, repository, round_id, options):
+    def __init__(self, repository, round_id, options, on_vote=None):
         self.repository = repository
         self.round_id = round_id
         self.options = options
+        self.on_vote = on_vote
 
 
 class StubEmbed:
@@ -86,7 +114,7 @@ async def test_start_new_vote_persists_round_and_updates_messages(monkeypatch: p
 
     fixed = dt.datetime(2024, 1, 1, 12, 0, 0)
 
-    monkeypatch.setattr("bot.rounds._next_round_id", lambda: 42)
+    repo._counters = {"round_id": 41}
     monkeypatch.setattr("bot.rounds.sydney_now", lambda: fixed)
     monkeypatch.setattr("bot.rounds.discord", SimpleNamespace(Embed=StubEmbed))
     monkeypatch.setattr("bot.rounds.VoteView", StubView)
@@ -95,12 +123,14 @@ async def test_start_new_vote_persists_round_and_updates_messages(monkeypatch: p
     await rounds.start_new_vote(bot, guild_id="1", channel_id="2", extra={"minimum_votes": "4"})
 
     assert repo.saved_payload is not None
-    assert repo.saved_payload[0]["id"] == 42
-    assert repo.saved_payload[0]["meta"]["minimum_votes"] == 4
-    assert repo.saved_payload[0]["options"][0]["label"] == "Foy"
+    assert repo.saved_payload[0].id == 42
+    assert repo.saved_payload[0].minimum_votes == 4
+    assert repo.saved_payload[0].options[0].label == "Foy"
 
     assert posting.ensure_calls == [(bot, "1", "2")]
-    assert posting.updated_rows == [{"guild_id": "1", "channel_id": "2", "current_vote_message_id": "new"}]
+    assert posting.updated_rows == [
+        {"guild_id": "1", "channel_id": "2", "current_vote_message_id": "new"}
+    ]
 
     edit = posting.edits[0]
     assert edit["message_id"] == "old"
@@ -108,4 +138,70 @@ async def test_start_new_vote_persists_round_and_updates_messages(monkeypatch: p
     assert isinstance(edit["view"], StubView)
     assert edit["embed"].footer_text is not None
     assert edit["embed"].footer_text.startswith("Closes at ")
-    assert edit["view"].options[0]["label"] == "Foy"
+    assert edit["view"].options[0].label == "Foy"
+    assert edit["view"].on_vote == posting.schedule_live_results
+    assert posting.tracked == (42, "2", "new")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rounds_in_one_channel_get_own_ids_and_messages(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    repo = StubRepository()
+    # An earlier run left round 7 open; there is no persisted counter yet.
+    repo._votes = [Round(id=7, channel_id="9")]
+    posting = StubPosting()
+    rounds = Rounds(repo, StubPools(), posting, vote_duration_minutes=5, mapvote_cooldown=3)
+    await rounds.registry.rehydrate()
+
+    monkeypatch.setattr("bot.rounds.discord", SimpleNamespace(Embed=StubEmbed))
+    monkeypatch.setattr("bot.rounds.VoteView", StubView)
+
+    await rounds.start_new_vote(object(), guild_id="1", channel_id="2", extra={"pool": "warfare"})
+    await rounds.start_new_vote(object(), guild_id="1", channel_id="2", extra={"pool": "offensive"})
+
+    assert [r.id for r in repo._votes] == [7, 8, 9]
+    assert repo._counters == {"round_id": 9}
+    # The first round in the channel takes the current vote message, the second posts its own.
+    assert len(posting.edits) == 1 and len(posting.posted) == 1
+    assert posting.posted[0]["embed"].title == "Vote — Next Map (offensive)"
+    assert [r.id for r in rounds.registry.in_channel("2")] == [8, 9]
+    assert rounds.registry.get(9).pool == "offensive"
+
+    rounds.registry.unregister(8)
+    assert [r.id for r in rounds.registry.in_channel("2")] == [9]
+
+    # A restarted bot continues from the persisted counter.
+    restarted = Rounds(repo, StubPools(), posting, vote_duration_minutes=5, mapvote_cooldown=3)
+    assert await restarted.registry.allocate_id() == 10
+
+
+@pytest.mark.discord_stub
+@pytest.mark.asyncio
+async def test_rounds_and_posting_share_an_empty_registry(monkeypatch: pytest.MonkeyPatch):
+    repo = StubRepository()
+    registry = RoundRegistry(repo)
+    rounds = Rounds(
+        repo,
+        StubPools(),
+        StubPosting(),
+        vote_duration_minutes=5,
+        mapvote_cooldown=3,
+        registry=registry,
+    )
+    posting = Posting(repo, None, default_mapvote_cooldown=3, registry=registry)
+    assert rounds.registry is registry and posting.registry is registry
+
+    monkeypatch.setattr("bot.rounds.discord", SimpleNamespace(Embed=StubEmbed))
+    monkeypatch.setattr("bot.rounds.VoteView", StubView)
+    await rounds.start_new_vote(object(), guild_id="1", channel_id="2")
+
+    queue = BallotQueue(repo)
+    interaction = StubInteraction()
+    await VoteButton(
+        repo, round_id=1, index=2, label="Omaha", ballots=queue, registry=registry
+    ).callback(interaction)
+    await queue.close()
+
+    assert interaction.response.deferred is True
+    assert repo._votes[0].ballots == {str(interaction.user.id): 2}
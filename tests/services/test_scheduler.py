@@ -5,6 +5,7 @@ from typing import Any, Dict, List
 
 import pytest
 
+from bot.persistence.base import RepositoryBase
 from bot.services.ap_scheduler import VoteScheduler
 
 
@@ -22,11 +23,12 @@ class StubScheduler:
         return job
 
 
-class StubRepository:
+class StubRepository(RepositoryBase):
     def __init__(self, schedules: List[dict], cooldowns: Dict[str, int] | None = None):
         self._schedules = schedules
         self._cooldowns = cooldowns or {}
         self.saved_cooldowns: Dict[str, int] | None = None
+        self.counters: Dict[str, int] = {"round_id": 7}
 
     async def load_schedules(self) -> List[dict]:
         return list(self._schedules)
@@ -37,12 +39,18 @@ class StubRepository:
     async def save_cooldowns(self, payload: Dict[str, int]) -> None:
         self.saved_cooldowns = dict(payload)
 
+    async def load_counters(self) -> Dict[str, int]:
+        return self.counters
+
+    async def save_counters(self, payload: Dict[str, int]) -> None:
+        self.counters = payload
+
 
 class StubPools:
     def __init__(self):
         self.options = [{"code": "FOY", "label": "Foy"}]
 
-    def pick_vote_options(self, count: int = 1):
+    async def pick_vote_options(self, count: int = 1, pool=None):
         return self.options[:count]
 
 
@@ -71,7 +79,12 @@ class StubClient:
 async def test_load_schedules_shapes_defaults(monkeypatch: pytest.MonkeyPatch):
     repo = StubRepository(
         schedules=[
-            {"cron": "0 0 * * *", "mapvote_cooldown": None, "minimum_votes": "", "mapvote_enabled": True},
+            {
+                "cron": "0 0 * * *",
+                "mapvote_cooldown": None,
+                "minimum_votes": "",
+                "mapvote_enabled": True,
+            },
             {"cron": "0 0 * * *", "mapvote_enabled": False},
         ]
     )
@@ -86,7 +99,10 @@ async def test_load_schedules_shapes_defaults(monkeypatch: pytest.MonkeyPatch):
     )
     scheduler.scheduler = StubScheduler()
 
-    monkeypatch.setattr("bot.services.ap_scheduler._load_config", lambda: {"mapvote_cooldown": 3, "minimum_votes": 2})
+    monkeypatch.setattr(
+        "bot.services.ap_scheduler._load_config",
+        lambda: {"mapvote_cooldown": 3, "minimum_votes": 2},
+    )
 
     shaped = await scheduler._load_schedules()
 
@@ -124,7 +140,10 @@ async def test_reload_jobs_registers_cron_and_runs_mapvote_round(monkeypatch: py
     stub_scheduler = StubScheduler()
     scheduler.scheduler = stub_scheduler
 
-    monkeypatch.setattr("bot.services.ap_scheduler._load_config", lambda: {"mapvote_cooldown": 2, "minimum_votes": 0})
+    monkeypatch.setattr(
+        "bot.services.ap_scheduler._load_config",
+        lambda: {"mapvote_cooldown": 2, "minimum_votes": 0},
+    )
 
     await scheduler.reload_jobs()
 
@@ -172,4 +191,4 @@ async def test_job_wrapper_without_mapvote_queues_next_map(monkeypatch: pytest.M
 
     assert client.queued == ["FOY"]
     assert repo.saved_cooldowns is not None
-    assert repo.saved_cooldowns["FOY"] == 4
\ No newline at end of file
+    assert repo.saved_cooldowns["FOY"] == 4
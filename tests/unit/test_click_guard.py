@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from bot.services.click_guard import ClickGuard
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_repeated_click_on_current_choice_is_a_duplicate():
+    guard = ClickGuard(clock=FakeClock())
+    assert guard.check(1, "u", 2) == ClickGuard.ALLOW
+    guard.remember(1, "u", 2)
+
+    assert guard.check(1, "u", 2) == ClickGuard.DUPLICATE
+    assert guard.check(1, "u", 3) == ClickGuard.ALLOW
+    assert guard.check(2, "u", 2) == ClickGuard.ALLOW
+
+    guard.forget_round(1)
+    assert guard.check(1, "u", 2) == ClickGuard.ALLOW
+
+
+def test_token_bucket_limits_bursts_and_refills():
+    clock = FakeClock()
+    guard = ClickGuard(rate=1.0, burst=3, clock=clock)
+
+    verdicts = [guard.check(1, "u", i) for i in range(5)]
+    assert verdicts == [ClickGuard.ALLOW] * 3 + [ClickGuard.LIMITED] * 2
+    assert guard.check(1, "other", 1) == ClickGuard.ALLOW
+
+    clock.now = 1.0
+    assert guard.check(1, "u", 9) == ClickGuard.ALLOW
+    assert guard.check(1, "u", 9) == ClickGuard.LIMITED
+    assert guard.limited == 3
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from bot.utils.loop_monitor import LoopLagMonitor
+
+
+@pytest.mark.asyncio
+async def test_monitor_records_blocking_call():
+    monitor = LoopLagMonitor(interval=0.01, warn_after=0.05)
+    task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.03)
+
+    time.sleep(0.1)
+    await asyncio.sleep(0.03)
+    task.cancel()
+
+    stats = monitor.snapshot()
+    assert stats["samples"] >= 2
+    assert stats["max_lag_ms"] >= 80
+    assert stats["stalls"] == 1
+
+
+def test_snapshot_of_idle_monitor_is_zeroed():
+    assert LoopLagMonitor().snapshot() == {
+        "samples": 0,
+        "total_lag_ms": 0.0,
+        "max_lag_ms": 0.0,
+        "mean_lag_ms": 0.0,
+        "stalls": 0,
+    }
@@ -1,4 +1,14 @@
-from bot.utils.maps import base_map_code, normalize_cooldowns
+import json
+from pathlib import Path
+
+from bot.utils.maps import (
+    GameMode,
+    TimeOfDay,
+    base_map_code,
+    map_mode,
+    normalize_cooldowns,
+    parse_map_code,
+)
 
 
 def test_base_map_code_strips_variants() -> None:
@@ -6,6 +16,25 @@ def test_base_map_code_strips_variants() -> None:
     assert base_map_code("OMAHA") == "OMAHA"
 
 
+def test_map_mode_reads_game_mode_segment() -> None:
+    assert map_mode("stmariedumont_warfare_night") == "warfare"
+    assert map_mode("FOY_OFFENSIVEGER") == "offensive"
+    assert map_mode("OMAHA") is None
+
+
+def test_parse_map_code_is_structured_and_cached() -> None:
+    parsed = parse_map_code("carentan_warfare_night")
+
+    assert parsed == ("carentan_warfare_night", "carentan", GameMode.WARFARE, TimeOfDay.NIGHT)
+    assert parse_map_code("".join(["carentan", "_warfare_night"])) is parsed
+    assert parse_map_code("WARFARE_DAY") == (
+        "WARFARE_DAY",
+        "WARFARE_DAY",
+        GameMode.WARFARE,
+        TimeOfDay.DAY,
+    )
+
+
 def test_normalize_cooldowns_merges_variants_and_handles_noise() -> None:
     raw = {
         "FOY_WARFARE": 2,
@@ -16,4 +45,42 @@ def test_normalize_cooldowns_merges_variants_and_handles_noise() -> None:
 
     result = normalize_cooldowns(raw)
 
-    assert result == {"FOY": 2, "OMAHA": 3}
\ No newline at end of file
+    assert result == {"FOY": 2, "OMAHA": 3}
+
+
+def test_parse_map_code_covers_the_full_layer_vocabulary() -> None:
+    assert parse_map_code("stmariedumont_off_ger") == (
+        "stmariedumont_off_ger",
+        "stmariedumont",
+        GameMode.OFFENSIVE,
+        None,
+    )
+    assert parse_map_code("hurtgenforest_warfare_V2_night").base == "hurtgenforest"
+    assert parse_map_code("tobruk_offensivebritish_dusk")[1:] == (
+        "tobruk",
+        GameMode.OFFENSIVE,
+        TimeOfDay.DUSK,
+    )
+    assert parse_map_code("CAR_S_1944_Rain_P_Skirmish")[1:] == (
+        "carentan",
+        GameMode.SKIRMISH,
+        TimeOfDay.RAIN,
+    )
+    assert parse_map_code("mortain_offensiveUS_overcast**")[1:] == (
+        "mortain",
+        GameMode.OFFENSIVE,
+        TimeOfDay.OVERCAST,
+    )
+
+
+def test_every_shipped_map_parses_to_its_base_and_gamemode() -> None:
+    maps = json.loads((Path(__file__).parents[2] / "bot" / "data" / "maps.json").read_text())
+    bases: dict[str, set[str]] = {}
+    for m in maps:
+        parsed = parse_map_code(m["code"])
+        assert parsed.mode is not None and parsed.mode.value == m["gamemode"].lower(), m["code"]
+        bases.setdefault(m["base"], set()).add(parsed.base)
+
+    # One parsed base per maps.json base, and no two maps.json bases sharing one.
+    assert all(len(parsed) == 1 for parsed in bases.values())
+    assert len({next(iter(parsed)) for parsed in bases.values()}) == len(bases)
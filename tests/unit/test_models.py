@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from bot.models import Option, Round
+
+
+def test_round_trips_stored_shape_and_keeps_unknown_keys():
+    stored = {
+        "id": 4,
+        "pool": "Warfare",
+        "channel_id": "9",
+        "started_at": "2024-01-01T12:00:00+11:00",
+        "ends_at": "2024-01-01T13:00:00+11:00",
+        "status": "open",
+        "meta": {
+            "mapvote_cooldown": 3,
+            "minimum_votes": 2,
+            "voting_method": "irv",
+            "note": "hand edit",
+        },
+        "options": [{"index": 1, "map": "foy_warfare", "label": "Foy", "votes": 0}],
+        "ballots": {"42": [1]},
+        "server": "eu-1",
+    }
+
+    round_rec = Round.from_dict(stored)
+
+    assert round_rec.voting_method == "irv" and round_rec.minimum_votes == 2
+    assert round_rec.options == [Option(1, "foy_warfare", "Foy")]
+    assert round_rec.to_dict() == stored
+
+
+def test_legacy_records_get_defaults():
+    round_rec = Round.from_dict({"id": 1, "meta": {"minimum_votes": "x", "voting_method": "borda"}})
+
+    assert round_rec.is_open and round_rec.status == "open"
+    assert (round_rec.minimum_votes, round_rec.voting_method, round_rec.pool) == (
+        0,
+        "plurality",
+        "default",
+    )
+    assert not hasattr(round_rec, "__dict__")
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import json
+from pathlib import Path
 from typing import Any, List
 
 import pytest
 
-from bot.services.pools import Pools
+from bot.services.pools import Pools, WeightedSampler
 
 
 class StubRepository:
@@ -12,6 +14,7 @@ class StubRepository:
         self._maps = maps
         self._pools = pools
         self._cooldowns = cooldowns
+        self.counters: dict[str, Any] = {}
 
     async def load_maps(self) -> List[dict]:
         return self._maps
@@ -22,6 +25,9 @@ class StubRepository:
     async def load_cooldowns(self) -> dict[str, Any]:
         return self._cooldowns
 
+    async def load_counters(self) -> dict[str, Any]:
+        return self.counters
+
 
 @pytest.mark.asyncio
 async def test_pick_vote_options_prefers_active_pool_and_respects_cooldowns(
@@ -32,17 +38,13 @@ async def test_pick_vote_options_prefers_active_pool_and_respects_cooldowns(
         {"code": "FOY_NIGHT", "name": "Foy Night", "enabled": True},
         {"code": "UTAH", "name": "Utah", "enabled": True},
     ]
-    pools = [
-        {"name": "rotation", "maps": ["FOY_WARFARE", "FOY_NIGHT", "UTAH"], "active": True}
-    ]
+    pools = [{"name": "rotation", "maps": ["FOY_WARFARE", "FOY_NIGHT", "UTAH"], "active": True}]
     cooldowns = {"FOY": 2, "UTAH": 0}
     repo = StubRepository(maps, pools, cooldowns)
     service = Pools(repo)
 
-    def fake_sample(population: List[dict], k: int) -> List[dict]:
-        return population[:k]
-
-    monkeypatch.setattr("bot.services.pools.random.sample", fake_sample)
+    # Always draw the first map with weight left, i.e. maps.json order.
+    monkeypatch.setattr("bot.services.pools.random.randrange", lambda total: 0)
 
     opts = await service.pick_vote_options(count=2)
 
@@ -64,11 +66,200 @@ async def test_pick_vote_options_falls_back_to_enabled_maps_when_no_active_pool(
     repo = StubRepository(maps, pools, cooldowns)
     service = Pools(repo)
 
-    def fake_sample(population: List[dict], k: int) -> List[dict]:
-        return population[:k]
-
-    monkeypatch.setattr("bot.services.pools.random.sample", fake_sample)
+    # Always draw the first map with weight left, i.e. maps.json order.
+    monkeypatch.setattr("bot.services.pools.random.randrange", lambda total: 0)
 
     opts = await service.pick_vote_options(count=2)
 
-    assert [o["code"] for o in opts] == ["SAINT_MERE", "HURTGEN"]
\ No newline at end of file
+    assert [o["code"] for o in opts] == ["SAINT_MERE", "HURTGEN"]
+
+
+@pytest.mark.asyncio
+async def test_pool_index_is_reused_until_maps_or_pools_are_replaced(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    maps = [
+        {"code": "FOY_WARFARE", "name": "Foy Warfare"},
+        {"code": "UTAH_WARFARE", "name": "Utah Warfare"},
+        {"code": "KURSK_WARFARE", "name": "Kursk Warfare"},
+    ]
+    pools = [{"name": "rotation", "maps": ["FOY_WARFARE", "UTAH_WARFARE"], "active": True}]
+    repo = StubRepository(maps, pools, {"UTAH": 1})
+    service = Pools(repo)
+    monkeypatch.setattr("bot.services.pools.random.randrange", lambda total: 0)
+
+    first = await service.index()
+    assert await service.pick_vote_options(count=2) == [
+        {"code": "FOY_WARFARE", "label": "Foy Warfare"},
+        {"code": "UTAH_WARFARE", "label": "Utah Warfare"},
+    ]
+    assert await service.index() is first
+
+    # pools.json edited on disk: the repository hands out a new list.
+    repo._pools = [{"name": "rotation", "maps": ["KURSK_WARFARE"], "active": True}]
+    assert [o["code"] for o in await service.pick_vote_options(count=1)] == ["KURSK_WARFARE"]
+    assert await service.index() is not first
+
+
+@pytest.mark.asyncio
+async def test_pick_vote_options_uses_named_pool_and_tracks_cooldown_changes(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    maps = [
+        {"code": "FOY_WARFARE", "name": "Foy"},
+        {"code": "FOY_NIGHT", "name": "Foy Night"},
+        {"code": "UTAH_WARFARE", "name": "Utah"},
+        {"code": "KURSK_WARFARE", "name": "Kursk"},
+    ]
+    pools = [
+        {"name": "Warfare Week A", "maps": ["FOY_WARFARE", "FOY_NIGHT", "UTAH_WARFARE"]},
+        {"name": "Eastern Front", "maps": ["KURSK_WARFARE"], "active": True},
+    ]
+    cooldowns: dict[str, Any] = {"FOY_NIGHT": 2}
+    repo = StubRepository(maps, pools, cooldowns)
+    service = Pools(repo)
+    monkeypatch.setattr("bot.services.pools.random.randrange", lambda total: 0)
+
+    # One variant per base map, even when filling from cooling maps.
+    assert [o["code"] for o in await service.pick_vote_options(count=3, pool="Warfare Week A")] == [
+        "UTAH_WARFARE",
+        "FOY_WARFARE",
+    ]
+    assert [o["code"] for o in await service.pick_vote_options(count=1, pool="default")] == [
+        "KURSK_WARFARE"
+    ]
+
+    # Cooldowns saved in place by a round close: Foy comes off, Utah goes on.
+    cooldowns.clear()
+    cooldowns.update({"FOY": 0, "UTAH_WARFARE": 1})
+    index = await service.index()
+    assert [o["code"] for o in await service.pick_vote_options(count=3, pool="Warfare Week A")] == [
+        "FOY_WARFARE",
+        "UTAH_WARFARE",
+    ]
+    assert await service.index() is index
+    assert index.eligible("Warfare Week A") == 0b0011
+
+
+def test_weighted_sampler_draws_by_weight_and_takes_updates(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    sampler = WeightedSampler([0, 3, 1, 0, 6])
+    monkeypatch.setattr("bot.services.pools.random.randrange", lambda total: total - 1)
+
+    # total - 1 = 9 falls in slot 4's range [4, 10).
+    assert (sampler.draw(), sampler.total) == (4, 10)
+    assert [sampler.find(t) for t in range(sampler.total)] == [1, 1, 1, 2, 4, 4, 4, 4, 4, 4]
+
+    sampler.set(1, 0)
+    sampler.set(3, 2)
+    assert [sampler.find(t) for t in range(sampler.total)] == [2, 3, 3, 4, 4, 4, 4, 4, 4]
+
+
+@pytest.mark.asyncio
+async def test_recently_played_and_zero_weight_maps_are_drawn_less(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    maps = [
+        {"code": "FOY_WARFARE", "name": "Foy"},
+        {"code": "UTAH_WARFARE", "name": "Utah", "weight": 3},
+        {"code": "KURSK_WARFARE", "name": "Kursk", "weight": 0},
+    ]
+    repo = StubRepository(maps, [], {})
+    repo.counters = {"round_id": 10, "played:UTAH": 10}
+    service = Pools(repo, recency_half_life=1)
+    totals = []
+
+    def first(total: int) -> int:
+        totals.append(total)
+        return 0
+
+    monkeypatch.setattr("bot.services.pools.random.randrange", first)
+
+    opts = await service.pick_vote_options(count=3)
+
+    # Utah won the latest round: 3 * (1 - 2 ** -1). Kursk (weight 0) only fills the last slot.
+    assert [o["code"] for o in opts] == ["FOY_WARFARE", "UTAH_WARFARE", "KURSK_WARFARE"]
+    assert totals == [2500, 1500]
+
+    repo.counters["round_id"] = 30
+    index = await service.index()
+    await service.pick_vote_options(count=1)
+    assert index.recency == {} and totals[-1] == 4000
+
+
+@pytest.mark.asyncio
+async def test_one_variant_per_base_map_and_mode_quotas(monkeypatch: pytest.MonkeyPatch) -> None:
+    maps = [
+        {"code": "stmariedumont_warfare_day", "name": "SMDM Day"},
+        {"code": "stmariedumont_warfare_night", "name": "SMDM Night"},
+        {"code": "foy_warfare", "name": "Foy"},
+        {"code": "utahbeach_warfare", "name": "Utah"},
+        {"code": "kursk_offensiveger", "name": "Kursk Off"},
+        {"code": "omaha", "name": "Omaha", "mode": "Offensive"},
+    ]
+    pools = [
+        {
+            "name": "mixed",
+            "maps": [m["code"] for m in maps],
+            "quotas": {"offensive": 2, "skirmish": "x"},
+        }
+    ]
+    repo = StubRepository(maps, pools, {})
+    service = Pools(repo)
+    monkeypatch.setattr("bot.services.pools.random.randrange", lambda total: 0)
+
+    opts = await service.pick_vote_options(count=4, pool="mixed")
+
+    # The two offensive maps come first, then one SMDM variant, never both.
+    assert [o["code"] for o in opts] == [
+        "kursk_offensiveger",
+        "omaha",
+        "stmariedumont_warfare_day",
+        "foy_warfare",
+    ]
+    index = await service.index()
+    assert index.quotas["mixed"] == {"offensive": 2}
+    # Held weights are back for the next vote.
+    assert all(
+        entry.sampler.total == 1000 * len(entry.positions) for entry in index._samplers.values()
+    )
+
+
+@pytest.mark.asyncio
+async def test_shipped_maps_never_offer_two_variants_of_one_base() -> None:
+    maps = json.loads((Path(__file__).parents[2] / "bot" / "data" / "maps.json").read_text())
+    pools = [
+        {
+            "name": "all",
+            "maps": [m["code"] for m in maps],
+            "quotas": {"skirmish": 1, "offensive": 1},
+        }
+    ]
+    service = Pools(StubRepository(maps, pools, {}))
+    base_of = {m["code"]: m["base"] for m in maps}
+    mode_of = {m["code"]: m["gamemode"] for m in maps}
+
+    for _ in range(500):
+        opts = await service.pick_vote_options(count=5, pool="all")
+        bases = [base_of[o["code"]] for o in opts]
+        assert len(opts) == 5 and len(set(bases)) == 5
+        assert {"Skirmish", "Offensive"} <= {mode_of[o["code"]] for o in opts}
+
+
+@pytest.mark.asyncio
+async def test_maps_without_a_code_are_never_offered(monkeypatch: pytest.MonkeyPatch) -> None:
+    maps = [
+        {"name": "Missing code", "enabled": True},
+        {"code": "", "name": "Empty code"},
+        {"code": "UTAH", "name": "Utah"},
+        {"code": "OMAHA", "name": "Omaha"},
+    ]
+    service = Pools(StubRepository(maps, [], {}))
+    monkeypatch.setattr("bot.services.pools.random.randrange", lambda total: 0)
+
+    opts = await service.pick_vote_options(count=4)
+
+    assert [o["code"] for o in opts] == ["UTAH", "OMAHA"]
+    # Positions still line up with maps.json.
+    assert (await service.index()).entries[2] == ("UTAH", "Utah")
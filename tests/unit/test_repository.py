@@ -0,0 +1,401 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from bot.models import Round
+from bot.persistence import repository as repository_module
+from bot.persistence.repository import Repository
+from bot.services.round_registry import RoundRegistry
+
+
+@pytest.fixture
+def count_parses(monkeypatch: pytest.MonkeyPatch):
+    calls = {"n": 0}
+    real_read = repository_module._read_file
+
+    def counting_read(*args, **kwargs):
+        calls["n"] += 1
+        return real_read(*args, **kwargs)
+
+    monkeypatch.setattr(repository_module, "_read_file", counting_read)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_repeated_loads_hit_cache(tmp_path: Path, count_parses):
+    (tmp_path / "votes.json").write_text(json.dumps([{"id": 1}]), encoding="utf-8")
+    repo = Repository(data_dir=str(tmp_path))
+
+    first = await repo.load_votes()
+    second = await repo.load_votes()
+
+    assert [r.id for r in first] == [1]
+    assert second is first
+    assert count_parses["n"] == 1
+
+
+@pytest.mark.asyncio
+async def test_save_writes_through_and_refreshes_cache(tmp_path: Path, count_parses):
+    repo = Repository(data_dir=str(tmp_path))
+
+    votes = await repo.load_votes()
+    votes.append(Round(id=2))
+    await repo.save_votes(votes)
+
+    assert json.loads((tmp_path / "votes.json").read_text(encoding="utf-8")) == [
+        r.to_dict() for r in votes
+    ]
+    assert await repo.load_votes() is votes
+    assert count_parses["n"] == 0
+
+
+@pytest.mark.asyncio
+async def test_external_edit_is_picked_up(tmp_path: Path):
+    path = tmp_path / "cooldowns.json"
+    path.write_text(json.dumps({"FOY": 1}), encoding="utf-8")
+    repo = Repository(data_dir=str(tmp_path))
+    assert await repo.load_cooldowns() == {"FOY": 1}
+
+    path.write_text(json.dumps({"FOY": 1, "UTAH": 22}), encoding="utf-8")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert await repo.load_cooldowns() == {"FOY": 1, "UTAH": 22}
+
+
+@pytest.mark.asyncio
+async def test_load_channels_shapes_legacy_rows_once(tmp_path: Path, count_parses):
+    (tmp_path / "channels.json").write_text(
+        json.dumps([{"guild_id": 1, "channel_id": 2}]), encoding="utf-8"
+    )
+    repo = Repository(data_dir=str(tmp_path))
+
+    rows = await repo.load_channels()
+    again = await repo.load_channels()
+
+    assert rows[0]["guild_id"] == "1"
+    assert rows[0]["current_vote_message_id"] == "0"
+    assert again is rows
+    assert count_parses["n"] == 1
+
+
+@pytest.mark.asyncio
+async def test_ballot_journal_appends_instead_of_rewriting_votes(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path), ballot_journal=True)
+    await repo.save_votes([Round(id=5)])
+    before = (tmp_path / "votes.json").read_text(encoding="utf-8")
+
+    votes = await repo.load_votes()
+    votes[0].ballots["42"] = 3
+    await repo.save_ballot(votes, 5, "42", 3)
+
+    assert (tmp_path / "votes.json").read_text(encoding="utf-8") == before
+    lines = (tmp_path / "ballots.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["index"] == 3
+
+
+@pytest.mark.asyncio
+async def test_ballot_journal_is_replayed_on_restart_and_folded_on_save(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path), ballot_journal=True)
+    await repo.save_votes([Round(id=1, status="pushed"), Round(id=2)])
+    votes = await repo.load_votes()
+    for user, index in (("a", 1), ("b", 2), ("a", 2)):
+        await repo.save_ballot(votes, 2, user, index)
+    await repo.save_ballot(votes, 1, "late", 1)
+    with open(tmp_path / "ballots.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"round_id": 2, "user_')
+
+    restarted = Repository(data_dir=str(tmp_path), ballot_journal=True)
+    recovered = await restarted.load_votes()
+
+    assert [r.id for r in recovered] == [2]
+    assert recovered[0].ballots == {"a": 2, "b": 2}
+    assert (await restarted.load_archived_round(1)).ballots == {}
+
+    recovered[0].status = "pushed"
+    await restarted.save_votes(recovered)
+
+    assert (tmp_path / "ballots.jsonl").read_text(encoding="utf-8") == ""
+    assert json.loads((tmp_path / "votes.json").read_text(encoding="utf-8")) == []
+    assert (await restarted.load_archived_round(2)).ballots == {"a": 2, "b": 2}
+
+
+@pytest.mark.asyncio
+async def test_legacy_round_without_status_is_open_everywhere(tmp_path: Path):
+    (tmp_path / "votes.json").write_text(json.dumps([{"id": 3}]), encoding="utf-8")
+    (tmp_path / "ballots.jsonl").write_text(
+        json.dumps({"round_id": 3, "user_id": "u", "index": 1}) + "\n"
+    )
+    repo = Repository(data_dir=str(tmp_path), ballot_journal=True)
+    registry = RoundRegistry(repo)
+
+    assert await registry.rehydrate() == 1
+    assert (await repo.get_round(3)).ballots == {"u": 1}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_saves_reach_disk_in_issue_order(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path), io_workers=4)
+    payloads = [{"FOY": n} for n in range(20)]
+
+    await asyncio.gather(*(repo.save_cooldowns(p) for p in payloads))
+
+    assert json.loads((tmp_path / "cooldowns.json").read_text(encoding="utf-8")) == {"FOY": 19}
+    assert await repo.load_cooldowns() is payloads[-1]
+    await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_save_snapshots_data_before_handing_off(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path))
+    votes = [Round(id=1)]
+
+    pending = asyncio.ensure_future(repo.save_votes(votes))
+    await asyncio.sleep(0)
+    votes[0].ballots["late"] = 2
+    assert await repo.load_votes() is votes
+    await pending
+
+    assert json.loads((tmp_path / "votes.json").read_text(encoding="utf-8")) == [
+        Round(id=1).to_dict()
+    ]
+    await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_bursts_into_one_write(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path), flush_interval=0.05)
+    channels = []
+    for n in range(25):
+        channels.append({"guild_id": "1", "channel_id": str(n)})
+        await repo.save_channels(channels)
+
+    assert not (tmp_path / "channels.json").exists()
+    assert await repo.load_channels() is channels
+
+    await asyncio.sleep(0.1)
+
+    assert repo.disk_writes == 1
+    assert len(json.loads((tmp_path / "channels.json").read_text(encoding="utf-8"))) == 25
+    await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_dirty_collections(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path), flush_interval=60)
+    await repo.save_cooldowns({"FOY": 3})
+    await repo.save_schedules([{"cron": "0 18 * * FRI"}])
+
+    await repo.close()
+
+    assert json.loads((tmp_path / "cooldowns.json").read_text(encoding="utf-8")) == {"FOY": 3}
+    assert json.loads((tmp_path / "schedules.json").read_text(encoding="utf-8")) == [
+        {"cron": "0 18 * * FRI"}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failed_write_leaves_previous_file_intact(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    repo = Repository(data_dir=str(tmp_path), io_workers=0)
+    await repo.save_votes([Round(id=1)])
+
+    def exploding_fsync(fd):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(repository_module.os, "fsync", exploding_fsync)
+    with pytest.raises(OSError):
+        await repo.save_votes([Round(id=1), Round(id=2)])
+
+    assert json.loads((tmp_path / "votes.json").read_text(encoding="utf-8")) == [
+        Round(id=1).to_dict()
+    ]
+
+
+@pytest.mark.asyncio
+async def test_closed_rounds_move_to_monthly_archive(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path))
+    votes = [
+        {"id": 1, "status": "pushed", "started_at": "2024-01-05T18:00:00+11:00"},
+        {"id": 2, "status": "pushed", "started_at": "2024-02-09T18:00:00+11:00"},
+        {"id": 3, "status": "open", "started_at": "2024-02-16T18:00:00+11:00"},
+    ]
+    (tmp_path / "votes.json").write_text(json.dumps(votes), encoding="utf-8")
+
+    hot = await repo.load_votes()
+
+    assert [r.id for r in hot] == [3]
+    assert [r["id"] for r in json.loads((tmp_path / "votes.json").read_text(encoding="utf-8"))] == [
+        3
+    ]
+    assert [r.id for r in await repo.load_archive("2024-01")] == [1]
+    assert [r.id for r in await repo.load_archive()] == [1, 2]
+
+    hot[0].status = "pushed"
+    await repo.save_votes(hot)
+
+    assert hot == []
+    restarted = Repository(data_dir=str(tmp_path))
+    assert (await restarted.load_archived_round(3)).started_at.startswith("2024-02")
+    assert await restarted.load_archived_round(99) is None
+
+
+@pytest.mark.asyncio
+async def test_archiving_is_idempotent_after_interrupted_save(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path))
+    closed = {"id": 4, "status": "pushed", "started_at": "2024-03-01T18:00:00+11:00"}
+    await repo.save_votes([Round.from_dict(closed)])
+    # Simulate a crash after archiving but before votes.json was rewritten.
+    (tmp_path / "votes.json").write_text(json.dumps([closed]), encoding="utf-8")
+
+    restarted = Repository(data_dir=str(tmp_path))
+    assert await restarted.load_votes() == []
+    assert len(await restarted.load_archive("2024-03")) == 1
+
+
+@pytest.mark.asyncio
+async def test_indexes_follow_appends_and_saves(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path))
+    await repo.save_channels([{"guild_id": "1", "channel_id": "2"}])
+    await repo.save_votes([Round(id=7)])
+
+    assert (await repo.get_channel_row("1", "2"))["channel_id"] == "2"
+    assert await repo.get_channel_row("1", "3") is None
+    assert (await repo.get_round(7)).status == "open"
+
+    async with repo.transaction("channels") as chans:
+        chans.append({"guild_id": "1", "channel_id": "3"})
+        assert repo.channels_by_key(chans)[("1", "3")] is chans[-1]
+
+    async with repo.transaction("votes") as votes:
+        repo.rounds_by_id(votes)[7].status = "pushed"
+
+    assert (await repo.get_channel_row("1", "3")) is not None
+    assert await repo.get_round(7) is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("codec", ["json", "auto"])
+async def test_compact_mode_only_applies_to_high_churn_files(tmp_path: Path, codec: str):
+    repo = Repository(
+        data_dir=str(tmp_path), codec=repository_module.get_codec(codec), compact=True
+    )
+    votes = [Round(id=1, ballots={"42": 2})]
+    await repo.save_votes(votes)
+    await repo.save_cooldowns({"FOY": 2})
+
+    assert "\n" not in (tmp_path / "votes.json").read_text(encoding="utf-8")
+    assert (tmp_path / "cooldowns.json").read_text(encoding="utf-8") == json.dumps(
+        {"FOY": 2}, indent=2
+    )
+    restarted = Repository(data_dir=str(tmp_path), codec=repository_module.get_codec("json"))
+    assert await restarted.load_votes() == votes
+
+
+_WAL_WRITER = """
+import asyncio, sys
+from bot.models import Round
+from bot.persistence.repository import Repository
+
+async def main():
+    repo = Repository(sys.argv[1], wal=True, wal_max_bytes=4096, snapshot_interval=0)
+    votes = await repo.load_votes()
+    votes.append(Round(id=1))
+    await repo.save_votes(votes)
+    n = 0
+    while True:
+        n += 1
+        await repo.save_cooldowns({"n": n})
+        votes[0].ballots[str(n % 50)] = n
+        await repo.save_ballot(votes, 1, str(n % 50), n)
+        print(n, flush=True)
+
+asyncio.run(main())
+"""
+
+
+@pytest.mark.asyncio
+async def test_wal_recovers_every_acknowledged_write_after_kill(tmp_path: Path):
+    proc = subprocess.Popen(
+        [sys.executable, "-c", _WAL_WRITER, str(tmp_path)],
+        cwd=Path(__file__).resolve().parents[2],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    for line in proc.stdout:
+        if int(line) >= 300:
+            break
+    proc.kill()
+    rest = proc.stdout.read().split()
+    proc.wait()
+    acked = int(rest[-1]) if rest else int(line)
+
+    repo = Repository(data_dir=str(tmp_path), wal=True)
+    assert (await repo.load_cooldowns())["n"] in (acked, acked + 1)
+    ballots = (await repo.load_votes())[0].ballots
+    for n in range(acked - 49, acked + 1):
+        assert ballots[str(n % 50)] >= n
+    await repo.close()
+
+    assert (tmp_path / "wal.jsonl").stat().st_size == 0
+    assert json.loads((tmp_path / "cooldowns.json").read_text(encoding="utf-8"))["n"] >= acked
+
+
+@pytest.mark.asyncio
+async def test_wal_stays_bounded_and_skips_torn_tail(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path), wal=True, wal_max_bytes=2048, snapshot_interval=0)
+    for n in range(500):
+        await repo.save_cooldowns({"FOY": n})
+    assert (tmp_path / "wal.jsonl").stat().st_size < 2048
+    assert repo.disk_writes < 50
+    with open(tmp_path / "wal.jsonl", "ab") as f:
+        f.write(b'{"file": "cooldowns.json", "da')
+
+    restarted = Repository(data_dir=str(tmp_path), wal=True)
+    assert await restarted.load_cooldowns() == {"FOY": 499}
+    await restarted.save_cooldowns({"FOY": 500})
+
+    assert await Repository(data_dir=str(tmp_path), wal=True).load_cooldowns() == {"FOY": 500}
+
+
+@pytest.mark.asyncio
+async def test_save_ballots_appends_a_batch_to_the_journal(tmp_path: Path):
+    repo = Repository(data_dir=str(tmp_path), ballot_journal=True)
+    votes = [Round(id=5, ballots={"a": 1, "b": 2})]
+    await repo.save_votes(votes)
+
+    await repo.save_ballots(votes, [(5, "a", 1), (5, "b", 2)])
+
+    lines = (tmp_path / "ballots.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["user_id"] for line in lines] == ["a", "b"]
+    restarted = Repository(data_dir=str(tmp_path), ballot_journal=True)
+    assert (await restarted.load_votes())[0].ballots == {"a": 1, "b": 2}
+
+
+@pytest.mark.asyncio
+async def test_round_ids_continue_past_archived_rounds(tmp_path: Path):
+    (tmp_path / "votes.json").write_text(
+        json.dumps(
+            [
+                {"id": 15, "status": "pushed", "started_at": "2024-05-01T10:00:00"},
+                {"id": 3, "status": "open", "started_at": "2024-05-02T10:00:00"},
+            ]
+        )
+    )
+    repo = Repository(data_dir=str(tmp_path))
+    assert await RoundRegistry(repo).allocate_id() == 16
+    await repo.close()
+
+    restarted = Repository(data_dir=str(tmp_path))
+    assert await RoundRegistry(restarted).allocate_id() == 17
+    assert json.loads((tmp_path / "counters.json").read_text()) == {"round_id": 17}
+    await restarted.close()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from bot.models import Option, Round
+from bot.persistence.import_json import import_json
+from bot.persistence.sqlite_repository import SqliteRepository
+
+
+def _count(db: Path, sql: str) -> int:
+    conn = sqlite3.connect(db)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.asyncio
+async def test_round_and_ballots_survive_reopen(tmp_path: Path):
+    db = tmp_path / "state.sqlite3"
+    repo = SqliteRepository(str(db))
+    votes = await repo.load_votes()
+    votes.append(Round(id=3, channel_id="9", options=[Option(1, "FOY", "Foy")]))
+    await repo.save_votes(votes)
+
+    votes[0].ballots["77"] = 1
+    await repo.save_ballot(votes, 3, "77", 1)
+    await repo.close()
+
+    reopened = SqliteRepository(str(db))
+    loaded = await reopened.load_votes()
+    await reopened.close()
+
+    assert loaded == [
+        Round(id=3, channel_id="9", options=[Option(1, "FOY", "Foy")], ballots={"77": 1})
+    ]
+    conn = sqlite3.connect(db)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+
+@pytest.mark.asyncio
+async def test_closed_rounds_leave_hot_set_but_stay_queryable(tmp_path: Path):
+    db = tmp_path / "state.sqlite3"
+    repo = SqliteRepository(str(db))
+    votes = [
+        Round(id=1, status="pushed", started_at="2024-01-05", ballots={"a": 1}),
+        Round(id=2, started_at="2024-02-01"),
+    ]
+    await repo.save_votes(votes)
+    await repo.close()
+
+    assert [r.id for r in votes] == [2]
+    assert _count(db, "SELECT COUNT(*) FROM rounds") == 2
+
+    reopened = SqliteRepository(str(db))
+    assert [r.id for r in await reopened.load_votes()] == [2]
+    assert (await reopened.load_archived_round(1)).ballots == {"a": 1}
+    assert [r.id for r in await reopened.load_archive("2024-01")] == [1]
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_import_json_copies_every_collection(tmp_path: Path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "channels.json").write_text(json.dumps([{"guild_id": "1", "channel_id": "2"}]))
+    (data / "schedules.json").write_text(json.dumps([{"pool": "A", "cron": "0 18 * * FRI"}]))
+    (data / "cooldowns.json").write_text(json.dumps({"FOY": 2}))
+    (data / "maps.json").write_text(json.dumps([{"code": "FOY_WARFARE"}]))
+    (data / "pools.json").write_text(json.dumps([{"name": "A", "maps": ["FOY_WARFARE"]}]))
+    (data / "votes.json").write_text(json.dumps([{"id": 4, "status": "open"}]))
+    (data / "ballots.jsonl").write_text(
+        json.dumps({"round_id": 4, "user_id": "u", "index": 2}) + "\n"
+    )
+    db = tmp_path / "state.sqlite3"
+
+    counts = await import_json(str(data), str(db))
+
+    assert counts == {
+        "channels": 1,
+        "schedules": 1,
+        "cooldowns": 1,
+        "counters": 0,
+        "maps": 1,
+        "pools": 1,
+        "votes": 1,
+    }
+    repo = SqliteRepository(str(db))
+    assert (await repo.load_votes())[0].ballots == {"u": 2}
+    assert (await repo.load_channels())[0]["current_vote_message_id"] == "0"
+    assert await repo.load_cooldowns() == {"FOY": 2}
+    await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_get_round_and_channel_row(tmp_path: Path):
+    repo = SqliteRepository(str(tmp_path / "state.sqlite3"))
+    await repo.save_channels([{"guild_id": "1", "channel_id": "2"}])
+    await repo.save_votes([Round(id=3), Round(id=4)])
+
+    assert (await repo.get_channel_row("1", "2"))["guild_id"] == "1"
+    assert (await repo.get_round(4)).id == 4
+    assert await repo.get_round(5) is None
+    await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_ranked_ballots_round_trip(tmp_path: Path):
+    db = tmp_path / "state.sqlite3"
+    repo = SqliteRepository(str(db))
+    votes = [Round(id=1, voting_method="irv", ballots={"a": [2, 1]})]
+    await repo.save_votes(votes)
+    votes[0].ballots["b"] = [1]
+    await repo.save_ballot(votes, 1, "b", [1])
+    await repo.close()
+
+    restarted = SqliteRepository(str(db))
+    assert (await restarted.load_votes())[0].ballots == {"a": [2, 1], "b": [1]}
+    await restarted.close()
+
+
+@pytest.mark.asyncio
+async def test_import_json_keeps_reused_round_ids_and_leaves_source_untouched(tmp_path: Path):
+    data = tmp_path / "data"
+    (data / "archive").mkdir(parents=True)
+    # Round 1 of the first boot sits in the archive; the second boot reused id 1 and closed it inline.
+    first = {"id": 1, "started_at": "2024-01-05", "status": "pushed", "ballots": {"a": 1}}
+    second = {"id": 1, "started_at": "2024-03-02", "status": "pushed", "ballots": {"b": 2}}
+    (data / "archive" / "votes-2024-01.jsonl").write_text(json.dumps(first) + "\n")
+    (data / "archive" / "index.jsonl").write_text(
+        json.dumps({"id": 1, "started_at": "2024-01-05", "partition": "2024-01"}) + "\n"
+    )
+    (data / "votes.json").write_text(
+        json.dumps([second, {"id": 2, "started_at": "2024-03-03", "status": "open"}])
+    )
+    (data / "ballots.jsonl").write_text(
+        json.dumps({"round_id": 2, "user_id": "u", "index": 1}) + "\n"
+    )
+    before = {p: p.read_bytes() for p in data.rglob("*") if p.is_file()}
+    db = tmp_path / "state.sqlite3"
+
+    counts = await import_json(str(data), str(db))
+
+    assert {p: p.read_bytes() for p in data.rglob("*") if p.is_file()} == before
+    assert counts["votes"] == 3
+    assert _count(db, "SELECT COUNT(*) FROM rounds") == 3
+    repo = SqliteRepository(str(db))
+    assert [(r.started_at, r.ballots) for r in await repo.load_archive()] == [
+        ("2024-01-05", {"a": 1}),
+        ("2024-03-02", {"b": 2}),
+    ]
+    assert (await repo.load_archived_round(1)).started_at == "2024-03-02"
+    assert (await repo.load_votes())[0].ballots == {"u": 1}
+    await repo.close()
+
+
+@pytest.mark.asyncio
+async def test_import_json_refuses_conflicting_rounds(tmp_path: Path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "votes.json").write_text(
+        json.dumps(
+            [
+                {"id": 1, "started_at": "2024-01-05", "status": "pushed", "ballots": {"a": 1}},
+                {"id": 1, "started_at": "2024-01-05", "status": "pushed", "ballots": {"a": 2}},
+            ]
+        )
+    )
+
+    with pytest.raises(RuntimeError, match="Conflicting"):
+        await import_json(str(data), str(tmp_path / "state.sqlite3"))
+
+
+@pytest.mark.asyncio
+async def test_closing_round_stays_hot_until_finished(tmp_path: Path):
+    db = tmp_path / "state.sqlite3"
+    repo = SqliteRepository(str(db))
+    votes = [Round(id=1, status="closing", started_at="2024-01-05")]
+    await repo.save_votes(votes)
+    await repo.close()
+
+    reopened = SqliteRepository(str(db))
+    votes = await reopened.load_votes()
+    assert [r.status for r in votes] == ["closing"]
+    votes[0].status = "pushed"
+    await reopened.save_votes(votes)
+    assert votes == []
+    assert [r.status for r in await reopened.load_archive()] == ["pushed"]
+    await reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_import_json_replays_an_uncheckpointed_wal(tmp_path: Path):
+    data = tmp_path / "data"
+    data.mkdir()
+    (data / "wal.jsonl").write_text(
+        "".join(
+            json.dumps(entry) + "\n"
+            for entry in (
+                {
+                    "file": "votes.json",
+                    "data": [{"id": 6, "started_at": "2024-05-01", "status": "open"}],
+                },
+                {"file": "cooldowns.json", "data": {"foy": 2}},
+                {"ballot": {"round_id": 6, "user_id": "u", "index": 1}},
+            )
+        )
+    )
+    before = {p: p.read_bytes() for p in data.rglob("*") if p.is_file()}
+    db = tmp_path / "state.sqlite3"
+
+    counts = await import_json(str(data), str(db))
+
+    assert (counts["votes"], counts["cooldowns"]) == (1, 1)
+    assert {p: p.read_bytes() for p in data.rglob("*") if p.is_file()} == before
+    repo = SqliteRepository(str(db))
+    assert (await repo.load_votes())[0].ballots == {"u": 1}
+    assert await repo.load_cooldowns() == {"foy": 2}
+    await repo.close()
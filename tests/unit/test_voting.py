@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import pytest
 
+from bot.models import Round
 from bot.services import voting
 
 
@@ -14,12 +15,15 @@ def deterministic_choice(monkeypatch: pytest.MonkeyPatch):
 
 
 def test_determine_winner_no_votes_returns_random_option_with_detail():
-    round_data = {
-        "options": [
-            {"map": "FOY", "label": "Foy", "votes": 0},
-            {"map": "OMAHA", "label": "Omaha", "votes": 0},
-        ]
-    }
+    round_data = Round.from_dict(
+        {
+            "id": 1,
+            "options": [
+                {"index": 1, "map": "FOY", "label": "Foy", "votes": 0},
+                {"index": 2, "map": "OMAHA", "label": "Omaha", "votes": 0},
+            ],
+        }
+    )
 
     winner, detail = voting.determine_winner(round_data, return_detail=True)
 
@@ -29,13 +33,16 @@ def test_determine_winner_no_votes_returns_random_option_with_detail():
 
 
 def test_determine_winner_enforces_minimum_votes_before_random(monkeypatch: pytest.MonkeyPatch):
-    round_data = {
-        "options": [
-            {"map": "FOY", "label": "Foy", "votes": 2},
-            {"map": "OMAHA", "label": "Omaha", "votes": 0},
-        ],
-        "meta": {"minimum_votes": 10},
-    }
+    round_data = Round.from_dict(
+        {
+            "id": 1,
+            "options": [
+                {"index": 1, "map": "FOY", "label": "Foy", "votes": 2},
+                {"index": 2, "map": "OMAHA", "label": "Omaha", "votes": 0},
+            ],
+            "meta": {"minimum_votes": 10},
+        }
+    )
 
     winner, detail = voting.determine_winner(round_data, return_detail=True)
 
@@ -46,13 +53,16 @@ def test_determine_winner_enforces_minimum_votes_before_random(monkeypatch: pyte
 
 
 def test_determine_winner_breaks_ties_randomly(monkeypatch: pytest.MonkeyPatch):
-    round_data = {
-        "options": [
-            {"map": "FOY", "label": "Foy", "votes": 5},
-            {"map": "OMAHA", "label": "Omaha", "votes": 5},
-            {"map": "UTAH", "label": "Utah", "votes": 1},
-        ]
-    }
+    round_data = Round.from_dict(
+        {
+            "id": 1,
+            "options": [
+                {"index": 1, "map": "FOY", "label": "Foy", "votes": 5},
+                {"index": 2, "map": "OMAHA", "label": "Omaha", "votes": 5},
+                {"index": 3, "map": "UTAH", "label": "Utah", "votes": 1},
+            ],
+        }
+    )
 
     winner, detail = voting.determine_winner(round_data, return_detail=True)
 
@@ -62,15 +72,120 @@ def test_determine_winner_breaks_ties_randomly(monkeypatch: pytest.MonkeyPatch):
 
 
 def test_determine_winner_picks_highest_vote_when_unique():
-    round_data = {
-        "options": [
-            {"map": "OMAHA", "label": "Omaha", "votes": 7},
-            {"map": "FOY", "label": "Foy", "votes": 3},
-        ]
-    }
+    round_data = Round.from_dict(
+        {
+            "id": 1,
+            "options": [
+                {"index": 1, "map": "OMAHA", "label": "Omaha", "votes": 7},
+                {"index": 2, "map": "FOY", "label": "Foy", "votes": 3},
+            ],
+        }
+    )
 
     winner, detail = voting.determine_winner(round_data, return_detail=True)
 
     assert winner == "OMAHA"
     assert detail["reason"] == "highest"
     assert detail["chosen_label"] == "Omaha"
+
+
+def test_tally_counts_persisted_ballots_and_moves_changed_votes():
+    round_data = Round.from_dict(
+        {
+            "id": 1,
+            "options": [
+                {"index": 1, "map": "FOY", "label": "Foy"},
+                {"index": 2, "map": "OMAHA", "label": "Omaha"},
+            ],
+            "ballots": {"a": 1, "b": 1},
+        }
+    )
+    tally = voting.Tally(round_data)
+    assert tally.counts == {1: 2, 2: 0}
+
+    assert tally.vote("a", 2) is True
+    assert tally.vote("a", 2) is False
+    assert tally.vote("c", 2) is True
+
+    assert tally.counts == {1: 1, 2: 2}
+    assert tally.total == 3
+    assert round_data.ballots == {"a": 2, "b": 1, "c": 2}
+    tally.apply(round_data.options)
+    assert [o.votes for o in round_data.options] == [1, 2]
+
+
+def _irv_round(ballots):
+    return Round.from_dict(
+        {
+            "id": 1,
+            "meta": {"voting_method": "irv"},
+            "options": [
+                {"index": 1, "map": "FOY", "label": "Foy", "votes": 0},
+                {"index": 2, "map": "OMAHA", "label": "Omaha", "votes": 0},
+                {"index": 3, "map": "UTAH", "label": "Utah", "votes": 0},
+            ],
+            "ballots": ballots,
+        }
+    )
+
+
+def test_instant_runoff_transfers_eliminated_preferences():
+    ballots = {}
+    ballots.update({f"a{i}": [1, 3] for i in range(4)})
+    ballots.update({f"b{i}": [2] for i in range(3)})
+    ballots.update({f"c{i}": [3, 2] for i in range(2)})
+
+    winner, detail = voting.determine_winner(_irv_round(ballots), return_detail=True)
+
+    assert winner == "OMAHA"
+    assert detail["reason"] == "majority"
+    assert detail["rounds"] == [
+        {"counts": {"Foy": 4, "Omaha": 3, "Utah": 2}, "eliminated": "Utah"},
+        {"counts": {"Foy": 4, "Omaha": 5}, "eliminated": None},
+    ]
+
+
+def test_irv_tally_keeps_compact_rankings_in_step_with_clicks():
+    round_data = _irv_round({"a": [1, 3], "b": [2]})
+    tally = voting.Tally(round_data)
+    tally.vote("c", 3)
+    tally.vote("c", 2)
+    tally.vote("b", 2)
+
+    assert tally.rankings == {"a": b"\x00\x02", "c": b"\x02\x01"}
+    with_tally = voting.determine_winner(round_data, return_detail=True, tally=tally)
+    assert with_tally == voting.determine_winner(round_data, return_detail=True)
+
+
+def test_instant_runoff_counts_exhausted_ballots_out():
+    rankings = [b"\x00", b"\x00", b"\x01", b"\x01\x00", b"\x02", b"\x02", b"\x02"]
+    winner, rounds, reason = voting.instant_runoff(3, rankings, choice=lambda xs: xs[0])
+
+    assert (winner, reason) == (2, "majority")
+    assert rounds[0] == {"counts": {0: 2, 1: 2, 2: 3}, "eliminated": 0}
+    assert rounds[1] == {"counts": {1: 2, 2: 3}, "eliminated": None}
+
+
+def test_approval_tally_toggles_and_counts_every_approved_option():
+    round_data = Round.from_dict(
+        {
+            "id": 1,
+            "meta": {"voting_method": "approval"},
+            "options": [
+                {"index": 1, "map": "FOY", "label": "Foy", "votes": 0},
+                {"index": 2, "map": "OMAHA", "label": "Omaha", "votes": 0},
+            ],
+            "ballots": {"a": [1, 2]},
+        }
+    )
+    tally = voting.Tally(round_data)
+    tally.vote("b", 2)
+    tally.vote("c", 1)
+    tally.vote("c", 1)
+
+    assert tally.counts == {1: 1, 2: 2}
+    assert round_data.ballots == {"a": [1, 2], "b": [2], "c": []}
+    assert tally.total == 2
+    tally.apply(round_data.options)
+    winner, detail = voting.determine_winner(round_data, return_detail=True)
+    assert (winner, detail["method"]) == ("OMAHA", "approval")